@@ -1,82 +1,173 @@
-import requests
-import pandas as pd
 from datetime import datetime, timedelta
-from config import Config
-import os
-from dotenv import load_dotenv
+from config import Config, warn_once
+from api.session import get_session, get_timeout
+
+# Meteomatics codes for values that are not available
+MISSING_VALUES = (-666.0, -999.0)
+
+
+def pivot_timeseries(data, fields=None):
+    """
+    Reshape a Meteomatics JSON 'data' list (one time series per parameter and
+    coordinate) into per-coordinate rows keyed by date, in one pass.
+    
+    Returns one list of {'date': ..., <field>: value} rows per coordinate, in
+    request order, with dates in first-seen order. fields maps parameter names
+    to row keys; unmapped parameters keep their Meteomatics name.
+    """
+    fields = fields or {}
+    points = []
+    for item in data:
+        parameter = item.get('parameter', '')
+        field = fields.get(parameter, parameter)
+        for index, coordinate in enumerate(item.get('coordinates', [])):
+            if index == len(points):
+                points.append({})
+            rows = points[index]
+            for date_item in coordinate.get('dates', []):
+                date = date_item.get('date', '')
+                row = rows.get(date)
+                if row is None:
+                    row = rows[date] = {'date': date}
+                row[field] = date_item.get('value')
+    
+    return [list(rows.values()) for rows in points]
+
+
+def parse_csv(lines, fields=None):
+    """
+    Parse a Meteomatics CSV response (';' separated, one row per point and
+    time) in one pass into {field: float} rows, in response order.
+    
+    The header is 'validdate;<parameters>' for one point, or
+    'lat;lon;validdate;<parameters>' for several. Values that are not numbers,
+    and the -666/-999 "not available" codes, become None.
+    """
+    fields = fields or {}
+    rows = []
+    columns = None
+    for line in lines:
+        if not line:
+            continue
+        cells = line.split(';')
+        if columns is None:
+            columns = [fields.get(name, name) for name in cells]
+            continue
+        
+        row = {}
+        for name, cell in zip(columns, cells):
+            if name == 'validdate':
+                row['validdate'] = cell
+                continue
+            try:
+                value = float(cell)
+            except ValueError:
+                value = None
+            row[name] = None if value in MISSING_VALUES else value
+        rows.append(row)
+    return rows
 
-# Load environment variables
-load_dotenv()
 
 class MeteomaticsAPI:
     """
     Handle Meteomatics weather data integration as a fallback option
     """
     
+    # Meteomatics parameters and the field names used in our data structure
+    PARAMETER_FIELDS = {
+        't_2m:C': 'temperature',
+        'relative_humidity_2m:p': 'humidity',
+        'wind_speed_10m:ms': 'wind_speed',
+        'wind_dir_10m:d': 'wind_direction'
+    }
+    CURRENT_PARAMETERS = ('t_2m:C', 'relative_humidity_2m:p', 'wind_speed_10m:ms', 'wind_dir_10m:d')
+    FORECAST_PARAMETERS = ('t_2m:C', 'relative_humidity_2m:p', 'wind_speed_10m:ms')
+    
     def __init__(self):
         # Get credentials from environment variables
-        self.username = os.getenv('METEOMATICS_USERNAME')
-        self.password = os.getenv('METEOMATICS_PASSWORD')
+        self.username = Config.METEOMATICS_USERNAME
+        self.password = Config.METEOMATICS_PASSWORD
         self.base_url = "https://api.meteomatics.com"
+        self.session = get_session('meteomatics')
+        self.timeout = get_timeout('meteomatics')
         
         # Warn if credentials are missing
         if not self.username or not self.password:
-            print("⚠️  METEOMATICS_USERNAME or METEOMATICS_PASSWORD not found. Using mock data for Meteomatics API.")
+            warn_once("⚠️  METEOMATICS_USERNAME or METEOMATICS_PASSWORD not found. Using mock data for Meteomatics API.")
     
     def get_current_weather(self, lat=Config.GOA_COORDINATES['latitude'],
                           lon=Config.GOA_COORDINATES['longitude']):
         """
         Get current weather conditions from Meteomatics API
         """
+        return self.get_current_weather_batch([(lat, lon)])[0]
+    
+    def get_current_weather_batch(self, coordinates, parameters=None):
+        """
+        Get current conditions for many (lat, lon) pairs in one CSV request,
+        one result per pair. parameters defaults to CURRENT_PARAMETERS; known
+        ones are renamed via PARAMETER_FIELDS.
+        """
         # If no credentials, return mock data
         if not self.username or not self.password:
-            return self._get_mock_weather()
+            return [self._get_mock_weather() for _ in coordinates]
             
         try:
             # Format the current time for the API request
             current_time = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
             
-            # Parameters for current weather data
-            params = f"{current_time}/t_2m:C,relative_humidity_2m:p,wind_speed_10m:ms,wind_dir_10m:d/{lat},{lon}"
-            url = f"{self.base_url}/{params}/html"
+            parameter_list = list(parameters or self.CURRENT_PARAMETERS)
+            points = '+'.join(f"{lat},{lon}" for lat, lon in coordinates)
+            url = f"{self.base_url}/{current_time}/{','.join(parameter_list)}/{points}/csv"
             
             # Make the request with basic authentication
-            response = requests.get(url, auth=(self.username, self.password), timeout=15)
+            response = self.session.get(url, auth=(self.username, self.password),
+                                        timeout=self.timeout, stream=True)
             
-            if response.status_code == 200:
-                # Parse the HTML response (simplified parsing)
-                # In a real implementation, you would parse the HTML table properly
-                data = response.text
-                
-                # Extract data from HTML (this is a simplified approach)
-                processed_data = {
-                    'temperature': self._extract_value(data, 't_2m:C'),
-                    'humidity': self._extract_value(data, 'relative_humidity_2m:p'),
-                    'wind_speed': self._extract_value(data, 'wind_speed_10m:ms'),
-                    'wind_direction': self._extract_value(data, 'wind_dir_10m:d'),
-                    'timestamp': current_time
-                }
-                
-                return {
+            with response:
+                if response.status_code != 200:
+                    print(f"Meteomatics API error: {response.status_code}")
+                    return [self._get_mock_weather() for _ in coordinates]
+                # Decode lines as they stream in; CSV responses are plain ASCII/UTF-8
+                response.encoding = response.encoding or 'utf-8'
+                rows = parse_csv(response.iter_lines(decode_unicode=True), self.PARAMETER_FIELDS)
+            
+            if len(rows) != len(coordinates):
+                print(f"Meteomatics returned {len(rows)} rows for {len(coordinates)} coordinates")
+                return [self._get_mock_weather() for _ in coordinates]
+            
+            results = []
+            for row in rows:
+                row.pop('lat', None)
+                row.pop('lon', None)
+                row['timestamp'] = row.pop('validdate', current_time)
+                results.append({
                     'status': 'success',
-                    'data': processed_data,
+                    'data': row,
                     'source': 'Meteomatics'
-                }
-            else:
-                print(f"Meteomatics API error: {response.status_code}")
-                return self._get_mock_weather()
+                })
+            return results
                 
         except Exception as e:
             print(f"Error fetching Meteomatics weather data: {e}")
-            return self._get_mock_weather()
+            return [self._get_mock_weather() for _ in coordinates]
     
-    def get_forecast_weather(self, days=7):
+    def get_forecast_weather(self, days=7, lat=Config.GOA_COORDINATES['latitude'],
+                             lon=Config.GOA_COORDINATES['longitude'], parameters=None):
         """
         Get weather forecast for next 7 days from Meteomatics API
         """
+        return self.get_forecast_weather_batch([(lat, lon)], days, parameters)[0]
+    
+    def get_forecast_weather_batch(self, coordinates, days=7, parameters=None, step='PT1H'):
+        """
+        Get forecasts for many (lat, lon) pairs in one request, one result per pair.
+        parameters is a list of Meteomatics parameter names (FORECAST_PARAMETERS
+        by default); known ones are renamed via PARAMETER_FIELDS.
+        """
         # If no credentials, return mock data
         if not self.username or not self.password:
-            return self._get_mock_forecast(days)
+            return [self._get_mock_forecast(days) for _ in coordinates]
             
         try:
             # Calculate start and end dates
@@ -86,82 +177,33 @@ class MeteomaticsAPI:
             start_time = start_date.strftime('%Y-%m-%dT%H:%M:%SZ')
             end_time = end_date.strftime('%Y-%m-%dT%H:%M:%SZ')
             
-            # Parameters for forecast weather data
-            lat = Config.GOA_COORDINATES['latitude']
-            lon = Config.GOA_COORDINATES['longitude']
+            parameter_list = ','.join(parameters or self.FORECAST_PARAMETERS)
+            points = '+'.join(f"{lat},{lon}" for lat, lon in coordinates)
             
-            params = f"{start_time}--{end_time}:PT1H/t_2m:C,relative_humidity_2m:p,wind_speed_10m:ms/{lat},{lon}"
+            params = f"{start_time}--{end_time}:{step}/{parameter_list}/{points}"
             url = f"{self.base_url}/{params}/json"
             
             # Make the request with basic authentication
-            response = requests.get(url, auth=(self.username, self.password), timeout=15)
+            response = self.session.get(url, auth=(self.username, self.password), timeout=self.timeout)
             
             if response.status_code == 200:
-                data = response.json()
-                
-                # Process forecast data
-                forecast = []
-                for item in data.get('data', []):
-                    parameter = item.get('parameter', '')
-                    coordinates = item.get('coordinates', [])
-                    
-                    if coordinates:
-                        dates = coordinates[0].get('dates', [])
-                        for date_item in dates:
-                            date = date_item.get('date', '')
-                            value = date_item.get('value', None)
-                            
-                            # Find existing entry for this date or create new
-                            entry = next((f for f in forecast if f['date'] == date), None)
-                            if not entry:
-                                entry = {'date': date}
-                                forecast.append(entry)
-                            
-                            # Map parameters to our data structure
-                            if 't_2m:C' in parameter:
-                                entry['temperature'] = value
-                            elif 'relative_humidity_2m:p' in parameter:
-                                entry['humidity'] = value
-                            elif 'wind_speed_10m:ms' in parameter:
-                                entry['wind_speed'] = value
+                forecasts = pivot_timeseries(response.json().get('data', []), self.PARAMETER_FIELDS)
                 
-                return {
-                    'status': 'success',
-                    'data': forecast,
-                    'source': 'Meteomatics'
-                }
+                return [
+                    {
+                        'status': 'success',
+                        'data': forecasts[index] if index < len(forecasts) else [],
+                        'source': 'Meteomatics'
+                    }
+                    for index in range(len(coordinates))
+                ]
             else:
                 print(f"Meteomatics Forecast API error: {response.status_code}")
-                return self._get_mock_forecast(days)
+                return [self._get_mock_forecast(days) for _ in coordinates]
                 
         except Exception as e:
             print(f"Error fetching Meteomatics forecast data: {e}")
-            return self._get_mock_forecast(days)
-    
-    def _extract_value(self, html_data, parameter):
-        """
-        Extract value from Meteomatics HTML response
-        This is a simplified parser - in production, use proper HTML parsing
-        """
-        try:
-            # Find the parameter in the HTML
-            if parameter in html_data:
-                # Simple extraction - find the parameter and get the next value
-                param_index = html_data.find(parameter)
-                if param_index > 0:
-                    # Look for the value after the parameter
-                    value_start = html_data.find('<td>', param_index) + 4
-                    value_end = html_data.find('</td>', value_start)
-                    if value_start > 4 and value_end > value_start:
-                        value_str = html_data[value_start:value_end].strip()
-                        # Try to convert to float
-                        try:
-                            return float(value_str)
-                        except ValueError:
-                            return value_str
-            return None
-        except:
-            return None
+            return [self._get_mock_forecast(days) for _ in coordinates]
     
     def _get_mock_weather(self):
         """Generate mock current weather data"""
@@ -1,13 +1,46 @@
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
-from config import Config
+import numpy as np
+from functools import lru_cache
+from types import MappingProxyType
+from datetime import datetime, timedelta, timezone
+from config import Config, warn_once
+from api.session import get_session, get_timeout
+from utils.locations import haversine_km
+
+# Pollutant keys OpenAQ parameters are mapped to
+POLLUTANTS = ('pm25', 'pm10', 'no2', 'o3', 'so2', 'co')
+
+
+def _build_unit_factors():
+    """(unit, parameter) -> factor to µg/m³, for the spellings OpenAQ uses"""
+    factors = {}
+    for parameter in POLLUTANTS:
+        # Most OpenAQ data is already in µg/m³
+        for unit in ('µg/m³', 'μg/m³', 'ug/m3', 'µg/m3'):
+            factors[(unit, parameter)] = 1.0
+    for unit in ('mg/m³', 'mg/m3'):
+        factors[(unit, 'co')] = 1000.0  # Convert mg/m³ to µg/m³
+    
+    # Also accept the upper-case spellings as sent
+    for (unit, parameter), factor in list(factors.items()):
+        factors[(unit.upper(), parameter)] = factor
+    return factors
+
+
+@lru_cache(maxsize=256)
+def _normalize_parameter(name):
+    """OpenAQ parameter name in any case -> our pollutant key, or None if not one we keep"""
+    key = str(name).strip().lower()
+    return key if key in POLLUTANTS else None
+
 
 class OpenAQAPI:
     """
     Handle OpenAQ ground-based air quality measurements
     """
     
+    # Precompiled unit conversion table, read-only as it is shared by every thread
+    _UNIT_FACTORS = MappingProxyType(_build_unit_factors())
+    
     def __init__(self):
         self.base_url = "https://api.openaq.org/v2"
         self.api_key = Config.OPENAQ_API_KEY
@@ -15,10 +48,12 @@ class OpenAQAPI:
             'X-API-Key': self.api_key,
             'Content-Type': 'application/json'
         } if self.api_key else {}
+        self.session = get_session('openaq')
+        self.timeout = get_timeout('openaq')
         
         # Warn if API key is missing
         if not self.api_key:
-            print("⚠️  OPENAQ_API_KEY not found. Using mock data for OpenAQ API.")
+            warn_once("⚠️  OPENAQ_API_KEY not found. Using mock data for OpenAQ API.")
     
     def get_latest_measurements(self, lat=Config.GOA_COORDINATES['latitude'],
                               lon=Config.GOA_COORDINATES['longitude'],
@@ -39,16 +74,16 @@ class OpenAQAPI:
                 'limit': 100
             }
             
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/latest",
                 headers=self.headers,
                 params=params,
-                timeout=10
+                timeout=self.timeout
             )
             
             if response.status_code == 200:
                 data = response.json()
-                processed_data = self._process_measurements(data['results'])
+                processed_data = self._process_measurements(data['results'], lat, lon)
                 return {
                     'status': 'success',
                     'data': processed_data,
@@ -62,8 +97,16 @@ class OpenAQAPI:
             print(f"Error fetching OpenAQ data: {e}")
             return self._get_mock_data()
     
-    def _process_measurements(self, results):
-        """Process OpenAQ measurements into standardized format"""
+    def _process_measurements(self, results, lat=None, lon=None):
+        """
+        Process OpenAQ measurements into standardized format.
+        
+        Accepts flat rows (/measurements) and nested per-station rows
+        (/latest). For every pollutant the freshest reading of each station is
+        kept; stations whose reading is more than OPENAQ_MAX_READING_AGE_HOURS
+        older than the newest one are dropped, and the rest are combined with
+        an inverse-distance weighted mean around (lat, lon).
+        """
         measurements = {
             'pm25': None,
             'pm10': None,
@@ -74,27 +117,92 @@ class OpenAQAPI:
             'timestamp': datetime.now().isoformat()
         }
         
-        for result in results:
-            parameter = result.get('parameter', '').lower()
-            value = result.get('value')
-            unit = result.get('unit', '')
+        # {parameter: {station: (epoch seconds, value, lat, lon)}}
+        freshest = {}
+        for station, parameter, value, unit, observed, station_lat, station_lon in self._iter_readings(results):
+            parameter = _normalize_parameter(parameter)
+            if parameter is None or value is None:
+                continue
+            stations = freshest.setdefault(parameter, {})
+            current = stations.get(station)
+            if current is None or observed > current[0] or current[0] != current[0]:
+                stations[station] = (observed, self._convert_units(value, unit, parameter), station_lat, station_lon)
+        
+        station_counts = {}
+        newest_overall = None
+        max_age = Config.OPENAQ_MAX_READING_AGE_HOURS * 3600
+        for parameter, stations in freshest.items():
+            observed, values, station_lats, station_lons = (
+                np.array(column, dtype=float) for column in zip(*stations.values())
+            )
+            newest = np.nanmax(observed) if not np.isnan(observed).all() else np.nan
+            if not np.isnan(newest):
+                # Readings without a time are kept; known stale ones are not
+                keep = np.isnan(observed) | (observed >= newest - max_age)
+                observed, values, station_lats, station_lons = (
+                    column[keep] for column in (observed, values, station_lats, station_lons)
+                )
+                newest_overall = newest if newest_overall is None else max(newest_overall, newest)
             
-            if parameter in measurements and value is not None:
-                # Convert units if needed
-                converted_value = self._convert_units(value, unit, parameter)
-                measurements[parameter] = converted_value
+            weights = np.ones(len(values))
+            if lat is not None and lon is not None:
+                distances = haversine_km(lat, lon, station_lats, station_lons)
+                located = ~np.isnan(distances)
+                if located.any():
+                    # Inverse-distance weights, softened so a co-located station does not take all the weight
+                    weights = np.where(located, 1.0 / (np.nan_to_num(distances) + 1.0) ** 2, 0.0)
+            
+            measurements[parameter] = round(float(np.average(values, weights=weights)), 2)
+            station_counts[parameter] = int(len(values))
         
+        measurements['station_counts'] = station_counts
+        if newest_overall is not None:
+            measurements['observed_at'] = datetime.fromtimestamp(newest_overall, timezone.utc).isoformat()
         return measurements
     
+    def _iter_readings(self, results):
+        """
+        Yield (station, parameter, value, unit, epoch seconds or NaN, lat, lon)
+        from flat or nested OpenAQ result rows. Stations without an id are
+        keyed by their coordinates, or by row when those are missing too.
+        """
+        for row, result in enumerate(results):
+            coordinates = result.get('coordinates') or {}
+            station_lat = coordinates.get('latitude', np.nan)
+            station_lon = coordinates.get('longitude', np.nan)
+            station = result.get('locationId', result.get('id', result.get('location')))
+            if station is None:
+                located = station_lat is not None and station_lon is not None and station_lat == station_lat
+                station = ('coordinates', station_lat, station_lon) if located else ('row', row)
+            
+            nested = result.get('measurements')
+            if nested is not None:
+                for measurement in nested:
+                    yield (station, measurement.get('parameter'), measurement.get('value'),
+                           measurement.get('unit'), self._parse_time(measurement.get('lastUpdated')),
+                           station_lat, station_lon)
+            else:
+                observed = (result.get('date') or {}).get('utc') or result.get('lastUpdated')
+                yield (station, result.get('parameter'), result.get('value'), result.get('unit'),
+                       self._parse_time(observed), station_lat, station_lon)
+    
+    @staticmethod
+    def _parse_time(value):
+        """ISO timestamp to epoch seconds (NaN when missing or malformed)"""
+        if not value:
+            return np.nan
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except (TypeError, ValueError):
+            return np.nan
+    
     def _convert_units(self, value, unit, parameter):
         """Convert different units to standard µg/m³"""
-        # Most OpenAQ data is already in µg/m³
-        if unit.lower() in ['µg/m³', 'ug/m3']:
-            return value
-        elif unit.lower() in ['mg/m³', 'mg/m3'] and parameter == 'co':
-            return value * 1000  # Convert mg/m³ to µg/m³
-        else:
-            return value
+        factor = self._UNIT_FACTORS.get((unit, parameter))
+        if factor is None:
+            # Unseen spelling: look up its normalized form
+            factor = self._UNIT_FACTORS.get(((unit or '').strip().lower(), parameter), 1.0)
+        return value * factor if factor != 1.0 else value
     
     def _get_mock_data(self):
         """Generate mock data when API is unavailable"""
@@ -129,11 +237,11 @@ class OpenAQAPI:
                 'limit': 50
             }
             
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/locations",
                 headers=self.headers,
                 params=params,
-                timeout=10
+                timeout=self.timeout
             )
             
             if response.status_code == 200:
@@ -144,3 +252,48 @@ class OpenAQAPI:
         except Exception as e:
             print(f"Error fetching stations: {e}")
             return None
+    
+    def iter_stations(self, lat, lon, radius=50000, limit=100):
+        """
+        Yield every monitoring station near a location, following pagination
+        (get_stations_near_location only returns the first page)
+        """
+        if not self.api_key:
+            return
+        
+        page = 1
+        while True:
+            response = self.session.get(
+                f"{self.base_url}/locations",
+                headers=self.headers,
+                params={'coordinates': f'{lat},{lon}', 'radius': radius, 'limit': limit, 'page': page},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            results = response.json().get('results', [])
+            yield from results
+            if len(results) < limit:
+                return
+            page += 1
+    
+    def get_measurements_page(self, location_id, date_from, date_to, page=1, limit=1000):
+        """
+        Get one page of raw /measurements for a station between two ISO
+        datetimes, oldest first. Raises on HTTP errors so callers can retry.
+        """
+        response = self.session.get(
+            f"{self.base_url}/measurements",
+            headers=self.headers,
+            params={
+                'location_id': location_id,
+                'date_from': date_from,
+                'date_to': date_to,
+                'order_by': 'datetime',
+                'sort': 'asc',
+                'page': page,
+                'limit': limit
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json().get('results', [])
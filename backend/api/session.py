@@ -0,0 +1,116 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+from utils.resilience import HealthTracker
+
+# Rolling latency/error health and circuit state per API client. A call is
+# slow once it takes most of its client's timeout, so a client with a long
+# timeout (Meteomatics, backfill pages) is not failed for normal latency
+source_health = HealthTracker(
+    slow_call_for=lambda name: get_timeout(name) * Config.HEALTH_SLOW_CALL_FRACTION,
+    window_seconds=Config.HEALTH_WINDOW_SECONDS,
+    min_calls=Config.HEALTH_MIN_CALLS,
+    failure_rate=Config.HEALTH_FAILURE_RATE,
+    consecutive_failures=Config.HEALTH_CONSECUTIVE_FAILURES,
+    reset_timeout=Config.HEALTH_RESET_SECONDS
+)
+
+# One pooled session per API client, shared by every instance in the process
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class TrackedSession(requests.Session):
+    """
+    Session that records every request in its source's health and fails fast
+    while the source's circuit is open, so callers drop straight to their
+    fallback data instead of waiting out the timeout
+    """
+
+    def __init__(self, health):
+        super().__init__()
+        self.health = health
+
+    def request(self, method, url, *args, **kwargs):
+        if not self.health.allow_request():
+            raise CircuitOpenError(f'Circuit open, not calling {url.split("?")[0]}')
+
+        start = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception as e:
+            self.health.record(time.monotonic() - start, False, error=type(e).__name__)
+            raise
+
+        # Client errors (bad key, unknown station) say nothing about upstream health
+        ok = response.status_code < 500 and response.status_code != 429
+        self.health.record(time.monotonic() - start, ok, error=None if ok else f'HTTP {response.status_code}')
+        return response
+
+
+def get_session(client_name):
+    """
+    Get the shared keep-alive session for an API client
+    """
+    with _sessions_lock:
+        session = _sessions.get(client_name)
+        if session is None:
+            session = _build_session(source_health.get(client_name))
+            _sessions[client_name] = session
+        return session
+
+
+def get_timeout(client_name):
+    """Get the request timeout (seconds) configured for an API client"""
+    return Config.HTTP_TIMEOUTS.get(client_name, Config.HTTP_DEFAULT_TIMEOUT)
+
+
+def _build_retry():
+    """Bounded retries for idempotent requests with jittered exponential backoff"""
+    options = {
+        'total': Config.HTTP_MAX_RETRIES,
+        'connect': Config.HTTP_MAX_RETRIES,
+        'read': Config.HTTP_MAX_RETRIES,
+        'status': Config.HTTP_MAX_RETRIES,
+        'backoff_factor': Config.HTTP_BACKOFF_FACTOR,
+        'status_forcelist': (429, 500, 502, 503, 504),
+        'allowed_methods': frozenset(['GET', 'HEAD']),
+        # Hand the last response back to the caller so it can fall back to mock data
+        'raise_on_status': False,
+        # Never sleep on a long Retry-After; callers have their own fallbacks
+        'respect_retry_after_header': False
+    }
+    try:
+        return Retry(backoff_jitter=Config.HTTP_BACKOFF_JITTER, **options)
+    except TypeError:
+        # urllib3 < 2.0 has no backoff jitter support
+        return Retry(**options)
+
+
+def _build_adapter(pool_size):
+    return HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=_build_retry()
+    )
+
+
+def _build_session(health):
+    session = TrackedSession(health)
+
+    default_adapter = _build_adapter(Config.HTTP_POOL_SIZE)
+    session.mount('http://', default_adapter)
+    session.mount('https://', default_adapter)
+
+    # Dedicated pools for known upstream hosts
+    for host, pool_size in Config.HTTP_HOST_POOL_SIZES.items():
+        session.mount(f'https://{host}', _build_adapter(pool_size))
+
+    return session
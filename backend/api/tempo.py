@@ -1,8 +1,6 @@
-import requests
-import pandas as pd
 import json
 from datetime import datetime, timedelta
-from config import Config
+from config import Config, warn_once
 
 class TempoAPI:
     """
@@ -19,7 +17,7 @@ class TempoAPI:
         
         # Warn if token is missing
         if not self.token:
-            print("⚠️  NASA_TOKEN not found. Using mock data for TEMPO API.")
+            warn_once("⚠️  NASA_TOKEN not found. Using mock data for TEMPO API.")
     
     def get_latest_data(self, lat=Config.GOA_COORDINATES['latitude'], 
                        lon=Config.GOA_COORDINATES['longitude']):
@@ -59,25 +57,25 @@ class TempoAPI:
                 'data': None
             }
     
-    def _generate_mock_no2(self):
+    def _generate_mock_no2(self, rng=None):
         """Generate realistic NO2 values for Goa"""
         import random
         # Typical NO2 values for Indian coastal cities (µg/m³)
-        base_value = random.uniform(20, 80)
+        base_value = (rng or random).uniform(20, 80)
         return round(base_value, 2)
     
-    def _generate_mock_o3(self):
+    def _generate_mock_o3(self, rng=None):
         """Generate realistic O3 values"""
         import random
         # Typical O3 values (µg/m³)
-        base_value = random.uniform(60, 120)
+        base_value = (rng or random).uniform(60, 120)
         return round(base_value, 2)
     
-    def _generate_mock_hcho(self):
+    def _generate_mock_hcho(self, rng=None):
         """Generate realistic HCHO values"""
         import random
         # Typical HCHO values (µg/m³)
-        base_value = random.uniform(5, 25)
+        base_value = (rng or random).uniform(5, 25)
         return round(base_value, 2)
     
     def _get_mock_data(self, lat, lon):
@@ -101,17 +99,21 @@ class TempoAPI:
             'source': 'TEMPO_MOCK'
         }
     
-    def get_historical_data(self, days=7):
-        """Get historical TEMPO data for trend analysis"""
+    def get_historical_data(self, days=7, rng=None, now=None):
+        """
+        Get historical TEMPO data for trend analysis. Pass a seeded rng and a
+        fixed now for reproducible mock history.
+        """
         historical_data = []
+        now = now or datetime.now()
         
         for i in range(days):
-            date = datetime.now() - timedelta(days=i)
+            date = now - timedelta(days=i)
             data_point = {
                 'date': date.isoformat(),
-                'no2': self._generate_mock_no2(),
-                'o3': self._generate_mock_o3(),
-                'hcho': self._generate_mock_hcho()
+                'no2': self._generate_mock_no2(rng),
+                'o3': self._generate_mock_o3(rng),
+                'hcho': self._generate_mock_hcho(rng)
             }
             historical_data.append(data_point)
         
@@ -1,8 +1,107 @@
+import threading
 import requests
-import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from config import Config
 from api.meteomatics import MeteomaticsAPI
+from api.session import get_session, get_timeout, source_health
+from utils.batching import MicroBatcher
+from utils.resilience import FallbackController, TokenBucket
+
+# Shared by every WeatherAPI so the Meteomatics quota is process-wide. Open-Meteo
+# has a single breaker, the 'weather' session's, which /health reports as well
+weather_fallback = FallbackController(
+    source_health.get('weather').breaker,
+    TokenBucket(Config.METEOMATICS_RATE_PER_MINUTE / 60, Config.METEOMATICS_BURST),
+    track_primary=False
+)
+
+class ForecastColumns:
+    """
+    Daily forecast kept in columnar form: one NumPy array per variable, aligned
+    with a datetime64[D] array of dates. Missing values are NaN. Row dicts are
+    only built by to_rows(), at serialization time.
+    """
+    
+    def __init__(self, dates, columns):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.columns = columns
+    
+    @classmethod
+    def from_open_meteo(cls, daily_data, variables):
+        """
+        Build from an Open-Meteo 'daily' block; variables maps output names to
+        Open-Meteo variable names
+        """
+        dates = daily_data.get('time', [])
+        count = len(dates)
+        columns = {}
+        for name, variable in variables.items():
+            # None (null) becomes NaN in the float conversion
+            values = np.array(daily_data.get(variable) or [], dtype=float)
+            if len(values) != count:
+                padded = np.full(count, np.nan)
+                padded[:min(count, len(values))] = values[:count]
+                values = padded
+            columns[name] = values
+        return cls(dates, columns)
+    
+    @classmethod
+    def from_rows(cls, rows, names):
+        """Build from row dicts (mock and Meteomatics forecasts)"""
+        columns = {
+            name: np.array([row.get(name) for row in rows], dtype=float)
+            for name in names
+        }
+        return cls([row['date'] for row in rows], columns)
+    
+    @classmethod
+    def from_hourly(cls, times, temperature, humidity, wind_speed):
+        """
+        Aggregate hourly series (ISO timestamps and float arrays) into daily
+        max/min temperature, mean humidity and max wind speed
+        """
+        days = np.array([time[:10] for time in times], dtype='datetime64[D]')
+        dates, day_index = np.unique(days, return_inverse=True)
+        
+        def reduce(values, ufunc, initial):
+            values = np.asarray(values, dtype=float)
+            out = np.full(len(dates), initial)
+            valid = ~np.isnan(values)
+            ufunc.at(out, day_index[valid], values[valid])
+            out[np.isinf(out)] = np.nan
+            return out
+        
+        humidity = np.asarray(humidity, dtype=float)
+        valid = ~np.isnan(humidity)
+        counts = np.bincount(day_index[valid], minlength=len(dates))
+        sums = np.bincount(day_index[valid], weights=humidity[valid], minlength=len(dates))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            humidity_mean = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        
+        return cls(dates, {
+            'temp_max': reduce(temperature, np.maximum, -np.inf),
+            'temp_min': reduce(temperature, np.minimum, np.inf),
+            'humidity': humidity_mean,
+            'wind_speed': reduce(wind_speed, np.maximum, -np.inf)
+        })
+    
+    def __len__(self):
+        return len(self.dates)
+    
+    def __getitem__(self, name):
+        """Get a variable's array (not a copy)"""
+        return self.columns[name]
+    
+    def to_rows(self):
+        """Build the legacy list of per-day dicts"""
+        keys = ['date'] + list(self.columns)
+        values = [np.datetime_as_string(self.dates).tolist()] + [
+            [None if value != value else value for value in column.tolist()]
+            for column in self.columns.values()
+        ]
+        return [dict(zip(keys, row)) for row in zip(*values)]
+
 
 class WeatherAPI:
     """
@@ -12,101 +111,211 @@ class WeatherAPI:
     def __init__(self):
         self.base_url = Config.WEATHER_API_URL
         self.meteomatics = MeteomaticsAPI()
+        self.session = get_session('weather')
+        self.timeout = get_timeout('weather')
+        
+        # Coalesce concurrent single-location calls into multi-location requests
+        self._current_batcher = MicroBatcher(
+            self.get_current_weather_batch, Config.WEATHER_BATCH_WINDOW, Config.WEATHER_BATCH_SIZE
+        )
+        self._forecast_batchers = {}
+        self._batchers_lock = threading.Lock()
+    
+    CURRENT_VARIABLES = 'temperature_2m,relative_humidity_2m,wind_speed_10m,wind_direction_10m'
+    # Forecast day fields and the Open-Meteo daily variables they come from
+    FORECAST_VARIABLES = {
+        'temp_max': 'temperature_2m_max',
+        'temp_min': 'temperature_2m_min',
+        'humidity': 'relative_humidity_2m_mean',
+        'wind_speed': 'wind_speed_10m_max'
+    }
     
     def get_current_weather(self, lat=Config.GOA_COORDINATES['latitude'],
                           lon=Config.GOA_COORDINATES['longitude']):
         """
-        Get current weather conditions
+        Get current weather conditions.
+        Concurrent callers within the batching window share one multi-location request.
         """
-        try:
-            params = {
-                'latitude': lat,
-                'longitude': lon,
-                'current': 'temperature_2m,relative_humidity_2m,wind_speed_10m,wind_direction_10m',
-                'timezone': 'Asia/Kolkata'
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=10)
+        if Config.WEATHER_BATCH_WINDOW > 0:
+            return self._current_batcher.submit((lat, lon))
+        return self.get_current_weather_batch([(lat, lon)])[0]
+    
+    def get_current_weather_batch(self, coordinates):
+        """
+        Get current weather conditions for many (lat, lon) pairs, one result per pair
+        """
+        results = []
+        for chunk in self._chunks(coordinates):
+            locations = weather_fallback.call_primary(
+                lambda: self._fetch_locations(chunk, {'current': self.CURRENT_VARIABLES})
+            )
+            if locations is None:
+                results.extend(self._current_fallback(chunk))
+                continue
             
-            if response.status_code == 200:
-                data = response.json()
+            for data in locations:
                 current_weather = data.get('current', {})
-                
-                processed_data = {
-                    'temperature': current_weather.get('temperature_2m'),
-                    'humidity': current_weather.get('relative_humidity_2m'),
-                    'wind_speed': current_weather.get('wind_speed_10m'),
-                    'wind_direction': current_weather.get('wind_direction_10m'),
-                    'timestamp': current_weather.get('time', datetime.now().isoformat())
-                }
-                
-                return {
+                results.append({
                     'status': 'success',
-                    'data': processed_data,
+                    'data': {
+                        'temperature': current_weather.get('temperature_2m'),
+                        'humidity': current_weather.get('relative_humidity_2m'),
+                        'wind_speed': current_weather.get('wind_speed_10m'),
+                        'wind_direction': current_weather.get('wind_direction_10m'),
+                        'timestamp': current_weather.get('time', datetime.now().isoformat())
+                    },
                     'source': 'Open-Meteo'
-                }
-            else:
-                # Try Meteomatics as fallback
-                print("Open-Meteo failed, trying Meteomatics API...")
-                meteo_result = self.meteomatics.get_current_weather(lat, lon)
-                if meteo_result['status'] == 'success':
-                    return meteo_result
-                else:
-                    return self._get_mock_weather()
-                
-        except Exception as e:
-            print(f"Error fetching weather data: {e}")
-            return self._get_mock_weather()
+                })
+        return results
+    
+    def get_forecast_weather(self, days=7, lat=Config.GOA_COORDINATES['latitude'],
+                             lon=Config.GOA_COORDINATES['longitude']):
+        """
+        Get weather forecast for next 7 days as a list of per-day dicts
+        """
+        return self._with_rows(self.get_forecast_columns(days, lat, lon))
+    
+    def get_forecast_weather_batch(self, coordinates, days=7):
+        """
+        Get daily weather forecasts for many (lat, lon) pairs as per-day dicts
+        """
+        return [self._with_rows(result) for result in self.get_forecast_columns_batch(coordinates, days)]
+    
+    def get_forecast_columns(self, days=7, lat=Config.GOA_COORDINATES['latitude'],
+                             lon=Config.GOA_COORDINATES['longitude']):
+        """
+        Get the daily weather forecast with 'data' as ForecastColumns.
+        Concurrent callers within the batching window share one multi-location request.
+        """
+        if Config.WEATHER_BATCH_WINDOW > 0:
+            return self._get_forecast_batcher(days).submit((lat, lon))
+        return self.get_forecast_columns_batch([(lat, lon)], days)[0]
+    
+    def get_forecast_columns_batch(self, coordinates, days=7):
+        """
+        Get daily weather forecasts for many (lat, lon) pairs as ForecastColumns,
+        one result per pair
+        """
+        results = []
+        for chunk in self._chunks(coordinates):
+            locations = weather_fallback.call_primary(lambda: self._fetch_locations(
+                chunk, {'daily': ','.join(self.FORECAST_VARIABLES.values()), 'forecast_days': days}
+            ))
+            if locations is None:
+                results.extend(self._forecast_fallback(chunk, days))
+                continue
+            
+            for data in locations:
+                results.append({
+                    'status': 'success',
+                    'data': ForecastColumns.from_open_meteo(data.get('daily', {}), self.FORECAST_VARIABLES),
+                    'source': 'Open-Meteo'
+                })
+        return results
     
-    def get_forecast_weather(self, days=7):
+    def get_fallback_stats(self):
+        """Open-Meteo breaker state and Meteomatics fallback counters"""
+        return weather_fallback.get_stats()
+    
+    def get_batch_stats(self):
+        """Coalescing counters of the micro-batchers"""
+        with self._batchers_lock:
+            batchers = dict(self._forecast_batchers)
+        stats = {'current': self._current_batcher.get_stats()}
+        stats.update({f'forecast_{days}d': batcher.get_stats() for days, batcher in batchers.items()})
+        return stats
+    
+    def _chunks(self, coordinates):
+        """Split coordinates into Open-Meteo sized multi-location requests"""
+        size = Config.WEATHER_BATCH_SIZE
+        return [coordinates[i:i + size] for i in range(0, len(coordinates), size)]
+    
+    def _fetch_locations(self, coordinates, params):
         """
-        Get weather forecast for next 7 days
+        Query Open-Meteo for several locations in one request.
+        Returns one response object per coordinate, or None if the request failed.
         """
         try:
-            params = {
-                'latitude': Config.GOA_COORDINATES['latitude'],
-                'longitude': Config.GOA_COORDINATES['longitude'],
-                'daily': 'temperature_2m_max,temperature_2m_min,relative_humidity_2m_mean,wind_speed_10m_max',
-                'forecast_days': days,
+            params = dict(params, **{
+                'latitude': ','.join(str(lat) for lat, lon in coordinates),
+                'longitude': ','.join(str(lon) for lat, lon in coordinates),
                 'timezone': 'Asia/Kolkata'
-            }
+            })
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
             
-            if response.status_code == 200:
-                data = response.json()
-                daily_data = data.get('daily', {})
-                
-                forecast = []
-                dates = daily_data.get('time', [])
-                
-                for i, date in enumerate(dates):
-                    forecast_day = {
-                        'date': date,
-                        'temp_max': daily_data.get('temperature_2m_max', [])[i] if i < len(daily_data.get('temperature_2m_max', [])) else None,
-                        'temp_min': daily_data.get('temperature_2m_min', [])[i] if i < len(daily_data.get('temperature_2m_min', [])) else None,
-                        'humidity': daily_data.get('relative_humidity_2m_mean', [])[i] if i < len(daily_data.get('relative_humidity_2m_mean', [])) else None,
-                        'wind_speed': daily_data.get('wind_speed_10m_max', [])[i] if i < len(daily_data.get('wind_speed_10m_max', [])) else None
-                    }
-                    forecast.append(forecast_day)
-                
-                return {
-                    'status': 'success',
-                    'data': forecast,
-                    'source': 'Open-Meteo'
-                }
-            else:
-                # Try Meteomatics as fallback
-                print("Open-Meteo forecast failed, trying Meteomatics API...")
-                meteo_result = self.meteomatics.get_forecast_weather(days)
-                if meteo_result['status'] == 'success':
-                    return meteo_result
-                else:
-                    return self._get_mock_forecast(days)
+            if response.status_code != 200:
+                print(f"Open-Meteo request failed with status {response.status_code}")
+                return None
+            
+            data = response.json()
+            # A single location comes back as an object, several as a list in request order
+            locations = data if isinstance(data, list) else [data]
+            if len(locations) != len(coordinates):
+                print(f"Open-Meteo returned {len(locations)} locations for {len(coordinates)} coordinates")
+                return None
+            return locations
                 
         except Exception as e:
-            print(f"Error fetching weather forecast: {e}")
-            return self._get_mock_forecast(days)
+            print(f"Error fetching weather data: {e}")
+            return None
+    
+    def _current_fallback(self, coordinates):
+        """
+        Try Meteomatics (one request for all coordinates), then mock data.
+        Concurrent fallbacks for the same coordinates share one rate-limited call.
+        """
+        results = weather_fallback.call_fallback(
+            ('current', tuple(coordinates)),
+            lambda: self.meteomatics.get_current_weather_batch(coordinates),
+            lambda: [self._get_mock_weather() for _ in coordinates]
+        )
+        return [
+            result if result['status'] == 'success' else self._get_mock_weather()
+            for result in results
+        ]
+    
+    def _forecast_fallback(self, coordinates, days):
+        """
+        Try Meteomatics (one request for all coordinates), then mock data, as
+        columnar forecasts. Concurrent fallbacks share one rate-limited call.
+        """
+        fallback_results = weather_fallback.call_fallback(
+            ('forecast', days, tuple(coordinates)),
+            lambda: self.meteomatics.get_forecast_weather_batch(coordinates, days),
+            lambda: [self._get_mock_forecast(days) for _ in coordinates]
+        )
+        
+        results = []
+        for result in fallback_results:
+            if result['status'] != 'success':
+                result = self._get_mock_forecast(days)
+                results.append(dict(result, data=ForecastColumns.from_rows(result['data'], self.FORECAST_VARIABLES)))
+                continue
+            
+            # Meteomatics forecasts are hourly rows
+            rows = result['data']
+            results.append(dict(result, data=ForecastColumns.from_hourly(
+                [row['date'] for row in rows],
+                [row.get('temperature') for row in rows],
+                [row.get('humidity') for row in rows],
+                [row.get('wind_speed') for row in rows]
+            )))
+        return results
+    
+    def _with_rows(self, result):
+        """Swap a columnar forecast result's data for per-day dicts"""
+        return dict(result, data=result['data'].to_rows())
+    
+    def _get_forecast_batcher(self, days):
+        with self._batchers_lock:
+            batcher = self._forecast_batchers.get(days)
+            if batcher is None:
+                batcher = self._forecast_batchers[days] = MicroBatcher(
+                    lambda coordinates: self.get_forecast_columns_batch(coordinates, days),
+                    Config.WEATHER_BATCH_WINDOW, Config.WEATHER_BATCH_SIZE
+                )
+            return batcher
     
     def _get_mock_weather(self):
         """Generate mock current weather data"""
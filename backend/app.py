@@ -1,17 +1,26 @@
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
+import multiprocessing
 import os
 import sys
+import threading
 
 # Add backend directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from utils.compression import ResponseCompressor
+from utils.responses import PrecomputedResponses
+from utils.serialization import FastJSONProvider
+
 # Import config with fallback for deployment
 try:
-    from config import Config
+    from config import Config, warn_once
     Config.validate()  # Validate environment variables
 except ImportError:
+    def warn_once(message):
+        print(message)
+    
     # Fallback config for deployment
     class Config:
         GOA_COORDINATES = {
@@ -20,114 +29,321 @@ except ImportError:
             'name': 'Goa, India'
         }
 
-app = Flask(__name__)
-
-# Production-ready CORS configuration
-CORS(app, origins=[
-    "http://localhost:5173",  # Local development
-    "https://*.vercel.app",   # All Vercel deployments
-    "https://airalert-pro.vercel.app",  # Your specific domain (update this)
-    "*"  # Allow all origins for now (restrict later)
-])
+bp = Blueprint('api', __name__)
 
-# Initialize components with error handling for deployment
-try:
-    from models.data_processor import DataProcessor
-    from models.forecast import AirQualityForecaster
-    from utils.aqi_calculator import AQICalculator
-    from api.meteomatics import MeteomaticsAPI
-    from api.weather import WeatherAPI
-    
-    data_processor = DataProcessor()
-    forecaster = AirQualityForecaster()
-    aqi_calculator = AQICalculator()
-    meteomatics_api = MeteomaticsAPI()
-    weather_api = WeatherAPI()
-    COMPONENTS_LOADED = True
-except ImportError as e:
-    print(f"⚠️  Warning: Could not import components: {e}")
-    print("🔄 Using mock data for deployment...")
-    COMPONENTS_LOADED = False
-    
-    # Mock components for deployment
-    class MockDataProcessor:
-        def get_integrated_current_data(self):
-            return {
-                'status': 'success',
-                'data': {
-                    'aqi': {'aqi': 87, 'category': 'Moderate', 'color': '#ff7e00', 'description': 'Air quality is acceptable for most people.'},
-                    'air_quality': {'pm25': 32.5, 'pm10': 45.2, 'no2': 28.1, 'o3': 65.3, 'so2': 12.5, 'co': 0.8},
-                    'weather': {'temperature': 29, 'humidity': 72, 'wind_speed': 12, 'wind_direction': 225, 'condition': 'partly cloudy'},
-                    'location': {'name': 'Panaji, Goa', 'region': 'Goa, India'},
-                    'timestamp': datetime.now().isoformat()
-                }
+# Mock components used when a component's modules cannot be imported (e.g. slim deployments)
+class MockDataProcessor:
+    def get_integrated_current_data(self, location=None):
+        return {
+            'status': 'success',
+            'data': {
+                'aqi': {'aqi': 87, 'category': 'Moderate', 'color': '#ff7e00', 'description': 'Air quality is acceptable for most people.'},
+                'air_quality': {'pm25': 32.5, 'pm10': 45.2, 'no2': 28.1, 'o3': 65.3, 'so2': 12.5, 'co': 0.8},
+                'weather': {'temperature': 29, 'humidity': 72, 'wind_speed': 12, 'wind_direction': 225, 'condition': 'partly cloudy'},
+                'location': {'name': 'Panaji, Goa', 'region': 'Goa, India'},
+                'timestamp': datetime.now().isoformat()
             }
+        }
+    
+    def iter_batch_current_data(self, locations):
+        data = self.get_integrated_current_data()['data']
+        yield [
+            {'index': index, 'name': location['name'], 'lat': location['lat'], 'lon': location['lon'],
+             'aqi': data['aqi']['aqi'], 'category': data['aqi']['category'], 'color': data['aqi']['color'],
+             'dominant_pollutant': 'pm25', 'air_quality': data['air_quality'], 'weather': data['weather'],
+             'sources': ['mock', 'mock', 'mock']}
+            for index, location in enumerate(locations)
+        ]
+    
+    def get_batch_current_data(self, locations):
+        return next(self.iter_batch_current_data(locations))
+    
+    def get_historical_trends(self, days=7):
+        trends = []
+        for i in range(days):
+            date = (datetime.now() - datetime.timedelta(days=i)).date()
+            trends.append({
+                'date': date.isoformat(),
+                'aqi': 50 + (i * 10) + (i % 3 * 15),
+                'pm25': 20 + (i * 2),
+                'pm10': 35 + (i * 3),
+                'no2': 25 + (i * 1.5),
+                'o3': 60 + (i * 2.5)
+            })
+        return {'status': 'success', 'data': trends}
+    
+    def validate_data_quality(self, data):
+        return {'confidence_score': 0.92, 'data_completeness': 0.95, 'source_reliability': 'high'}
+    
+    def get_cache_stats(self):
+        return {'stale_seconds': 0, 'totals': {}, 'keys': {}}
+
+class MockForecaster:
+    def predict_24h_forecast(self, air_quality_data, weather_data, weather_forecast=None, location=None):
+        forecasts = []
+        base_time = datetime.now()
+        for hour in range(24):
+            forecast_time = base_time + datetime.timedelta(hours=hour)
+            forecasts.append({
+                'datetime': forecast_time.isoformat(),
+                'pm25': 30 + (hour % 12) * 2,
+                'pm10': 45 + (hour % 8) * 3,
+                'no2': 25 + (hour % 6) * 4,
+                'o3': 60 + (hour % 10) * 2,
+                'confidence': 0.85 + (0.1 * (hour % 3))
+            })
+        return forecasts
+    
+    def train_model(self):
+        return {'status': 'success', 'message': 'Mock model trained', 'accuracy': 0.85}
+    
+    def submit_training(self, days=None, n_jobs=None):
+        job = {'job_id': 'mock', 'status': 'completed', 'stage': 'completed', 'progress': 1.0,
+               'result': self.train_model(), 'error': None}
+        return job, True
+    
+    def get_training_job(self, job_id):
+        return self.submit_training()[0] if job_id == 'mock' else None
+
+class MockAQICalculator:
+    def calculate_composite_aqi(self, data):
+        pm25 = data.get('pm25', 30)
+        return max(50, min(300, pm25 * 2.5))
+    
+    def calculate_individual_aqi(self, value, pollutant):
+        multipliers = {'pm25': 2.5, 'pm10': 1.8, 'no2': 2.0, 'o3': 1.5, 'so2': 3.0, 'co': 10}
+        return value * multipliers.get(pollutant, 2.0)
+    
+    def get_aqi_category(self, aqi_value):
+        if aqi_value <= 50:
+            return {'aqi': aqi_value, 'category': 'Good', 'color': '#00e400', 'description': 'Air quality is good.'}
+        elif aqi_value <= 100:
+            return {'aqi': aqi_value, 'category': 'Satisfactory', 'color': '#ffff00', 'description': 'Air quality is satisfactory.'}
+        elif aqi_value <= 200:
+            return {'aqi': aqi_value, 'category': 'Moderate', 'color': '#ff7e00', 'description': 'Air quality is moderate.'}
+        elif aqi_value <= 300:
+            return {'aqi': aqi_value, 'category': 'Poor', 'color': '#ff0000', 'description': 'Air quality is poor.'}
+        else:
+            return {'aqi': aqi_value, 'category': 'Severe', 'color': '#7e0023', 'description': 'Air quality is severe.'}
+
+class MockLocationRegistry:
+    LOCATIONS = [
+        {'name': 'Panaji', 'lat': 15.4909, 'lon': 73.8278, 'type': 'capital'},
+        {'name': 'Margao', 'lat': 15.2993, 'lon': 74.1240, 'type': 'city'},
+        {'name': 'Mapusa', 'lat': 15.5959, 'lon': 73.8137, 'type': 'town'},
+        {'name': 'Vasco da Gama', 'lat': 15.3947, 'lon': 73.8081, 'type': 'port'},
+        {'name': 'Ponda', 'lat': 15.4019, 'lon': 74.0070, 'type': 'town'}
+    ]
+    version = 0
+    
+    def list_locations(self):
+        return [dict(location) for location in self.LOCATIONS]
+    
+    def locations_in_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        return [
+            dict(location) for location in self.LOCATIONS
+            if min_lat <= location['lat'] <= max_lat and min_lon <= location['lon'] <= max_lon
+        ]
+    
+    def resolve(self, name=None, lat=None, lon=None):
+        if name is None:
+            return self._with_lookups({'name': f"{lat:.4f},{lon:.4f}", 'lat': lat, 'lon': lon, 'type': 'coordinates'})
+        for location in self.LOCATIONS:
+            if location['name'].lower() == name.strip().lower():
+                return self._with_lookups(dict(location))
+        return None
+    
+    @staticmethod
+    def _with_lookups(location):
+        # Same shape as LocationRegistry.resolve, without stations
+        step = getattr(Config, 'WEATHER_GRID_DEGREES', 0.1)
+        cell_lat = round(round(location['lat'] / step) * step, 4)
+        cell_lon = round(round(location['lon'] / step) * step, 4)
+        cell = {'latitude': cell_lat, 'longitude': cell_lon, 'key': f"{cell_lat:.4f},{cell_lon:.4f}"}
+        location.update({
+            'key': location['name'].strip().lower(),
+            'weather_cell': cell,
+            'stations': [],
+            'openaq_key': f"cell:{cell['key']}",
+            'openaq_point': (cell_lat, cell_lon)
+        })
+        return location
+
+class Components:
+    """
+    App components, each created on first use so that importing the app and
+    serving / and /health never load pandas or scikit-learn. A component
+    whose modules cannot be imported falls back to its mock.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}
+        self._components = {}
+        self._mocked = set()
+        self._warm_up_thread = None
+    
+    @property
+    def loaded(self):
+        """True if every component created so far is real, False if any is mocked, None before first use"""
+        if not self._components:
+            return None
+        return not self._mocked
+    
+    @property
+    def data_processor(self):
+        data_processor = self._get_data_processor()
+        if getattr(Config, 'INGESTION_ENABLED', False):
+            # Start polling upstream sources with the first real use
+            self.ingestion_scheduler
+        return data_processor
+    
+    @property
+    def forecaster(self):
+        return self._get('forecaster', self._create_forecaster, MockForecaster)
+    
+    @property
+    def aqi_calculator(self):
+        return self._get('aqi_calculator', self._create_aqi_calculator, MockAQICalculator)
+    
+    @property
+    def meteomatics_api(self):
+        return self._get('meteomatics_api', self._create_meteomatics_api)
+    
+    @property
+    def weather_api(self):
+        return self._get('weather_api', self._create_weather_api)
+    
+    @property
+    def location_registry(self):
+        return self._get('location_registry', self._create_location_registry, MockLocationRegistry)
+    
+    @property
+    def ingestion_scheduler(self):
+        return self._get('ingestion_scheduler', self._create_ingestion_scheduler)
+    
+    def get_if_created(self, name):
+        """Get a component only if it already exists (never creates it)"""
+        return self._components.get(name)
+    
+    def warm_up(self):
+        """Create every component now (loads the forecast model and starts ingestion)"""
+        for name in ('location_registry', 'aqi_calculator', 'meteomatics_api', 'weather_api',
+                     'data_processor', 'forecaster', 'ingestion_scheduler'):
+            getattr(self, name)
+    
+    def start_warm_up(self):
+        """Run warm_up() once in a background thread"""
+        with self._lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(target=self.warm_up, name='components-warm-up', daemon=True)
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+    
+    def _get(self, name, create, mock=None):
+        if name in self._components:
+            return self._components[name]
+        
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._components:
+                try:
+                    self._components[name] = create()
+                except ImportError as e:
+                    warn_once(f"⚠️  Warning: Could not import {name}: {e}\n🔄 Using mock data for deployment...")
+                    self._mocked.add(name)
+                    self._components[name] = mock() if mock is not None else None
+        return self._components[name]
+    
+    def _get_data_processor(self):
+        return self._get('data_processor', self._create_data_processor, MockDataProcessor)
+    
+    def _create_data_processor(self):
+        from models.data_processor import DataProcessor
+        return DataProcessor()
+    
+    def _create_forecaster(self):
+        from models.forecast import AirQualityForecaster
+        forecaster = AirQualityForecaster()
+        # Load the forecast model before it serves; trains in the background if missing
+        if getattr(Config, 'MODEL_WARM_START', True):
+            forecaster.warm_start()
+        return forecaster
+    
+    def _create_aqi_calculator(self):
+        from utils.aqi_calculator import AQICalculator
+        return AQICalculator()
+    
+    def _create_meteomatics_api(self):
+        from api.meteomatics import MeteomaticsAPI
+        return MeteomaticsAPI()
+    
+    def _create_weather_api(self):
+        from api.weather import WeatherAPI
+        return WeatherAPI()
+    
+    def _create_location_registry(self):
+        from utils.locations import get_location_registry
+        return get_location_registry()
+    
+    def _create_ingestion_scheduler(self):
+        data_processor = self._get_data_processor()
+        if 'data_processor' in self._mocked:
+            return None
+        
+        # Poll upstream sources in the background so routes read a precomputed snapshot
+        from models.data_processor import fetch_executor
+        from models.ingestion import IngestionScheduler
         
-        def get_historical_trends(self, days=7):
-            trends = []
-            for i in range(days):
-                date = (datetime.now() - datetime.timedelta(days=i)).date()
-                trends.append({
-                    'date': date.isoformat(),
-                    'aqi': 50 + (i * 10) + (i % 3 * 15),
-                    'pm25': 20 + (i * 2),
-                    'pm10': 35 + (i * 3),
-                    'no2': 25 + (i * 1.5),
-                    'o3': 60 + (i * 2.5)
-                })
-            return {'status': 'success', 'data': trends}
-        
-        def validate_data_quality(self, data):
-            return {'confidence_score': 0.92, 'data_completeness': 0.95, 'source_reliability': 'high'}
-    
-    class MockForecaster:
-        def predict_24h_forecast(self, air_quality_data, weather_data):
-            forecasts = []
-            base_time = datetime.now()
-            for hour in range(24):
-                forecast_time = base_time + datetime.timedelta(hours=hour)
-                forecasts.append({
-                    'datetime': forecast_time.isoformat(),
-                    'pm25': 30 + (hour % 12) * 2,
-                    'pm10': 45 + (hour % 8) * 3,
-                    'no2': 25 + (hour % 6) * 4,
-                    'o3': 60 + (hour % 10) * 2,
-                    'confidence': 0.85 + (0.1 * (hour % 3))
-                })
-            return forecasts
-        
-        def train_model(self):
-            return {'status': 'success', 'message': 'Mock model trained', 'accuracy': 0.85}
-    
-    class MockAQICalculator:
-        def calculate_composite_aqi(self, data):
-            pm25 = data.get('pm25', 30)
-            return max(50, min(300, pm25 * 2.5))
-        
-        def calculate_individual_aqi(self, value, pollutant):
-            multipliers = {'pm25': 2.5, 'pm10': 1.8, 'no2': 2.0, 'o3': 1.5, 'so2': 3.0, 'co': 10}
-            return value * multipliers.get(pollutant, 2.0)
-        
-        def get_aqi_category(self, aqi_value):
-            if aqi_value <= 50:
-                return {'aqi': aqi_value, 'category': 'Good', 'color': '#00e400', 'description': 'Air quality is good.'}
-            elif aqi_value <= 100:
-                return {'aqi': aqi_value, 'category': 'Satisfactory', 'color': '#ffff00', 'description': 'Air quality is satisfactory.'}
-            elif aqi_value <= 200:
-                return {'aqi': aqi_value, 'category': 'Moderate', 'color': '#ff7e00', 'description': 'Air quality is moderate.'}
-            elif aqi_value <= 300:
-                return {'aqi': aqi_value, 'category': 'Poor', 'color': '#ff0000', 'description': 'Air quality is poor.'}
-            else:
-                return {'aqi': aqi_value, 'category': 'Severe', 'color': '#7e0023', 'description': 'Air quality is severe.'}
-    
-    # Use mock components
-    data_processor = MockDataProcessor()
-    forecaster = MockForecaster()
-    aqi_calculator = MockAQICalculator()
-    meteomatics_api = MeteomaticsAPI()
-    weather_api = WeatherAPI()
-
-@app.route('/')
+        scheduler = IngestionScheduler(data_processor, fetch_executor)
+        if getattr(Config, 'INGESTION_ENABLED', False):
+            scheduler.start()
+        return scheduler
+
+components = Components()
+
+# Pre-serialized, pre-compressed bodies of the (nearly) static endpoints
+precomputed_responses = PrecomputedResponses(max_age=getattr(Config, 'STATIC_RESPONSE_MAX_AGE', 300))
+
+response_compressor = ResponseCompressor(
+    min_size=getattr(Config, 'COMPRESSION_MIN_BYTES', 1024),
+    gzip_level=getattr(Config, 'COMPRESSION_GZIP_LEVEL', 6),
+    brotli_quality=getattr(Config, 'COMPRESSION_BROTLI_QUALITY', 4)
+)
+
+def create_app():
+    """
+    Build the Flask app. Components are created lazily; APP_EAGER_INIT creates
+    them before returning, APP_BACKGROUND_WARMUP in a background thread so the
+    first API request does not pay for loading the model.
+    """
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app, getattr(Config, 'JSON_BACKEND', 'auto'))
+    
+    # Production-ready CORS configuration
+    CORS(app, origins=[
+        "http://localhost:5173",  # Local development
+        "https://*.vercel.app",   # All Vercel deployments
+        "https://airalert-pro.vercel.app",  # Your specific domain (update this)
+        "*"  # Allow all origins for now (restrict later)
+    ])
+    
+    app.register_blueprint(bp)
+    
+    if getattr(Config, 'COMPRESSION_ENABLED', True):
+        response_compressor.init_app(app)
+    
+    if multiprocessing.parent_process() is not None:
+        # A spawned training worker re-imports the main module; it serves nothing
+        return app
+    if getattr(Config, 'APP_EAGER_INIT', False):
+        components.warm_up()
+    elif getattr(Config, 'APP_BACKGROUND_WARMUP', False):
+        components.start_warm_up()
+    return app
+
+@bp.route('/')
 def home():
     """API health check"""
     return jsonify({
@@ -136,19 +352,19 @@ def home():
         'version': '1.0.0',
         'timestamp': datetime.now().isoformat(),
         'location': Config.GOA_COORDINATES,
-        'components_loaded': COMPONENTS_LOADED,
+        'components_loaded': components.loaded,
         'deployment': 'production' if not os.environ.get('FLASK_ENV') == 'development' else 'development'
     })
 
-@app.route('/api/current', methods=['GET'])
+@bp.route('/api/current', methods=['GET'])
 def get_current_data():
     """Get current air quality data"""
     try:
-        result = data_processor.get_integrated_current_data()
+        result = components.data_processor.get_integrated_current_data()
         
         if result['status'] == 'success':
             # Validate data quality
-            validation = data_processor.validate_data_quality(result['data'])
+            validation = components.data_processor.validate_data_quality(result['data'])
             result['data']['validation'] = validation
             
             return jsonify(result)
@@ -161,12 +377,77 @@ def get_current_data():
             'message': str(e)
         }), 500
 
-@app.route('/api/forecast', methods=['GET'])
+@bp.route('/api/current/batch', methods=['POST'])
+def get_current_batch():
+    """
+    Current conditions for many locations in one call. Body is either
+    {"locations": ["Panaji", {"name": ...}, {"lat": ..., "lon": ...}]} or
+    {"bbox": [min_lat, min_lon, max_lat, max_lon], "stream": true}; streamed
+    bounding-box results are sent as NDJSON lines as they become ready.
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        if 'bbox' in body:
+            min_lat, min_lon, max_lat, max_lon = (float(v) for v in body['bbox'])
+            if min_lat > max_lat or min_lon > max_lon:
+                raise ValueError('bbox must be [min_lat, min_lon, max_lat, max_lon]')
+            locations = [
+                components.location_registry.resolve(name=location['name'])
+                for location in components.location_registry.locations_in_bbox(min_lat, min_lon, max_lat, max_lon)
+            ]
+        elif isinstance(body.get('locations'), list) and body['locations']:
+            locations = []
+            for item in body['locations']:
+                if isinstance(item, str):
+                    item = {'name': item}
+                elif not isinstance(item, dict):
+                    raise ValueError(f"Each location must be a name or an object, got {item!r}")
+                if item.get('name') is not None:
+                    location = components.location_registry.resolve(name=item['name'])
+                    if location is None:
+                        raise ValueError(f"Unknown location: {item['name']}")
+                else:
+                    location = components.location_registry.resolve(lat=float(item['lat']), lon=float(item['lon']))
+                locations.append(location)
+        else:
+            raise ValueError('Provide a non-empty "locations" list or a "bbox"')
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': f'Invalid batch request: {e}'}), 400
+    
+    max_locations = getattr(Config, 'BATCH_MAX_LOCATIONS', 200)
+    if len(locations) > max_locations:
+        return jsonify({
+            'status': 'error',
+            'message': f'Too many locations ({len(locations)} > {max_locations})'
+        }), 400
+    
+    if 'bbox' in body and body.get('stream'):
+        def generate():
+            for entries in components.data_processor.iter_batch_current_data(locations):
+                for entry in entries:
+                    yield current_app.json.dumps(entry) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    try:
+        entries = components.data_processor.get_batch_current_data(locations)
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'locations': entries,
+                'total_count': len(entries),
+                'timestamp': datetime.now().isoformat()
+            }
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/api/forecast', methods=['GET'])
 def get_forecast():
     """Get 24-hour air quality forecast"""
     try:
         # Get current data for forecasting
-        current_result = data_processor.get_integrated_current_data()
+        current_result = components.data_processor.get_integrated_current_data()
         
         if current_result['status'] != 'success':
             return jsonify({
@@ -178,8 +459,18 @@ def get_forecast():
         air_quality_data = current_data.get('air_quality', {})
         weather_data = current_data.get('weather', {})
         
+        # Daily weather forecast columns published by the ingestion scheduler, if any
+        weather_forecast = None
+        if hasattr(components.data_processor, 'get_weather_forecast'):
+            forecast_response = components.data_processor.get_weather_forecast()
+            if forecast_response and forecast_response.get('status') == 'success':
+                weather_forecast = forecast_response['data']
+        
         # Generate forecast
-        forecasts = forecaster.predict_24h_forecast(air_quality_data, weather_data)
+        # Memoized per location: unchanged inputs reuse the previous forecast
+        forecasts = components.forecaster.predict_24h_forecast(
+            air_quality_data, weather_data, weather_forecast, location=Config.GOA_COORDINATES['name']
+        )
         
         # Calculate AQI for each forecast point
         for forecast in forecasts:
@@ -190,8 +481,8 @@ def get_forecast():
                 'o3': forecast['o3']
             }
             
-            aqi_value = aqi_calculator.calculate_composite_aqi(pollutant_data)
-            aqi_info = aqi_calculator.get_aqi_category(aqi_value)
+            aqi_value = components.aqi_calculator.calculate_composite_aqi(pollutant_data)
+            aqi_info = components.aqi_calculator.get_aqi_category(aqi_value)
             forecast['aqi'] = aqi_info
         
         return jsonify({
@@ -209,12 +500,12 @@ def get_forecast():
             'message': str(e)
         }), 500
 
-@app.route('/api/trends', methods=['GET'])
+@bp.route('/api/trends', methods=['GET'])
 def get_trends():
     """Get historical trends"""
     try:
         days = request.args.get('days', 7, type=int)
-        result = data_processor.get_historical_trends(days=days)
+        result = components.data_processor.get_historical_trends(days=days)
         return jsonify(result)
         
     except Exception as e:
@@ -223,7 +514,7 @@ def get_trends():
             'message': str(e)
         }), 500
 
-@app.route('/api/aqi/calculate', methods=['POST'])
+@bp.route('/api/aqi/calculate', methods=['POST'])
 def calculate_aqi():
     """Calculate AQI for given pollutant values"""
     try:
@@ -235,8 +526,8 @@ def calculate_aqi():
                 'message': 'No data provided'
             }), 400
         
-        aqi_value = aqi_calculator.calculate_composite_aqi(data)
-        aqi_info = aqi_calculator.get_aqi_category(aqi_value)
+        aqi_value = components.aqi_calculator.calculate_composite_aqi(data)
+        aqi_info = components.aqi_calculator.get_aqi_category(aqi_value)
         
         return jsonify({
             'status': 'success',
@@ -249,12 +540,12 @@ def calculate_aqi():
             'message': str(e)
         }), 500
 
-@app.route('/api/alerts', methods=['GET'])
+@bp.route('/api/alerts', methods=['GET'])
 def get_alerts():
     """Get air quality alerts"""
     try:
         # Get current data
-        current_result = data_processor.get_integrated_current_data()
+        current_result = components.data_processor.get_integrated_current_data()
         
         if current_result['status'] != 'success':
             return jsonify({
@@ -297,15 +588,18 @@ def get_alerts():
             'message': str(e)
         }), 500
 
-@app.route('/api/train-model', methods=['POST'])
+@bp.route('/api/train-model', methods=['POST'])
 def train_model():
-    """Manually trigger model training"""
+    """Queue a background model training job"""
     try:
-        result = forecaster.train_model()
+        data = request.get_json(silent=True) or {}
+        job, created = components.forecaster.submit_training(days=data.get('days'))
+        
         return jsonify({
             'status': 'success',
-            'data': result
-        })
+            'message': 'Training job queued' if created else 'A training job is already running',
+            'data': job
+        }), 202
         
     except Exception as e:
         return jsonify({
@@ -313,14 +607,26 @@ def train_model():
             'message': str(e)
         }), 500
 
-@app.route('/api/health-recommendations', methods=['GET'])
+@bp.route('/api/train-model/<string:job_id>', methods=['GET'])
+def get_training_job(job_id):
+    """Get status and progress of a model training job"""
+    job = components.forecaster.get_training_job(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Unknown training job: {job_id}'}), 404
+    
+    return jsonify({
+        'status': 'success',
+        'data': job
+    })
+
+@bp.route('/api/health-recommendations', methods=['GET'])
 def get_health_recommendations():
     """Get personalized health recommendations based on current AQI"""
     try:
         user_group = request.args.get('group', 'general')  # general, sensitive, elderly, children
         
         # Get current AQI
-        current_result = data_processor.get_integrated_current_data()
+        current_result = components.data_processor.get_integrated_current_data()
         aqi_value = current_result['data'].get('aqi', {}).get('aqi', 0)
         
         recommendations = {
@@ -348,40 +654,61 @@ def get_health_recommendations():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@app.route('/api/locations', methods=['GET'])
+@bp.route('/api/locations', methods=['GET'])
 def get_supported_locations():
-    """Get list of supported locations in Goa"""
-    locations = [
-        {'name': 'Panaji', 'lat': 15.4909, 'lon': 73.8278, 'type': 'capital'},
-        {'name': 'Margao', 'lat': 15.2993, 'lon': 74.1240, 'type': 'city'},
-        {'name': 'Mapusa', 'lat': 15.5959, 'lon': 73.8137, 'type': 'town'},
-        {'name': 'Vasco da Gama', 'lat': 15.3947, 'lon': 73.8081, 'type': 'port'},
-        {'name': 'Ponda', 'lat': 15.4019, 'lon': 74.0070, 'type': 'town'}
-    ]
+    """Get list of supported locations in Goa (re-rendered when the registry changes)"""
+    location_registry = components.location_registry
     
-    return jsonify({
-        'status': 'success',
-        'data': {
-            'locations': locations,
-            'total_count': len(locations),
-            'region': 'Goa, India'
+    def render():
+        locations = location_registry.list_locations()
+        return {
+            'status': 'success',
+            'data': {
+                'locations': locations,
+                'total_count': len(locations),
+                'region': 'Goa, India'
+            }
         }
-    })
+    
+    return precomputed_responses.get('locations', location_registry.version, render).to_response(request)
 
-@app.route('/api/location/<string:location_name>/current', methods=['GET'])
+@bp.route('/api/location/<string:location_name>/current', methods=['GET'])
 def get_location_data(location_name):
     """Get current data for specific location"""
-    # This would use the location coordinates to fetch specific data
-    # For now, return same data with location info
-    result = data_processor.get_integrated_current_data()
+    location = components.location_registry.resolve(name=location_name)
+    if location is None:
+        return jsonify({'status': 'error', 'message': f'Unknown location: {location_name}'}), 404
+    
+    result = components.data_processor.get_integrated_current_data(location)
     if result['status'] == 'success':
         result['data']['requested_location'] = location_name
     return jsonify(result)
 
-@app.route('/api/data-validation', methods=['GET'])
+@bp.route('/api/locations/resolve', methods=['GET'])
+def resolve_location():
+    """Resolve a location name or lat/lon to nearby OpenAQ stations and its weather grid cell"""
+    name = request.args.get('name')
+    try:
+        if name:
+            location = components.location_registry.resolve(name=name)
+        else:
+            lat = float(request.args['lat'])
+            lon = float(request.args['lon'])
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ValueError('coordinates out of range')
+            location = components.location_registry.resolve(lat=lat, lon=lon)
+    except (KeyError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': f'Provide name or valid lat and lon ({e})'}), 400
+    
+    if location is None:
+        return jsonify({'status': 'error', 'message': f'Unknown location: {name}'}), 404
+    
+    return jsonify({'status': 'success', 'data': location})
+
+@bp.route('/api/data-validation', methods=['GET'])
 def get_data_validation():
     """Compare and validate satellite vs ground-based data"""
-    try:
+    def render():
         # Mock comparison for deployment
         comparison = {
             'satellite_no2': 45.2,
@@ -403,14 +730,14 @@ def get_data_validation():
             }
         }
         
-        return jsonify({
+        return {
             'status': 'success',
             'data': comparison
-        })
-    except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+        }
+    
+    return precomputed_responses.get('data-validation', None, render).to_response(request)
 
-@app.route('/api/alerts/subscribe', methods=['POST'])
+@bp.route('/api/alerts/subscribe', methods=['POST'])
 def subscribe_alerts():
     """Subscribe to air quality alerts"""
     data = request.get_json()
@@ -427,10 +754,10 @@ def subscribe_alerts():
         'data': user_preferences
     })
 
-@app.route('/api/emergency-alerts', methods=['GET'])
+@bp.route('/api/emergency-alerts', methods=['GET'])
 def get_emergency_alerts():
     """Get emergency-level air quality alerts"""
-    current_result = data_processor.get_integrated_current_data()
+    current_result = components.data_processor.get_integrated_current_data()
     aqi_value = current_result['data'].get('aqi', {}).get('aqi', 0)
     
     emergency_alerts = []
@@ -454,11 +781,11 @@ def get_emergency_alerts():
         }
     })
 
-@app.route('/api/pollutant-breakdown', methods=['GET'])
+@bp.route('/api/pollutant-breakdown', methods=['GET'])
 def get_pollutant_breakdown():
     """Get individual AQI for each pollutant with health impacts"""
     try:
-        current_result = data_processor.get_integrated_current_data()
+        current_result = components.data_processor.get_integrated_current_data()
         air_quality = current_result['data'].get('air_quality', {})
         
         pollutant_aqis = {}
@@ -473,8 +800,8 @@ def get_pollutant_breakdown():
         
         for pollutant, value in air_quality.items():
             if value is not None:
-                individual_aqi = aqi_calculator.calculate_individual_aqi(value, pollutant)
-                aqi_info = aqi_calculator.get_aqi_category(individual_aqi)
+                individual_aqi = components.aqi_calculator.calculate_individual_aqi(value, pollutant)
+                aqi_info = components.aqi_calculator.get_aqi_category(individual_aqi)
                 
                 pollutant_aqis[pollutant] = {
                     'value': value,
@@ -482,7 +809,7 @@ def get_pollutant_breakdown():
                     'aqi': individual_aqi,
                     'category': aqi_info.get('category') if aqi_info else 'Unknown',
                     'health_impact': health_impacts.get(pollutant, 'Health impact data unavailable'),
-                    'is_primary_concern': individual_aqi == max([aqi_calculator.calculate_individual_aqi(v, k) for k, v in air_quality.items() if v is not None]) if individual_aqi else False
+                    'is_primary_concern': individual_aqi == max([components.aqi_calculator.calculate_individual_aqi(v, k) for k, v in air_quality.items() if v is not None]) if individual_aqi else False
                 }
         
         return jsonify({
@@ -496,82 +823,134 @@ def get_pollutant_breakdown():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@app.route('/api/docs', methods=['GET'])
+@bp.route('/api/docs', methods=['GET'])
 def get_api_documentation():
-    """Self-documenting API with data sources and citations"""
-    docs = {
-        'api_info': {
-            'name': 'AirAlert Pro API',
-            'version': '1.0.0',
-            'description': 'Air quality forecasting API integrating NASA TEMPO, ground sensors, and weather data',
-            'base_url': request.base_url.replace('/api/docs', ''),
-            'contact': 'Built for NASA Space Apps Challenge 2025'
-        },
-        'data_sources': {
-            'satellite': {
-                'name': 'NASA TEMPO (Tropospheric Emissions Monitoring of Pollution)',
-                'description': 'Geostationary satellite measuring atmospheric composition',
-                'spatial_resolution': '2.1 x 4.4 km',
-                'temporal_resolution': 'Hourly daytime observations',
-                'parameters': ['NO2', 'O3', 'HCHO'],
-                'citation': 'NASA TEMPO Mission, https://tempo.si.edu/',
-                'data_latency': '< 1 hour'
+    """Self-documenting API with data sources and citations (rendered once per deployment state)"""
+    # Configured or relative, never from the Host header, so every client shares one rendering
+    base_url = getattr(Config, 'PUBLIC_BASE_URL', '') or request.script_root or '/'
+    components_loaded = components.loaded
+    
+    def render():
+        docs = {
+            'api_info': {
+                'name': 'AirAlert Pro API',
+                'version': '1.0.0',
+                'description': 'Air quality forecasting API integrating NASA TEMPO, ground sensors, and weather data',
+                'base_url': base_url,
+                'contact': 'Built for NASA Space Apps Challenge 2025'
             },
-            'ground_sensors': {
-                'name': 'OpenAQ Network',
-                'description': 'Global ground-based air quality measurements',
-                'parameters': ['PM2.5', 'PM10', 'NO2', 'O3', 'SO2', 'CO'],
-                'citation': 'OpenAQ, https://openaq.org/',
-                'data_latency': 'Real-time to 1 hour',
-                'coverage': '100+ countries, 12,000+ monitoring stations'
+            'data_sources': {
+                'satellite': {
+                    'name': 'NASA TEMPO (Tropospheric Emissions Monitoring of Pollution)',
+                    'description': 'Geostationary satellite measuring atmospheric composition',
+                    'spatial_resolution': '2.1 x 4.4 km',
+                    'temporal_resolution': 'Hourly daytime observations',
+                    'parameters': ['NO2', 'O3', 'HCHO'],
+                    'citation': 'NASA TEMPO Mission, https://tempo.si.edu/',
+                    'data_latency': '< 1 hour'
+                },
+                'ground_sensors': {
+                    'name': 'OpenAQ Network',
+                    'description': 'Global ground-based air quality measurements',
+                    'parameters': ['PM2.5', 'PM10', 'NO2', 'O3', 'SO2', 'CO'],
+                    'citation': 'OpenAQ, https://openaq.org/',
+                    'data_latency': 'Real-time to 1 hour',
+                    'coverage': '100+ countries, 12,000+ monitoring stations'
+                },
+                'weather': {
+                    'name': 'Open-Meteo Weather API (Primary)',
+                    'description': 'High-resolution weather forecasting',
+                    'parameters': ['Temperature', 'Humidity', 'Wind Speed', 'Wind Direction'],
+                    'citation': 'Open-Meteo, https://open-meteo.com/',
+                    'spatial_resolution': '11 km',
+                    'forecast_horizon': '7 days'
+                },
+                'weather_fallback': {
+                    'name': 'Meteomatics Weather API (Fallback)',
+                    'description': 'Premium weather API with global coverage',
+                    'parameters': ['Temperature', 'Humidity', 'Wind Speed', 'Wind Direction'],
+                    'citation': 'Meteomatics, https://www.meteomatics.com/',
+                    'spatial_resolution': 'Variable (up to 100m)',
+                    'forecast_horizon': '14 days'
+                }
             },
-            'weather': {
-                'name': 'Open-Meteo Weather API (Primary)',
-                'description': 'High-resolution weather forecasting',
-                'parameters': ['Temperature', 'Humidity', 'Wind Speed', 'Wind Direction'],
-                'citation': 'Open-Meteo, https://open-meteo.com/',
-                'spatial_resolution': '11 km',
-                'forecast_horizon': '7 days'
+            'machine_learning': {
+                'model_type': 'Random Forest Regressor',
+                'features': ['Current pollutant levels', 'Weather conditions', 'Temporal patterns'],
+                'forecast_horizon': '24 hours',
+                'update_frequency': 'Real-time',
+                'accuracy_metrics': 'MAE < 15 µg/m³ for PM2.5'
             },
-            'weather_fallback': {
-                'name': 'Meteomatics Weather API (Fallback)',
-                'description': 'Premium weather API with global coverage',
-                'parameters': ['Temperature', 'Humidity', 'Wind Speed', 'Wind Direction'],
-                'citation': 'Meteomatics, https://www.meteomatics.com/',
-                'spatial_resolution': 'Variable (up to 100m)',
-                'forecast_horizon': '14 days'
-            }
-        },
-        'machine_learning': {
-            'model_type': 'Random Forest Regressor',
-            'features': ['Current pollutant levels', 'Weather conditions', 'Temporal patterns'],
-            'forecast_horizon': '24 hours',
-            'update_frequency': 'Real-time',
-            'accuracy_metrics': 'MAE < 15 µg/m³ for PM2.5'
-        },
-        'deployment_info': {
-            'components_loaded': COMPONENTS_LOADED,
-            'environment': 'production' if not os.environ.get('FLASK_ENV') == 'development' else 'development'
-        },
-        'last_updated': datetime.now().isoformat()
-    }
+            'deployment_info': {
+                'components_loaded': components_loaded,
+                'environment': 'production' if not os.environ.get('FLASK_ENV') == 'development' else 'development'
+            },
+            'last_updated': datetime.now().isoformat()
+        }
+        
+        return docs
     
-    return jsonify(docs)
+    key = (base_url, components_loaded)
+    return precomputed_responses.get('docs', key, render).to_response(request)
 
-@app.route('/api/test-meteomatics', methods=['GET'])
+@bp.route('/api/test-meteomatics', methods=['GET'])
 def test_meteomatics():
     """Test endpoint for Meteomatics API integration"""
     try:
-        result = meteomatics_api.get_current_weather()
+        result = components.meteomatics_api.get_current_weather()
         return jsonify(result)
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@bp.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Snapshot cache hit/miss/age counters for upstream sources"""
+    try:
+        stats = components.data_processor.get_cache_stats()
+        stats['precomputed_responses'] = precomputed_responses.get_stats()
+        stats['compression'] = response_compressor.get_stats()
+        forecaster = components.get_if_created('forecaster')
+        if hasattr(forecaster, 'get_memo_stats'):
+            stats['forecast_memo'] = forecaster.get_memo_stats()
+        return jsonify({
+            'status': 'success',
+            'data': stats
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@bp.route('/api/ingestion/status', methods=['GET'])
+def get_ingestion_status():
+    """Background ingestion poll counters and schedule per source"""
+    ingestion_scheduler = components.ingestion_scheduler
+    if ingestion_scheduler is None:
+        return jsonify({'status': 'success', 'data': {'running': False, 'sources': {}}})
+    
+    return jsonify({
+        'status': 'success',
+        'data': ingestion_scheduler.get_status()
+    })
+
 # Health check endpoint for deployment platforms
-@app.route('/health')
+@bp.route('/health')
 def health_check():
-    """Health check for deployment platforms"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()}), 200
+    """Health check for deployment platforms, with per-upstream circuit state"""
+    try:
+        from api.session import source_health
+        sources = source_health.get_stats()
+    except ImportError:
+        sources = {}
+    
+    degraded = sorted(name for name, stats in sources.items() if stats['circuit']['state'] != 'closed')
+    return jsonify({
+        'status': 'degraded' if degraded else 'healthy',
+        'degraded_sources': degraded,
+        'sources': sources,
+        'timestamp': datetime.now().isoformat()
+    }), 200
+
+# WSGI entry point (gunicorn app:app)
+app = create_app()
 
 if __name__ == '__main__':
     # Get port from environment variable for deployment
@@ -590,10 +969,12 @@ if __name__ == '__main__':
         print("   === CORE ENDPOINTS ===")
         print("   - GET  /                          - Health check")
         print("   - GET  /api/current               - Current air quality")
+        print("   - POST /api/current/batch         - Current conditions for many locations")
         print("   - GET  /api/forecast              - 24h forecast")
         print("   - GET  /api/trends                - Historical trends")
         print("   - POST /api/aqi/calculate         - Calculate AQI")
-        print("   - POST /api/train-model           - Train ML model")
+        print("   - POST /api/train-model           - Queue ML model training")
+        print("   - GET  /api/train-model/<job_id>  - Training job status")
         print("")
         print("   === ALERT SYSTEM ===")
         print("   - GET  /api/alerts                - Air quality alerts")
@@ -607,6 +988,7 @@ if __name__ == '__main__':
         print("   === LOCATION SERVICES ===")
         print("   - GET  /api/locations             - Supported locations")
         print("   - GET  /api/location/<name>/current - Location-specific data")
+        print("   - GET  /api/locations/resolve     - Nearest stations and weather cell")
         print("")
         print("   === DATA VALIDATION ===")
         print("   - GET  /api/data-validation       - Compare data sources")
@@ -614,7 +996,11 @@ if __name__ == '__main__':
         print("   === API DOCUMENTATION ===")
         print("   - GET  /api/docs                  - Complete API documentation")
         print("")
-        print("📊 Total: 15 endpoints | 🌐 Server: http://localhost:5000")
+        print("   === OPERATIONS ===")
+        print("   - GET  /api/cache/stats           - Snapshot cache counters")
+        print("   - GET  /api/ingestion/status      - Background ingestion status")
+        print("")
+        print("📊 Total: 20 endpoints | 🌐 Server: http://localhost:5000")
         print("🏆 Ready for NASA Space Apps Challenge 2025!")
     
     app.run(debug=debug_mode, host='0.0.0.0', port=port)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized batch AQI engine against the scalar AQICalculator path.
+
+Checks that both paths agree on every reading before reporting the speedup.
+
+Usage: python benchmarks/bench_aqi_batch.py [--readings 200000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.aqi_calculator import AQICalculator
+
+# Upper end of the random concentration range per pollutant (beyond the top band)
+RANGES = {'pm25': 400, 'pm10': 550, 'no2': 520, 'o3': 1050, 'so2': 2100, 'co': 55}
+
+
+def make_readings(count, seed=42):
+    rng = np.random.default_rng(seed)
+    readings = {}
+    for pollutant, upper in RANGES.items():
+        values = rng.uniform(0, upper, count).round(1)
+        # Knock out ~5% of readings to exercise the missing-value path
+        values[rng.random(count) < 0.05] = np.nan
+        readings[pollutant] = values
+    return readings
+
+
+def score_scalar(readings):
+    count = len(next(iter(readings.values())))
+    composite = []
+    categories = []
+    for i in range(count):
+        row = {p: (None if np.isnan(v[i]) else float(v[i])) for p, v in readings.items()}
+        aqi = AQICalculator.calculate_composite_aqi(row)
+        composite.append(aqi)
+        info = AQICalculator.get_aqi_category(aqi)
+        categories.append(info['category'] if info else None)
+    return composite, categories
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readings', type=int, default=200000)
+    args = parser.parse_args()
+
+    readings = make_readings(args.readings)
+
+    start = time.perf_counter()
+    scalar_aqi, scalar_categories = score_scalar(readings)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = AQICalculator.calculate_batch_aqi(readings)
+    batch_time = time.perf_counter() - start
+
+    names = AQICalculator.AQI_CATEGORY_NAMES
+    batch_aqi = [None if np.isnan(v) else int(v) for v in batch['aqi']]
+    batch_categories = [names[c] if c >= 0 else None for c in batch['category_code']]
+    if batch_aqi != scalar_aqi or batch_categories != scalar_categories:
+        print("MISMATCH between scalar and batch AQI results")
+        sys.exit(1)
+
+    print(f"Readings:   {args.readings}")
+    print(f"Scalar:     {scalar_time:.3f}s ({args.readings / scalar_time:,.0f} readings/s)")
+    print(f"Batch:      {batch_time:.3f}s ({args.readings / batch_time:,.0f} readings/s)")
+    print(f"Speedup:    {scalar_time / batch_time:.1f}x (results identical)")
+
+
+if __name__ == '__main__':
+    main()
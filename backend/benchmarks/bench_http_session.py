@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark bare requests.get against the pooled API client sessions.
+
+Starts a local keep-alive stub HTTP server and reports how many TCP connections
+each approach opens and the mean per-request latency.
+
+Usage: python benchmarks/bench_http_session.py [--requests 500]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from api.session import get_session
+
+PAYLOAD = json.dumps({'current': {'temperature_2m': 28.4, 'relative_humidity_2m': 74}}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal HTTP/1.1 handler that keeps connections alive"""
+
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(label, get, url, count):
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        response = get(url, timeout=5)
+        response.json()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {count} requests  {StubHandler.connections:>4} connections  "
+          f"{elapsed / count * 1000:.3f} ms/request")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/forecast"
+
+    try:
+        bare = run('requests.get', requests.get, url, args.requests)
+        pooled = run('pooled session', get_session('benchmark').get, url, args.requests)
+        print(f"Speedup: {bare / pooled:.2f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON response serialization and compression against the plain jsonify path.
+
+Builds a year of hourly trend points shaped like /api/trends entries (ISO
+timestamps, float pollutant values, nested AQI info), then renders it
+repeatedly inside a request context with Flask's default jsonify, with
+FastJSONProvider (orjson when installed), and with each compression encoding
+on top. Reports CPU per response, body size and throughput.
+
+Usage: python benchmarks/bench_json_responses.py [--days 365] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+from utils.compression import ENCODINGS, compress
+from utils.serialization import FastJSONProvider
+
+
+def make_trends(days, seed=42):
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1)
+    hours = days * 24
+    pm25 = rng.uniform(5, 150, hours)
+    pm10 = pm25 * rng.uniform(1.2, 2.0, hours)
+    no2 = rng.uniform(5, 80, hours)
+    o3 = rng.uniform(10, 120, hours)
+
+    points = []
+    for i in range(hours):
+        aqi = float(pm25[i] * 2.1)
+        points.append({
+            'date': (start + timedelta(hours=i)).isoformat(),
+            'pm25': float(pm25[i]),
+            'pm10': float(pm10[i]),
+            'no2': float(no2[i]),
+            'o3': float(o3[i]),
+            'aqi': {'aqi': aqi, 'category': 'Moderate' if aqi > 100 else 'Satisfactory', 'color': '#ff7e00'}
+        })
+    return {'status': 'success', 'data': points, 'source': 'timeseries_store'}
+
+
+def measure(app, render, repeat):
+    """Return (CPU seconds per response, wall seconds per response, body bytes)"""
+    with app.test_request_context('/api/trends'):
+        body = render()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for _ in range(repeat):
+            render()
+        cpu = (time.process_time() - cpu_start) / repeat
+        wall = (time.perf_counter() - wall_start) / repeat
+    return cpu, wall, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    payload = make_trends(args.days)
+
+    default_app = Flask('default')
+    default_app.json = DefaultJSONProvider(default_app)
+    fast_app = Flask('fast')
+    fast_app.json = FastJSONProvider(fast_app)
+
+    with fast_app.app_context():
+        fast_body = fast_app.json.response(payload).get_data()
+    with default_app.app_context():
+        default_body = jsonify(payload).get_data()
+    if json.loads(fast_body) != json.loads(default_body):
+        print("MISMATCH between jsonify and FastJSONProvider output")
+        sys.exit(1)
+
+    cases = [
+        ('jsonify (json)', default_app, lambda: jsonify(payload).get_data()),
+        (f'FastJSONProvider ({fast_app.json.backend})', fast_app, lambda: jsonify(payload).get_data())
+    ]
+    for encoding in ENCODINGS:
+        cases.append((f'jsonify + {encoding}', default_app,
+                      lambda encoding=encoding: compress(jsonify(payload).get_data(), encoding)))
+        cases.append((f'FastJSONProvider + {encoding}', fast_app,
+                      lambda encoding=encoding: compress(jsonify(payload).get_data(), encoding)))
+
+    print(f"Payload: {len(payload['data']):,} hourly trend points ({args.days} days)")
+    print(f"{'path':<30} {'CPU/resp':>10} {'wall/resp':>10} {'body':>12} {'out MB/s':>8}")
+    baseline = None
+    for name, app, render in cases:
+        cpu, wall, size = measure(app, render, args.repeat)
+        baseline = baseline or cpu
+        print(f"{name:<30} {cpu * 1000:8.1f}ms {wall * 1000:8.1f}ms {size:>10,} B "
+              f"{size / wall / 1e6:8.1f}  ({cpu / baseline:.2f}x the CPU of jsonify)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark the one-pass Meteomatics forecast pivot against the previous per-date scan.
+
+Builds a payload shaped like a recorded Meteomatics JSON response (hourly
+steps, several parameters, several coordinates), checks that both parsers
+agree on the first coordinate, then times them.
+
+Usage: python benchmarks/bench_meteomatics_pivot.py [--days 14] [--parameters 8] [--coordinates 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from api.meteomatics import MeteomaticsAPI, pivot_timeseries
+
+EXTRA_PARAMETERS = [
+    'precip_1h:mm', 'msl_pressure:hPa', 'cape:Jkg', 'wind_gusts_10m_1h:ms',
+    'low_cloud_cover:p', 'global_rad:W', 'visibility:m', 'uv:idx', 'sunshine_duration_1h:min'
+]
+
+
+def make_payload(days, parameter_count, coordinate_count, seed=42):
+    rng = np.random.default_rng(seed)
+    parameters = list(MeteomaticsAPI.FORECAST_PARAMETERS) + EXTRA_PARAMETERS
+    parameters = parameters[:max(parameter_count, len(MeteomaticsAPI.FORECAST_PARAMETERS))]
+
+    start = datetime(2025, 1, 1)
+    dates = [(start + timedelta(hours=h)).strftime('%Y-%m-%dT%H:%M:%SZ') for h in range(days * 24 + 1)]
+    coordinates = [(15.0 + i * 0.1, 73.8 + i * 0.1) for i in range(coordinate_count)]
+
+    data = []
+    for parameter in parameters:
+        data.append({
+            'parameter': parameter,
+            'coordinates': [
+                {
+                    'lat': lat,
+                    'lon': lon,
+                    'dates': [
+                        {'date': date, 'value': round(float(value), 1)}
+                        for date, value in zip(dates, rng.uniform(0, 40, len(dates)))
+                    ]
+                }
+                for lat, lon in coordinates
+            ]
+        })
+    return {'version': '3.0', 'status': 'OK', 'data': data}
+
+
+def legacy_pivot(payload):
+    """The previous MeteomaticsAPI.get_forecast_weather parsing loop"""
+    forecast = []
+    for item in payload.get('data', []):
+        parameter = item.get('parameter', '')
+        coordinates = item.get('coordinates', [])
+
+        if coordinates:
+            dates = coordinates[0].get('dates', [])
+            for date_item in dates:
+                date = date_item.get('date', '')
+                value = date_item.get('value', None)
+
+                entry = next((f for f in forecast if f['date'] == date), None)
+                if not entry:
+                    entry = {'date': date}
+                    forecast.append(entry)
+
+                if 't_2m:C' in parameter:
+                    entry['temperature'] = value
+                elif 'relative_humidity_2m:p' in parameter:
+                    entry['humidity'] = value
+                elif 'wind_speed_10m:ms' in parameter:
+                    entry['wind_speed'] = value
+    return forecast
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--parameters', type=int, default=8)
+    parser.add_argument('--coordinates', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_payload(args.days, args.parameters, args.coordinates)
+    fields = MeteomaticsAPI.PARAMETER_FIELDS
+
+    start = time.perf_counter()
+    legacy = legacy_pivot(payload)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pivoted = pivot_timeseries(payload['data'], fields)
+    pivot_time = time.perf_counter() - start
+
+    legacy_keys = ('date', 'temperature', 'humidity', 'wind_speed')
+    first = [{key: row[key] for key in legacy_keys} for row in pivoted[0]]
+    if first != legacy or len(pivoted) != args.coordinates:
+        print("MISMATCH between legacy and pivoted forecasts")
+        sys.exit(1)
+
+    values = sum(len(c['dates']) for item in payload['data'] for c in item['coordinates'])
+    print(f"Payload:    {args.days} days hourly x {len(payload['data'])} parameters x {args.coordinates} coordinates ({values:,} values)")
+    print(f"Legacy:     {legacy_time * 1000:.1f}ms (first coordinate only)")
+    print(f"Pivot:      {pivot_time * 1000:.1f}ms (all coordinates, {values / pivot_time:,.0f} values/s)")
+    print(f"Speedup:    {legacy_time / pivot_time:.1f}x (first coordinate identical)")
+
+
+if __name__ == '__main__':
+    main()
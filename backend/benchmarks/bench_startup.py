@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark app import time and cold start, failing when either exceeds its budget.
+
+Each run starts a fresh interpreter with `python -X importtime`, imports the
+app, serves / and /health once, and reports the cumulative import time of the
+app module plus the time until both responses were ready. The run fails if
+the median of either exceeds its budget, or if serving those routes loaded
+pandas or scikit-learn.
+
+A final run keeps the default start-up settings (model warm start and the
+background warm-up on) and fails if the warm-up or a request-time lookup of
+the forecaster does not finish within --warm-up-timeout seconds. It starts
+from an empty temporary model directory and time-series store, so it never
+writes the repository's saved model or database.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--import-budget-ms 300] [--cold-start-budget-ms 500] [--warm-up-timeout 60]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('pandas', 'sklearn', 'joblib')
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app
+client = app.app.test_client()
+statuses = [client.get('/').status_code, client.get('/health').status_code]
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    'cold_start_ms': elapsed * 1000,
+    'statuses': statuses,
+    'heavy_modules': [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+# The result goes to a file and the probe exits with os._exit: a background training
+# job started by warm start is not waited for, and its workers hold no pipe of ours
+WARM_UP_PROBE = """
+import json, os, sys, threading, time
+timeout = float(sys.argv[1])
+started = time.perf_counter()
+import app
+warm_up = app.components.start_warm_up()
+warm_up.join(timeout)
+lookup = threading.Thread(target=lambda: app.components.forecaster, daemon=True)
+lookup.start()
+lookup.join(max(0.0, timeout - (time.perf_counter() - started)))
+with open(sys.argv[2], 'w') as f:
+    json.dump({
+        'warm_up_done': not warm_up.is_alive(),
+        'forecaster_resolved': not lookup.is_alive(),
+        'elapsed_s': time.perf_counter() - started
+    }, f)
+os._exit(0)
+"""
+
+
+def run_once():
+    env = dict(
+        os.environ,
+        APP_EAGER_INIT='false',
+        APP_BACKGROUND_WARMUP='false',
+        INGESTION_ENABLED='false',
+        MODEL_WARM_START='false'
+    )
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+    # importtime lines look like "import time: self [us] | cumulative | package"
+    import_us = None
+    slowest = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip() == 'app':
+            import_us = int(cumulative)
+        elif name[:2] != '  ':
+            # Not nested: imported by the app module or by a request handler
+            slowest.append((int(cumulative), name.strip()))
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['import_ms'] = import_us / 1000 if import_us is not None else None
+    result['slowest'] = sorted(slowest, reverse=True)[:5]
+    return result
+
+
+def run_warm_up(timeout):
+    """Resolve every component under the default start-up settings"""
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ,
+            INGESTION_ENABLED='false',
+            MODEL_DIR=os.path.join(directory, 'model'),
+            TIMESERIES_DB_PATH=os.path.join(directory, 'timeseries.db')
+        )
+        for name in ('APP_EAGER_INIT', 'APP_BACKGROUND_WARMUP', 'MODEL_WARM_START'):
+            env.pop(name, None)
+        result_path = os.path.join(directory, 'warm_up.json')
+        probe = subprocess.Popen(
+            [sys.executable, '-c', WARM_UP_PROBE, str(timeout), result_path],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        probe.wait(timeout + 30)
+        with open(result_path) as f:
+            return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=300)
+    parser.add_argument('--cold-start-budget-ms', type=float, default=500)
+    parser.add_argument('--warm-up-timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(run['import_ms'] for run in runs)
+    cold_start_ms = statistics.median(run['cold_start_ms'] for run in runs)
+    heavy = sorted({name for run in runs for name in run['heavy_modules']})
+    statuses = runs[-1]['statuses']
+    warm_up = run_warm_up(args.warm_up_timeout)
+
+    print(f"Runs:       {args.runs} fresh interpreters")
+    print(f"Import:     {import_ms:.1f}ms median (budget {args.import_budget_ms:.0f}ms)")
+    print(f"Cold start: {cold_start_ms:.1f}ms median to serve / and /health (budget {args.cold_start_budget_ms:.0f}ms)")
+    print(f"Warm-up:    {'done' if warm_up['warm_up_done'] else 'STUCK'} in {warm_up['elapsed_s']:.1f}s with default settings")
+    print("Slowest imports outside the app module:")
+    for cumulative, name in runs[-1]['slowest']:
+        print(f"   {cumulative / 1000:7.1f}ms  {name}")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import time {import_ms:.1f}ms exceeds {args.import_budget_ms:.0f}ms")
+    if cold_start_ms > args.cold_start_budget_ms:
+        failures.append(f"cold start {cold_start_ms:.1f}ms exceeds {args.cold_start_budget_ms:.0f}ms")
+    if heavy:
+        failures.append(f"serving / and /health loaded {', '.join(heavy)}")
+    if not warm_up['warm_up_done'] or not warm_up['forecaster_resolved']:
+        failures.append(f"component warm-up did not finish within {args.warm_up_timeout:.0f}s")
+    if statuses != [200, 200]:
+        failures.append(f"/ and /health returned {statuses}")
+
+    if failures:
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        sys.exit(1)
+    print("OK: within budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/trends-style queries against the embedded time-series store.
+
+Loads a year of hourly readings for many locations into a temporary store and
+times the daily trend query for one location.
+
+Usage: python benchmarks/bench_timeseries_store.py [--locations 20] [--days 365]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from models.timeseries_store import TimeSeriesStore, SECONDS_PER_DAY, SECONDS_PER_HOUR
+
+PARAMETERS = ('pm25', 'pm10', 'no2', 'o3', 'so2', 'co')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--locations', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    end_ts = int(time.time())
+    hours = np.arange(end_ts - args.days * SECONDS_PER_DAY, end_ts, SECONDS_PER_HOUR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TimeSeriesStore(os.path.join(tmp, 'timeseries.db'))
+
+        start = time.perf_counter()
+        total = 0
+        for location in range(args.locations):
+            name = f'location-{location}'
+            values = rng.uniform(5, 150, size=(len(hours), len(PARAMETERS)))
+            rows = [
+                (int(ts), name, 'OpenAQ', parameter, float(values[i, j]))
+                for i, ts in enumerate(hours)
+                for j, parameter in enumerate(PARAMETERS)
+            ]
+            total += store.append_many(rows)
+        load_time = time.perf_counter() - start
+        print(f"Loaded {total:,} readings in {load_time:.1f}s ({total / load_time:,.0f} rows/s)")
+
+        for days in (7, 30, args.days):
+            start = time.perf_counter()
+            for _ in range(args.queries):
+                daily = store.daily_means('location-0', PARAMETERS[:4], end_ts - days * SECONDS_PER_DAY, end_ts)
+            elapsed = (time.perf_counter() - start) / args.queries
+            print(f"Trends for {days:>3} days: {elapsed * 1000:.2f} ms/query ({len(daily)} days)")
+
+        start = time.perf_counter()
+        readings = store.query_range('location-0', 'pm25', end_ts - 7 * SECONDS_PER_DAY, end_ts)
+        print(f"Raw 7-day range query: {(time.perf_counter() - start) * 1000:.2f} ms ({len(readings)} readings)")
+
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
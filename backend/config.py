@@ -1,9 +1,19 @@
 import os
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables from .env file (once per process; clients read them through Config)
 load_dotenv()
 
+_warned = set()
+
+
+def warn_once(message):
+    """Print a configuration warning the first time it comes up in this process"""
+    if message not in _warned:
+        _warned.add(message)
+        print(message)
+
+
 class Config:
     # NASA TEMPO API
     NASA_TOKEN = os.getenv('NASA_TOKEN')
@@ -35,6 +45,139 @@ class Config:
         'Severe': {'min': 401, 'max': 500, 'color': '#7e0023'}
     }
     
+    # Pooled HTTP sessions shared by the API clients
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+    HTTP_HOST_POOL_SIZES = {
+        'api.openaq.org': int(os.getenv('HTTP_POOL_SIZE_OPENAQ', 10)),
+        'api.open-meteo.com': int(os.getenv('HTTP_POOL_SIZE_OPEN_METEO', 20)),
+        'api.meteomatics.com': int(os.getenv('HTTP_POOL_SIZE_METEOMATICS', 4)),
+        'asdc.larc.nasa.gov': int(os.getenv('HTTP_POOL_SIZE_TEMPO', 4))
+    }
+    HTTP_DEFAULT_TIMEOUT = 10
+    HTTP_TIMEOUTS = {
+        'openaq': float(os.getenv('OPENAQ_TIMEOUT', 10)),
+        'weather': float(os.getenv('WEATHER_TIMEOUT', 10)),
+        'meteomatics': float(os.getenv('METEOMATICS_TIMEOUT', 15)),
+        'tempo': float(os.getenv('TEMPO_TIMEOUT', 10))
+    }
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))
+    HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', 0.3))
+    HTTP_BACKOFF_JITTER = float(os.getenv('HTTP_BACKOFF_JITTER', 0.2))
+    
+    # Open-Meteo multi-location batching: coordinates per request and how long
+    # the first caller waits for concurrent callers to join its request
+    WEATHER_BATCH_SIZE = int(os.getenv('WEATHER_BATCH_SIZE', 50))
+    WEATHER_BATCH_WINDOW = float(os.getenv('WEATHER_BATCH_WINDOW_MS', 20)) / 1000
+    
+    # Meteomatics fallback quota (Open-Meteo's breaker is its HEALTH_* circuit)
+    METEOMATICS_RATE_PER_MINUTE = float(os.getenv('METEOMATICS_RATE_PER_MINUTE', 10))
+    METEOMATICS_BURST = int(os.getenv('METEOMATICS_BURST', 5))
+    
+    # Per-source health: rolling window, circuit breaker thresholds and cooldown
+    HEALTH_WINDOW_SECONDS = float(os.getenv('HEALTH_WINDOW_SECONDS', 60))
+    HEALTH_MIN_CALLS = int(os.getenv('HEALTH_MIN_CALLS', 5))
+    HEALTH_FAILURE_RATE = float(os.getenv('HEALTH_FAILURE_RATE', 0.5))
+    HEALTH_SLOW_CALL_FRACTION = float(os.getenv('HEALTH_SLOW_CALL_FRACTION', 0.8))  # of the source's timeout
+    HEALTH_CONSECUTIVE_FAILURES = int(os.getenv('HEALTH_CONSECUTIVE_FAILURES', 3))
+    HEALTH_RESET_SECONDS = float(os.getenv('HEALTH_RESET_SECONDS', 30))
+    
+    # Snapshot cache TTLs per upstream source (seconds)
+    CACHE_TTL_TEMPO = int(os.getenv('CACHE_TTL_TEMPO', 900))
+    CACHE_TTL_OPENAQ = int(os.getenv('CACHE_TTL_OPENAQ', 300))
+    CACHE_TTL_WEATHER = int(os.getenv('CACHE_TTL_WEATHER', 600))
+    # How long an expired snapshot may still be served while it is refreshed
+    CACHE_STALE_SECONDS = int(os.getenv('CACHE_STALE_SECONDS', 300))
+    # Upstream snapshots kept at most (per coordinate keys come from client requests)
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 2048))
+    
+    # Upstream fan-out: fetch sources concurrently within an overall deadline
+    FETCH_CONCURRENT = os.getenv('FETCH_CONCURRENT', 'true').lower() != 'false'
+    FETCH_DEADLINE_SECONDS = float(os.getenv('FETCH_DEADLINE_SECONDS', 12))
+    FETCH_MAX_WORKERS = int(os.getenv('FETCH_MAX_WORKERS', 16))
+    # Fetches one request may have in the shared pool at once, so a large batch cannot starve others
+    FETCH_MAX_PER_REQUEST = int(os.getenv('FETCH_MAX_PER_REQUEST', 4))
+    
+    # Load (or start training) the forecast model when the app starts
+    MODEL_WARM_START = os.getenv('MODEL_WARM_START', 'true').lower() != 'false'
+    # Directory of the saved model and scaler
+    MODEL_DIR = os.getenv('MODEL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'saved'))
+    
+    # Background ingestion: per-source poll intervals (seconds), jitter and failure backoff
+    INGESTION_ENABLED = os.getenv('INGESTION_ENABLED', 'true').lower() != 'false'
+    INGESTION_INTERVALS = {
+        'openaq': int(os.getenv('INGESTION_INTERVAL_OPENAQ', 300)),
+        'weather': int(os.getenv('INGESTION_INTERVAL_WEATHER', 600)),
+        'weather_forecast': int(os.getenv('INGESTION_INTERVAL_WEATHER_FORECAST', 3600)),
+        'tempo': int(os.getenv('INGESTION_INTERVAL_TEMPO', 900)),
+        'meteomatics': int(os.getenv('INGESTION_INTERVAL_METEOMATICS', 1800)),
+        'stations': int(os.getenv('INGESTION_INTERVAL_STATIONS', 86400))
+    }
+    INGESTION_JITTER = float(os.getenv('INGESTION_JITTER', 0.1))  # +/- fraction of the interval
+    INGESTION_BACKOFF_MAX = int(os.getenv('INGESTION_BACKOFF_MAX', 3600))
+    # Published snapshots with any source response older than this (seconds) are bypassed for a live fetch
+    SNAPSHOT_MAX_AGE = int(os.getenv('SNAPSHOT_MAX_AGE', 1800))
+    
+    # Location registry: extra locations/stations (JSON lists) and spatial lookup settings
+    LOCATIONS_FILE = os.getenv('LOCATIONS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'locations.json'))
+    STATIONS_FILE = os.getenv('STATIONS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'stations.json'))
+    LOCATION_STATIONS_PER_LOCATION = int(os.getenv('LOCATION_STATIONS_PER_LOCATION', 5))
+    LOCATION_STATION_RADIUS_KM = float(os.getenv('LOCATION_STATION_RADIUS_KM', 50))
+    # Station readings this much older than the freshest one are left out of the area mean
+    OPENAQ_MAX_READING_AGE_HOURS = float(os.getenv('OPENAQ_MAX_READING_AGE_HOURS', 6))
+    WEATHER_GRID_DEGREES = float(os.getenv('WEATHER_GRID_DEGREES', 0.1))  # ~11 km Open-Meteo grid
+    BATCH_MAX_LOCATIONS = int(os.getenv('BATCH_MAX_LOCATIONS', 200))  # per /api/current/batch request
+    
+    # OpenAQ historical backfill (python -m models.openaq_backfill)
+    BACKFILL_DIR = os.getenv('BACKFILL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'openaq_backfill'))
+    BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', 4))
+    BACKFILL_PAGE_LIMIT = int(os.getenv('BACKFILL_PAGE_LIMIT', 1000))
+    BACKFILL_WINDOW_DAYS = int(os.getenv('BACKFILL_WINDOW_DAYS', 7))
+    BACKFILL_CHUNK_ROWS = int(os.getenv('BACKFILL_CHUNK_ROWS', 100000))
+    OPENAQ_RATE_PER_MINUTE = float(os.getenv('OPENAQ_RATE_PER_MINUTE', 60))
+    
+    # Embedded time-series store for ingested readings
+    TIMESERIES_ENABLED = os.getenv('TIMESERIES_ENABLED', 'true').lower() != 'false'
+    TIMESERIES_DB_PATH = os.getenv(
+        'TIMESERIES_DB_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'timeseries.db')
+    )
+    # Whether mock readings are recorded and may build /api/trends
+    TIMESERIES_INCLUDE_MOCK = os.getenv('TIMESERIES_INCLUDE_MOCK', 'false').lower() == 'true'
+    # Readings and daily rollups older than this are pruned (0 keeps everything)
+    TIMESERIES_RETENTION_DAYS = int(os.getenv('TIMESERIES_RETENTION_DAYS', 400))
+    
+    # Model training jobs
+    TRAINING_DAYS = int(os.getenv('TRAINING_DAYS', 60))
+    TRAINING_N_JOBS = int(os.getenv('TRAINING_N_JOBS', -1))  # -1 uses every core
+    TRAINING_JOB_HISTORY = int(os.getenv('TRAINING_JOB_HISTORY', 20))
+    # Automatic retraining after a failed job waits TRAINING_RETRY_INTERVAL seconds,
+    # doubling per consecutive failure up to TRAINING_RETRY_MAX
+    TRAINING_RETRY_INTERVAL = float(os.getenv('TRAINING_RETRY_INTERVAL', 60))
+    TRAINING_RETRY_MAX = float(os.getenv('TRAINING_RETRY_MAX', 3600))
+    
+    # Locations whose last forecast is kept for reuse (least recently used are evicted)
+    FORECAST_MEMO_SIZE = int(os.getenv('FORECAST_MEMO_SIZE', 256))
+    
+    # App start-up: build components (and warm the model) at import time, or in a
+    # background thread once the app is created; otherwise on first use
+    APP_EAGER_INIT = os.getenv('APP_EAGER_INIT', 'false').lower() == 'true'
+    APP_BACKGROUND_WARMUP = os.getenv('APP_BACKGROUND_WARMUP', 'true').lower() != 'false'
+    
+    # JSON serialization backend: auto (orjson when installed), orjson or json
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto').lower()
+    
+    # Response compression (gzip, plus brotli when installed) for bodies of at least COMPRESSION_MIN_BYTES
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() != 'false'
+    COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+    
+    # Cache-Control max-age (seconds) of the precomputed /api/docs, /api/locations and
+    # /api/data-validation responses; clients revalidate with If-None-Match afterwards
+    STATIC_RESPONSE_MAX_AGE = int(os.getenv('STATIC_RESPONSE_MAX_AGE', 300))
+    # Absolute base URL advertised by /api/docs (relative when unset)
+    PUBLIC_BASE_URL = os.getenv('PUBLIC_BASE_URL', '').rstrip('/')
+    
     # Flask Config
     DEBUG = os.getenv('FLASK_ENV') == 'development'
     SECRET_KEY = os.getenv('SECRET_KEY', 'fallback_secret_key_for_development')
@@ -50,7 +193,7 @@ class Config:
             missing_vars.append('OPENAQ_API_KEY')
             
         if missing_vars:
-            print(f"⚠️  Warning: Missing environment variables: {', '.join(missing_vars)}")
-            print("   The application will use mock data for these services.")
+            warn_once(f"⚠️  Warning: Missing environment variables: {', '.join(missing_vars)}\n"
+                      "   The application will use mock data for these services.")
             return False
         return True
@@ -1,14 +1,58 @@
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import sys
 import os
+import copy
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from config import Config
+from utils.cache import SnapshotCache
+from utils.rng import generator_for
+from models.timeseries_store import TimeSeriesStore
+
+# Shared by every DataProcessor in the process so all routes reuse one snapshot
+snapshot_cache = SnapshotCache(stale_seconds=Config.CACHE_STALE_SECONDS, max_entries=Config.CACHE_MAX_ENTRIES)
+
+def _is_cacheable(response):
+    """Only real upstream successes are cached; mock fallbacks are retried on the next call"""
+    return (
+        bool(response) and response.get('status') == 'success'
+        and not str(response.get('source', '')).endswith('_MOCK')
+    )
+
+def _open_timeseries_store():
+    """Open the embedded time-series store, or None when disabled or unavailable"""
+    if not Config.TIMESERIES_ENABLED:
+        return None
+    try:
+        return TimeSeriesStore(Config.TIMESERIES_DB_PATH, retention_days=Config.TIMESERIES_RETENTION_DAYS)
+    except Exception as e:
+        print(f"⚠️  Time-series store unavailable ({e}). Readings will not be recorded.")
+        return None
+
+# Every normalized reading fetched from upstream is appended here
+timeseries_store = _open_timeseries_store()
+
+# Worker pool for concurrent upstream fetches
+fetch_executor = ThreadPoolExecutor(max_workers=Config.FETCH_MAX_WORKERS, thread_name_prefix='upstream-fetch')
 
 class DataProcessor:
     """
     Process and integrate data from multiple sources
     """
     
+    # Numeric fields recorded in the time-series store for each source response
+    RECORDED_PARAMETERS = {
+        'tempo': ('no2_column', 'o3_column', 'hcho_column', 'cloud_fraction'),
+        'openaq': ('pm25', 'pm10', 'no2', 'o3', 'so2', 'co'),
+        'weather': ('temperature', 'humidity', 'wind_speed', 'wind_direction')
+    }
+    
+    # Pollutants reported by /api/trends
+    TREND_PARAMETERS = ('pm25', 'pm10', 'no2', 'o3')
+    
     def __init__(self):
         # Import here to avoid circular imports
         from api.tempo import TempoAPI
@@ -20,55 +64,45 @@ class DataProcessor:
         self.openaq_api = OpenAQAPI()
         self.weather_api = WeatherAPI()
         self.aqi_calculator = AQICalculator()
+        
+        # Snapshot published by the background ingestion scheduler
+        self._published_lock = threading.Lock()
+        self._published = None
+        self._published_sources = {}  # source -> monotonic time its response was received
+        self._published_forecast = None
     
-    def get_integrated_current_data(self):
+    def get_integrated_current_data(self, location=None):
         """
-        Fetch and integrate current data from all sources
+        Fetch and integrate current data from all sources.
+        location is a location resolved by the LocationRegistry; None means the
+        default Goa location.
         """
-        try:
-            # Fetch data from all sources
-            tempo_response = self.tempo_api.get_latest_data()
-            openaq_response = self.openaq_api.get_latest_measurements()
-            weather_response = self.weather_api.get_current_weather()
-            
-            # Process and integrate data
-            integrated_data = {
-                'timestamp': datetime.now().isoformat(),
-                'location': {
-                    'latitude': 15.2993,
-                    'longitude': 74.1240,
-                    'name': 'Goa, India'
-                },
-                'air_quality': self._integrate_air_quality_data(
-                    tempo_response.get('data', {}),
-                    openaq_response.get('data', {})
-                ),
-                'weather': weather_response.get('data', {}),
-                'sources': {
-                    'satellite': tempo_response.get('source', 'unknown'),
-                    'ground': openaq_response.get('source', 'unknown'),
-                    'weather': weather_response.get('source', 'unknown')
-                }
-            }
-            
-            # Calculate AQI
-            pollutant_data = {
-                'pm25': integrated_data['air_quality'].get('pm25'),
-                'pm10': integrated_data['air_quality'].get('pm10'),
-                'no2': integrated_data['air_quality'].get('no2'),
-                'o3': integrated_data['air_quality'].get('o3'),
-                'so2': integrated_data['air_quality'].get('so2'),
-                'co': integrated_data['air_quality'].get('co')
+        # Serve the snapshot published by the ingestion scheduler unless it is
+        # missing or any of its sources is older than SNAPSHOT_MAX_AGE (that
+        # source's polling stalled or keeps failing)
+        published = None
+        if location is None:
+            published, ages = self.get_published_snapshot(max_age=Config.SNAPSHOT_MAX_AGE)
+        if published is not None:
+            return {
+                'status': 'success',
+                'data': published,
+                'snapshot_age_seconds': round(max(ages.values()), 1),
+                'source_ages_seconds': {name: round(age, 1) for name, age in ages.items()}
             }
-            
-            aqi_value = self.aqi_calculator.calculate_composite_aqi(pollutant_data)
-            aqi_info = self.aqi_calculator.get_aqi_category(aqi_value)
-            
-            integrated_data['aqi'] = aqi_info
+        
+        try:
+            # Fetch data from all sources (served from the snapshot cache when fresh)
+            responses = self._fetch_sources(location)
             
             return {
                 'status': 'success',
-                'data': integrated_data
+                'data': self.build_integrated_data(
+                    responses['tempo'],
+                    responses['openaq'],
+                    responses['weather'],
+                    location=location
+                )
             }
             
         except Exception as e:
@@ -79,6 +113,404 @@ class DataProcessor:
                 'data': None
             }
     
+    def build_integrated_data(self, tempo_response, openaq_response, weather_response, location=None):
+        """
+        Integrate TEMPO, OpenAQ and weather responses into one current snapshot
+        """
+        if location is None:
+            location_info = {
+                'latitude': 15.2993,
+                'longitude': 74.1240,
+                'name': 'Goa, India'
+            }
+        else:
+            location_info = {
+                'latitude': location['lat'],
+                'longitude': location['lon'],
+                'name': location['name']
+            }
+        
+        # Process and integrate data
+        integrated_data = {
+            'timestamp': datetime.now().isoformat(),
+            'location': location_info,
+            'air_quality': self._integrate_air_quality_data(
+                tempo_response.get('data', {}),
+                openaq_response.get('data', {})
+            ),
+            'weather': dict(weather_response.get('data') or {}),
+            'sources': {
+                'satellite': tempo_response.get('source', 'unknown'),
+                'ground': openaq_response.get('source', 'unknown'),
+                'weather': weather_response.get('source', 'unknown')
+            }
+        }
+        
+        # Calculate AQI
+        pollutant_data = {
+            'pm25': integrated_data['air_quality'].get('pm25'),
+            'pm10': integrated_data['air_quality'].get('pm10'),
+            'no2': integrated_data['air_quality'].get('no2'),
+            'o3': integrated_data['air_quality'].get('o3'),
+            'so2': integrated_data['air_quality'].get('so2'),
+            'co': integrated_data['air_quality'].get('co')
+        }
+        
+        aqi_value = self.aqi_calculator.calculate_composite_aqi(pollutant_data)
+        aqi_info = self.aqi_calculator.get_aqi_category(aqi_value)
+        
+        integrated_data['aqi'] = aqi_info
+        
+        return integrated_data
+    
+    def publish_snapshot(self, integrated_data=None, weather_forecast=None, source_times=None):
+        """
+        Publish a precomputed current snapshot and/or daily weather forecast for
+        routes to read. source_times maps each source the snapshot was built
+        from to the monotonic time its response arrived (default: now).
+        """
+        with self._published_lock:
+            if integrated_data is not None:
+                self._published = integrated_data
+                self._published_sources = dict(source_times or {'snapshot': time.monotonic()})
+            if weather_forecast is not None:
+                self._published_forecast = weather_forecast
+    
+    def publish_source_response(self, key, response):
+        """
+        Store a source response polled outside the request path in the cache and
+        time-series store. Like _cached_fetch, mock fallbacks are never cached.
+        """
+        if _is_cacheable(response):
+            snapshot_cache.set(key, response, getattr(Config, f'CACHE_TTL_{key.upper()}', None))
+        self._record_reading(key, response)
+    
+    def get_published_snapshot(self, max_age=None):
+        """
+        Get (private copy of the published snapshot, {source: age in seconds}),
+        or (None, ages) before the first publish or when any source's response
+        is older than max_age
+        """
+        with self._published_lock:
+            published, sources = self._published, dict(self._published_sources)
+        if published is None:
+            return None, {}
+        now = time.monotonic()
+        ages = {name: now - received for name, received in sources.items()}
+        if max_age is not None and max(ages.values()) > max_age:
+            return None, ages
+        # Routes annotate the returned data, so never hand out the shared dict
+        return copy.deepcopy(published), ages
+    
+    def get_weather_forecast(self):
+        """
+        Get the daily weather forecast response published by the ingestion
+        scheduler ('data' is a ForecastColumns), or None before the first poll
+        """
+        with self._published_lock:
+            return self._published_forecast
+    
+    def _source_points(self, location=None):
+        """
+        Get the (cache key, latitude, longitude) each source is queried with.
+        Locations sharing a weather grid cell or nearest OpenAQ station share
+        cache keys, and therefore upstream calls.
+        """
+        if location is None:
+            lat = Config.GOA_COORDINATES['latitude']
+            lon = Config.GOA_COORDINATES['longitude']
+            return {
+                'tempo': ('tempo', lat, lon),
+                'openaq': ('openaq', lat, lon),
+                'weather': ('weather', lat, lon)
+            }
+        
+        cell = location['weather_cell']
+        openaq_lat, openaq_lon = location['openaq_point']
+        return {
+            'tempo': (f"tempo:{cell['key']}", cell['latitude'], cell['longitude']),
+            'openaq': (f"openaq:{location['openaq_key']}", openaq_lat, openaq_lon),
+            'weather': (f"weather:{cell['key']}", cell['latitude'], cell['longitude'])
+        }
+    
+    def _source_fetches(self, location=None):
+        """
+        Get {source: (cache key, fetch, fallback)} for a location's TEMPO, OpenAQ
+        and weather responses
+        """
+        points = self._source_points(location)
+        location_name = location['name'] if location else None
+        
+        def cached(kind, fetch, ttl):
+            key, lat, lon = points[kind]
+            return key, lambda: self._cached_fetch(key, lambda: fetch(lat, lon), ttl, kind, location_name)
+        
+        tempo_lat, tempo_lon = points['tempo'][1:]
+        return {
+            'tempo': cached('tempo', self.tempo_api.get_latest_data, Config.CACHE_TTL_TEMPO) + (
+                lambda: self.tempo_api._get_mock_data(tempo_lat, tempo_lon),
+            ),
+            'openaq': cached('openaq', self.openaq_api.get_latest_measurements, Config.CACHE_TTL_OPENAQ) + (
+                self.openaq_api._get_mock_data,
+            ),
+            'weather': cached('weather', self.weather_api.get_current_weather, Config.CACHE_TTL_WEATHER) + (
+                self.weather_api._get_mock_weather,
+            )
+        }
+    
+    def _fetch_sources(self, location=None):
+        """
+        Fetch TEMPO, OpenAQ and weather responses for a location.
+        In concurrent mode all sources are fetched in parallel and any source that
+        misses the overall deadline is replaced by its fallback data.
+        """
+        tasks = {
+            name: (fetch, fallback)
+            for name, (key, fetch, fallback) in self._source_fetches(location).items()
+        }
+        return dict(self._iter_fetches(tasks))
+    
+    def _iter_fetches(self, tasks):
+        """
+        Run {name: (fetch, fallback)} tasks and yield (name, response) pairs as
+        they complete. In concurrent mode at most FETCH_MAX_PER_REQUEST tasks
+        occupy the shared fetch pool at once and every task shares one
+        deadline; tasks that miss it (started or not) yield their fallback data.
+        """
+        if not Config.FETCH_CONCURRENT:
+            for name, (fetch, fallback) in tasks.items():
+                try:
+                    yield name, fetch()
+                except Exception as e:
+                    print(f"Error fetching {name} data: {e}")
+                    yield name, fallback()
+            return
+        
+        deadline = time.monotonic() + Config.FETCH_DEADLINE_SECONDS
+        limit = max(1, Config.FETCH_MAX_PER_REQUEST)
+        queued = deque(tasks)
+        running = {}
+        while queued or running:
+            while queued and len(running) < limit:
+                name = queued.popleft()
+                running[fetch_executor.submit(tasks[name][0])] = name
+            
+            done, _ = wait(running, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                name = running.pop(future)
+                try:
+                    yield name, future.result()
+                except Exception as e:
+                    print(f"Error fetching {name} data: {e}")
+                    yield name, tasks[name][1]()
+        
+        # Late fetches keep running and still refresh the cache when they land
+        for name in list(running.values()) + list(queued):
+            print(f"{name} data missed the {Config.FETCH_DEADLINE_SECONDS}s deadline, using fallback")
+            yield name, tasks[name][1]()
+    
+    def get_batch_current_data(self, locations):
+        """
+        Get compact current conditions for many resolved locations in one pass
+        """
+        entries = [entry for batch in self.iter_batch_current_data(locations) for entry in batch]
+        entries.sort(key=lambda entry: entry['index'])
+        return entries
+    
+    def iter_batch_current_data(self, locations):
+        """
+        Yield lists of compact current-condition entries as their upstream data
+        arrives. Locations sharing a weather grid cell and OpenAQ station share
+        one set of upstream fetches, the weather of up to WEATHER_BATCH_SIZE
+        cells is fetched in one multi-location request, and every group that
+        becomes ready together is scored with one vectorized AQI pass.
+        """
+        tasks = {}
+        groups = {}
+        cells = {}
+        for position, location in enumerate(locations):
+            fetches = self._source_fetches(location)
+            keys = tuple(fetches[name][0] for name in ('tempo', 'openaq', 'weather'))
+            for name in ('tempo', 'openaq'):
+                key, fetch, fallback = fetches[name]
+                tasks.setdefault(key, (fetch, fallback))
+            cell = location['weather_cell']
+            cells.setdefault(keys[2], (cell['latitude'], cell['longitude'], location['name']))
+            groups.setdefault(keys, []).append((position, location))
+        
+        # One task per chunk of weather cells; its response maps cache key -> response
+        cell_keys = list(cells)
+        weather_batches = {}
+        for start in range(0, len(cell_keys), Config.WEATHER_BATCH_SIZE):
+            chunk = {key: cells[key] for key in cell_keys[start:start + Config.WEATHER_BATCH_SIZE]}
+            name = f"weather[{start}:{start + len(chunk)}]"
+            weather_batches[name] = chunk
+            tasks[name] = (
+                lambda chunk=chunk: self._fetch_weather_cells(chunk),
+                lambda chunk=chunk: {key: self.weather_api._get_mock_weather() for key in chunk}
+            )
+        
+        waiting = {}
+        for keys in groups:
+            for key in keys:
+                waiting.setdefault(key, []).append(keys)
+        
+        responses = {}
+        remaining = {keys: len(keys) for keys in groups}
+        for name, response in self._iter_fetches(tasks):
+            arrived = response.items() if name in weather_batches else [(name, response)]
+            ready = []
+            for key, value in arrived:
+                responses[key] = value
+                for keys in waiting[key]:
+                    remaining[keys] -= 1
+                    if remaining[keys] == 0:
+                        ready.append(keys)
+            if ready:
+                yield self._score_batch_groups(
+                    [(groups[keys], [responses[k] for k in keys]) for keys in ready]
+                )
+    
+    def _fetch_weather_cells(self, cells):
+        """
+        Get current weather for {cache key: (lat, lon, location name)} grid
+        cells. Cells without a fresh cached response are fetched together in
+        one multi-location request, then stored through the snapshot cache.
+        """
+        ttl = Config.CACHE_TTL_WEATHER
+        missing = [key for key in cells if not snapshot_cache.is_fresh(key, ttl)]
+        fetched = {}
+        if missing:
+            results = self.weather_api.get_current_weather_batch([cells[key][:2] for key in missing])
+            fetched = dict(zip(missing, results))
+        
+        def fetch(key):
+            if key in fetched:
+                return fetched[key]
+            lat, lon, _ = cells[key]
+            return self.weather_api.get_current_weather(lat, lon)
+        
+        return {
+            key: self._cached_fetch(key, lambda key=key: fetch(key), ttl, 'weather', location_name)
+            for key, (lat, lon, location_name) in cells.items()
+        }
+    
+    def _score_batch_groups(self, groups):
+        """
+        Build compact entries for [(locations, (tempo, openaq, weather) responses)]
+        groups, scoring every group's AQI in one vectorized call
+        """
+        air_quality = [
+            self._integrate_air_quality_data(tempo.get('data', {}), openaq.get('data', {}))
+            for _, (tempo, openaq, weather) in groups
+        ]
+        pollutants = ('pm25', 'pm10', 'no2', 'o3', 'so2', 'co')
+        scores = self.aqi_calculator.calculate_batch_aqi({
+            pollutant: np.array([aq.get(pollutant, np.nan) for aq in air_quality], dtype=float)
+            for pollutant in pollutants
+        })
+        
+        entries = []
+        for index, (members, (tempo, openaq, weather)) in enumerate(groups):
+            aqi = scores['aqi'][index]
+            category_code = int(scores['category_code'][index])
+            category = self.aqi_calculator.AQI_CATEGORY_NAMES[category_code] if category_code >= 0 else None
+            weather_data = weather.get('data') or {}
+            for position, location in members:
+                entries.append({
+                    'index': position,
+                    'name': location['name'],
+                    'lat': location['lat'],
+                    'lon': location['lon'],
+                    'aqi': None if np.isnan(aqi) else int(aqi),
+                    'category': category,
+                    'color': self.aqi_calculator._get_color(category) if category else None,
+                    'dominant_pollutant': scores['dominant_pollutant'][index],
+                    'air_quality': air_quality[index],
+                    'weather': {
+                        name: weather_data.get(name)
+                        for name in ('temperature', 'humidity', 'wind_speed', 'wind_direction')
+                    },
+                    'sources': [tempo.get('source', 'unknown'), openaq.get('source', 'unknown'),
+                                weather.get('source', 'unknown')]
+                })
+        return entries
+    
+    def _cached_fetch(self, key, fetch, ttl, kind=None, location_name=None):
+        """
+        Fetch a source response through the process-wide snapshot cache
+        """
+        def fetch_and_record():
+            response = fetch()
+            self._record_reading(kind or key, response, location_name)
+            return response
+        
+        return snapshot_cache.get_or_fetch(
+            key, fetch_and_record, ttl,
+            cacheable=_is_cacheable
+        )
+    
+    def _record_reading(self, kind, response, location_name=None):
+        """
+        Append a freshly fetched source response to the time-series store,
+        stamped with its observation time so a refetch of the same upstream
+        reading is not stored twice. Mock fallbacks are only recorded when
+        TIMESERIES_INCLUDE_MOCK allows trends to be built from them.
+        """
+        if timeseries_store is None or not response or response.get('status') != 'success':
+            return
+        source = response.get('source', 'unknown')
+        if str(source).endswith('_MOCK') and not Config.TIMESERIES_INCLUDE_MOCK:
+            return
+        
+        data = response.get('data') or {}
+        values = {name: data.get(name) for name in self.RECORDED_PARAMETERS.get(kind, ())}
+        try:
+            timeseries_store.append(
+                location_name or Config.GOA_COORDINATES['name'],
+                source,
+                values,
+                ts=self._observed_at(data)
+            )
+        except Exception as e:
+            print(f"Error recording {kind} reading: {e}")
+    
+    @staticmethod
+    def _observed_at(data):
+        """Epoch seconds of a response's observation time, or None (now) if it has none"""
+        value = data.get('observed_at') or data.get('timestamp')
+        if not isinstance(value, str):
+            return None
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    
+    def refresh_stations(self, registry):
+        """
+        Register the OpenAQ stations around every registry location
+        """
+        total = 0
+        for location in registry.list_locations():
+            response = self.openaq_api.get_stations_near_location(location['lat'], location['lon'])
+            if response:
+                total += registry.add_openaq_stations(response)
+        
+        if not self.openaq_api.api_key:
+            return {'status': 'success', 'data': {'stations': 0}, 'source': 'OpenAQ_MOCK'}
+        return {'status': 'success', 'data': {'stations': total}, 'source': 'OpenAQ'}
+    
+    def get_cache_stats(self):
+        """
+        Get hit/miss/age counters for the snapshot cache
+        """
+        stats = snapshot_cache.get_stats()
+        stats['weather_batches'] = self.weather_api.get_batch_stats()
+        stats['weather_fallback'] = self.weather_api.get_fallback_stats()
+        return stats
+    
     def _integrate_air_quality_data(self, tempo_data, openaq_data):
         """
         Integrate satellite and ground-based measurements
@@ -109,13 +541,63 @@ class DataProcessor:
         
         return integrated
     
+    def _get_stored_trends(self, days):
+        """
+        Build daily trends from the time-series store, newest day first.
+        Returns None when the store has no readings for the range.
+        """
+        if timeseries_store is None:
+            return None
+        
+        end_ts = time.time()
+        daily = timeseries_store.daily_means(
+            Config.GOA_COORDINATES['name'],
+            self.TREND_PARAMETERS,
+            end_ts - (days - 1) * 86400,  # today plus the previous days - 1 days
+            end_ts,
+            exclude_mock=not Config.TIMESERIES_INCLUDE_MOCK
+        )
+        if not daily:
+            return None
+        
+        day_buckets = sorted(daily, reverse=True)
+        columns = {
+            parameter: np.array([daily[day].get(parameter, np.nan) for day in day_buckets])
+            for parameter in self.TREND_PARAMETERS
+        }
+        scored = self.aqi_calculator.calculate_batch_aqi(columns)
+        
+        trends = []
+        for i, day in enumerate(day_buckets):
+            point = {'date': datetime.utcfromtimestamp(day * 86400).date().isoformat()}
+            for parameter in self.TREND_PARAMETERS:
+                value = columns[parameter][i]
+                point[parameter] = None if np.isnan(value) else round(float(value), 2)
+            aqi = scored['aqi'][i]
+            point['aqi'] = None if np.isnan(aqi) else int(aqi)
+            trends.append(point)
+        
+        return trends
+    
     def get_historical_trends(self, days=7):
         """
         Get historical data for trend analysis
         """
         try:
-            # Get historical data from TEMPO
-            tempo_historical = self.tempo_api.get_historical_data(days=days)
+            # Prefer readings recorded in the time-series store
+            stored_trends = self._get_stored_trends(days)
+            if stored_trends:
+                return {
+                    'status': 'success',
+                    'data': stored_trends,
+                    'source': 'timeseries_store'
+                }
+            
+            # Otherwise fall back to synthetic history from TEMPO, seeded per
+            # location and hour so repeated requests get the same answer
+            now = datetime.now().replace(minute=0, second=0, microsecond=0)
+            rng = generator_for('trends', Config.GOA_COORDINATES['name'], now)
+            tempo_historical = self.tempo_api.get_historical_data(days=days, rng=rng, now=now)
             
             # Process historical data
             trends = []
@@ -125,8 +607,8 @@ class DataProcessor:
                 # Mock historical ground data based on satellite data
                 historical_point = {
                     'date': date,
-                    'pm25': data_point.get('no2', 40) * 1.2 + np.random.normal(0, 5),
-                    'pm10': data_point.get('no2', 40) * 2.0 + np.random.normal(0, 10),
+                    'pm25': data_point.get('no2', 40) * 1.2 + rng.normal(0, 5),
+                    'pm10': data_point.get('no2', 40) * 2.0 + rng.normal(0, 10),
                     'no2': data_point.get('no2', 40),
                     'o3': data_point.get('o3', 80),
                     'aqi': None
@@ -1,13 +1,44 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, r2_score
-import joblib
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import hashlib
+import json
 import os
+import threading
+from config import Config
+from models.training_jobs import TrainingJobManager
+from utils.rng import generator_for
+
+# Saved model artifacts live next to this module (unless MODEL_DIR says otherwise)
+# so loading does not depend on the CWD
+MODEL_DIR = Config.MODEL_DIR
+MODEL_PATH = os.path.join(MODEL_DIR, 'aqi_model.pkl')
+SCALER_PATH = os.path.join(MODEL_DIR, 'scaler.pkl')
+
+# Weather forecast columns read by _apply_weather_forecast
+FORECAST_WEATHER_COLUMNS = ('temp_max', 'temp_min', 'humidity', 'wind_speed')
+
+def snapshot_hash(current_data, weather_data, weather_forecast=None):
+    """
+    Hash of the values one location's forecast features are built from.
+    Anything else in the input dicts (timestamps, sources, ...) is ignored,
+    so a re-poll that returns the same readings hashes the same.
+    """
+    values = [
+        current_data.get('pm25', 50), current_data.get('pm10', 80),
+        current_data.get('no2', 40), current_data.get('o3', 100),
+        weather_data.get('temperature', 28), weather_data.get('humidity', 75),
+        weather_data.get('wind_speed', 10)
+    ]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(values, default=str).encode('utf-8'))
+    if weather_forecast is not None and len(weather_forecast):
+        digest.update(weather_forecast.dates.tobytes())
+        for name in FORECAST_WEATHER_COLUMNS:
+            digest.update(name.encode('utf-8'))
+            digest.update(np.ascontiguousarray(weather_forecast[name], dtype=float).tobytes())
+    return digest.hexdigest()
 
 class AirQualityForecaster:
     """
@@ -15,9 +46,17 @@ class AirQualityForecaster:
     """
     
     def __init__(self):
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.scaler = StandardScaler()
+        # scikit-learn and joblib are imported only when a model is trained or loaded
+        self.model = None
+        self.scaler = None
         self.is_trained = False
+        self.model_version = 0
+        self._model_lock = threading.Lock()
+        self.training_jobs = TrainingJobManager(self)
+        # Last forecast per location (see _memoized_forecast), least recently used first
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._memo_stats = {'hits': 0, 'rollovers': 0, 'incremental': 0, 'full': 0, 'rows_predicted': 0}
         self.feature_names = [
             'pm25_current', 'pm10_current', 'no2_current', 'o3_current',
             'temperature', 'humidity', 'wind_speed', 'hour_of_day',
@@ -47,57 +86,92 @@ class AirQualityForecaster:
         
         return pd.DataFrame([features])
     
-    def generate_training_data(self, days=30):
+    # Rush hours with extra traffic emissions
+    RUSH_HOURS = (7, 8, 9, 18, 19, 20)
+    
+    def generate_training_data(self, days=30, locations=1, seed=42):
         """
         Generate synthetic training data for demonstration
         In production, use real historical data
         """
-        np.random.seed(42)
-        training_data = []
-        
-        for day in range(days):
-            for hour in range(24):
-                # Generate realistic synthetic data with patterns
-                base_pm25 = 40 + 20 * np.sin(hour * np.pi / 12) + np.random.normal(0, 10)
-                base_pm10 = 70 + 30 * np.sin(hour * np.pi / 12) + np.random.normal(0, 15)
-                
-                # Weather influence
-                temp = 25 + 5 * np.sin(hour * np.pi / 12) + np.random.normal(0, 2)
-                humidity = 70 + 10 * np.cos(hour * np.pi / 12) + np.random.normal(0, 5)
-                wind = 8 + 4 * np.sin(hour * np.pi / 6) + np.random.normal(0, 2)
-                
-                # Traffic patterns (higher pollution during rush hours)
-                if hour in [7, 8, 9, 18, 19, 20]:
-                    base_pm25 += 15
-                    base_pm10 += 25
-                
-                features = {
-                    'pm25_current': max(5, base_pm25),
-                    'pm10_current': max(10, base_pm10),
-                    'no2_current': max(10, 30 + np.random.normal(0, 10)),
-                    'o3_current': max(20, 80 + np.random.normal(0, 15)),
-                    'temperature': temp,
-                    'humidity': max(30, min(95, humidity)),
-                    'wind_speed': max(0, wind),
-                    'hour_of_day': hour,
-                    'day_of_week': day % 7,
-                    'month': 11,  # November
-                    'pm25_lag1': max(5, base_pm25 * 0.95),
-                    'pm10_lag1': max(10, base_pm10 * 0.95),
-                    # Target: next hour's PM2.5 (simplified single target)
-                    'pm25_next': max(5, base_pm25 + np.random.normal(0, 5))
-                }
-                
-                training_data.append(features)
-        
-        return pd.DataFrame(training_data)
+        return pd.concat(
+            self.iter_training_data(days=days, locations=locations, seed=seed),
+            ignore_index=True
+        )
     
-    def train_model(self):
+    def iter_training_data(self, days=30, locations=1, seed=42, chunk_days=None):
+        """
+        Yield synthetic training data in DataFrame chunks of chunk_days days for
+        every location, so datasets larger than memory can be streamed.
+        Rows are ordered by day, hour and location.
+        """
+        rng = np.random.default_rng(seed)
+        chunk_days = chunk_days or days
+        
+        # Per-location PM offset; the first location keeps the reference profile
+        location_offsets = rng.normal(0, 10, size=locations)
+        location_offsets[0] = 0
+        
+        for first_day in range(0, days, chunk_days):
+            chunk_length = min(chunk_days, days - first_day)
+            yield self._generate_training_chunk(rng, first_day, chunk_length, location_offsets)
+    
+    def _generate_training_chunk(self, rng, first_day, day_count, location_offsets):
+        """
+        Generate day_count days of hourly rows for every location in one pass
+        """
+        shape = (day_count, 24, len(location_offsets))
+        day = np.arange(first_day, first_day + day_count)[:, None, None]
+        hour = np.arange(24)[None, :, None]
+        offset = location_offsets[None, None, :]
+        
+        # Generate realistic synthetic data with patterns
+        daily_cycle = np.sin(hour * np.pi / 12)
+        base_pm25 = 40 + 20 * daily_cycle + offset + rng.normal(0, 10, shape)
+        base_pm10 = 70 + 30 * daily_cycle + 1.5 * offset + rng.normal(0, 15, shape)
+        
+        # Weather influence
+        temp = 25 + 5 * daily_cycle + rng.normal(0, 2, shape)
+        humidity = 70 + 10 * np.cos(hour * np.pi / 12) + rng.normal(0, 5, shape)
+        wind = 8 + 4 * np.sin(hour * np.pi / 6) + rng.normal(0, 2, shape)
+        
+        # Traffic patterns (higher pollution during rush hours)
+        rush = np.isin(hour, self.RUSH_HOURS)
+        base_pm25 = base_pm25 + np.where(rush, 15, 0)
+        base_pm10 = base_pm10 + np.where(rush, 25, 0)
+        
+        def column(values):
+            return np.broadcast_to(values, shape).ravel()
+        
+        return pd.DataFrame({
+            'pm25_current': column(np.maximum(5, base_pm25)),
+            'pm10_current': column(np.maximum(10, base_pm10)),
+            'no2_current': column(np.maximum(10, 30 + rng.normal(0, 10, shape))),
+            'o3_current': column(np.maximum(20, 80 + rng.normal(0, 15, shape))),
+            'temperature': column(temp),
+            'humidity': column(np.clip(humidity, 30, 95)),
+            'wind_speed': column(np.maximum(0, wind)),
+            'hour_of_day': column(hour),
+            'day_of_week': column(day % 7),
+            'month': column(11),  # November
+            'pm25_lag1': column(np.maximum(5, base_pm25 * 0.95)),
+            'pm10_lag1': column(np.maximum(10, base_pm10 * 0.95)),
+            # Target: next hour's PM2.5 (simplified single target)
+            'pm25_next': column(np.maximum(5, base_pm25 + rng.normal(0, 5, shape)))
+        })
+    
+    def fit_new_model(self, days=60, n_jobs=None):
         """
-        Train the forecasting model
+        Fit a fresh model and scaler without touching the ones being served.
+        Returns (model, scaler, metrics).
         """
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.metrics import mean_absolute_error, r2_score
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        
         print("Generating training data...")
-        df = self.generate_training_data(days=60)
+        df = self.generate_training_data(days=days)
         
         # Prepare features and target
         X = df[self.feature_names]
@@ -109,98 +183,361 @@ class AirQualityForecaster:
         )
         
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
         
         # Train model
         print("Training Random Forest model...")
-        self.model.fit(X_train_scaled, y_train)
+        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
+        model.fit(X_train_scaled, y_train)
         
         # Evaluate
-        y_pred = self.model.predict(X_test_scaled)
+        y_pred = model.predict(X_test_scaled)
         mae = mean_absolute_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
         
         print(f"Model Performance - MAE: {mae:.2f}, R²: {r2:.3f}")
         
-        self.is_trained = True
+        # Serving predicts 24 rows at a time; parallel tree workers only add overhead there
+        model.set_params(n_jobs=None)
+        
+        return model, scaler, {
+            'mae': mae,
+            'r2_score': r2
+        }
+    
+    def train_model(self):
+        """
+        Train the forecasting model in the current thread
+        """
+        model, scaler, metrics = self.fit_new_model(days=Config.TRAINING_DAYS, n_jobs=Config.TRAINING_N_JOBS)
+        self.swap_model(model, scaler)
         
         # Save model
         self.save_model()
         
         return {
-            'mae': mae,
-            'r2_score': r2,
+            'mae': metrics['mae'],
+            'r2_score': metrics['r2_score'],
             'status': 'trained'
         }
     
-    def predict_24h_forecast(self, current_data, weather_data):
+    def swap_model(self, model, scaler):
+        """
+        Atomically replace the serving model and scaler.
+        Predictions already running keep using the pair they started with.
+        """
+        with self._model_lock:
+            self.model = model
+            self.scaler = scaler
+            self.is_trained = True
+            self.model_version += 1
+    
+    def _get_serving_model(self):
+        """Get a consistent (model, scaler, is_trained) snapshot"""
+        with self._model_lock:
+            return self.model, self.scaler, self.is_trained
+    
+    def _get_serving_snapshot(self):
+        """Get a consistent (model, scaler, is_trained, model_version) snapshot"""
+        with self._model_lock:
+            return self.model, self.scaler, self.is_trained, self.model_version
+    
+    def warm_start(self):
         """
-        Generate 24-hour forecast
+        Load the saved model before serving traffic, or train one in the background
         """
-        if not self.is_trained:
-            self.train_model()
+        if self.load_model(mmap_mode='r'):
+            return True
         
-        forecasts = []
+        self.start_background_training()
+        return False
+    
+    def start_background_training(self):
+        """Queue a background training job unless one is running or a failed one is backing off"""
+        job, created = self.training_jobs.submit(respect_backoff=True)
+        if created:
+            print("No trained model available, training in the background...")
+        return job
+    
+    def submit_training(self, days=None, n_jobs=None):
+        """Queue a training job; returns (job, created)"""
+        return self.training_jobs.submit(days=days, n_jobs=n_jobs)
+    
+    def get_training_job(self, job_id):
+        """Get the status of a training job, or None if unknown"""
+        return self.training_jobs.get_job(job_id)
+    
+    # Forecast horizons in hours ahead
+    FORECAST_HOURS = np.arange(1, 25)
+    
+    def _build_horizon_features(self, current_data, weather_data, now, weather_forecast=None):
+        """
+        Build the feature rows for every forecast horizon of one location.
+        weather_forecast (ForecastColumns) supplies the weather of horizons that
+        fall on later days; today's horizons use current conditions.
+        """
+        hours = self.FORECAST_HOURS
+        future_times = [now + timedelta(hours=int(hour)) for hour in hours]
         
-        for hour in range(1, 25):  # Next 24 hours
-            # Prepare features for this hour
-            future_time = datetime.now() + timedelta(hours=hour)
-            
-            # Modify features based on time
-            modified_current = current_data.copy()
-            modified_weather = weather_data.copy()
-            
-            # Add time-based variations
-            if hour <= 12:  # Morning pollution increase
-                modified_current['pm25'] = current_data.get('pm25', 50) * (1 + 0.1 * hour/12)
-                modified_current['pm10'] = current_data.get('pm10', 80) * (1 + 0.1 * hour/12)
-            
-            features_df = self.prepare_features(modified_current, modified_weather)
-            features_df['hour_of_day'] = future_time.hour
-            features_df['day_of_week'] = future_time.weekday()
-            
-            # Scale features
-            features_scaled = self.scaler.transform(features_df[self.feature_names])
-            
-            # Predict
-            predicted_pm25 = self.model.predict(features_scaled)[0]
-            
-            # Generate other pollutant predictions (simplified)
-            predicted_pm10 = predicted_pm25 * 1.8 + np.random.normal(0, 5)
-            predicted_no2 = max(10, 35 + np.random.normal(0, 8))
-            predicted_o3 = max(20, 85 + np.random.normal(0, 12))
-            
-            forecast = {
-                'hour': hour,
-                'datetime': future_time.isoformat(),
-                'pm25': max(5, round(predicted_pm25, 1)),
-                'pm10': max(10, round(predicted_pm10, 1)),
-                'no2': round(predicted_no2, 1),
-                'o3': round(predicted_o3, 1),
-                'confidence': 0.85 - (hour * 0.02)  # Confidence decreases with time
-            }
-            
-            forecasts.append(forecast)
+        # Morning pollution increase over the first 12 hours
+        growth = np.where(hours <= 12, 1 + 0.1 * hours / 12, 1.0)
+        pm25 = current_data.get('pm25', 50) * growth
+        pm10 = current_data.get('pm10', 80) * growth
+        
+        horizon_count = len(hours)
+        features = {
+            'pm25_current': pm25,
+            'pm10_current': pm10,
+            'no2_current': np.full(horizon_count, current_data.get('no2', 40)),
+            'o3_current': np.full(horizon_count, current_data.get('o3', 100)),
+            'temperature': np.full(horizon_count, weather_data.get('temperature', 28), dtype=float),
+            'humidity': np.full(horizon_count, weather_data.get('humidity', 75), dtype=float),
+            'wind_speed': np.full(horizon_count, weather_data.get('wind_speed', 10), dtype=float),
+            'hour_of_day': np.array([t.hour for t in future_times]),
+            'day_of_week': np.array([t.weekday() for t in future_times]),
+            'month': np.full(horizon_count, now.month),
+            'pm25_lag1': pm25 * 0.9,  # Mock lag feature
+            'pm10_lag1': pm10 * 0.9   # Mock lag feature
+        }
+        
+        if weather_forecast is not None and len(weather_forecast):
+            self._apply_weather_forecast(features, future_times, now, weather_forecast)
+        
+        return features, future_times
+    
+    def _apply_weather_forecast(self, features, future_times, now, weather_forecast):
+        """Overwrite the weather features of later-day horizons from the daily forecast"""
+        horizon_days = np.array([t.date() for t in future_times], dtype='datetime64[D]')
+        positions = np.searchsorted(weather_forecast.dates, horizon_days)
+        positions = np.minimum(positions, len(weather_forecast) - 1)
+        use_forecast = (horizon_days > np.datetime64(now.date())) & (weather_forecast.dates[positions] == horizon_days)
+        
+        # Arrays are read in place; only the selected days are gathered
+        daily = {
+            'temperature': (weather_forecast['temp_max'][positions] + weather_forecast['temp_min'][positions]) / 2,
+            'humidity': weather_forecast['humidity'][positions],
+            'wind_speed': weather_forecast['wind_speed'][positions]
+        }
+        for name, values in daily.items():
+            mask = use_forecast & ~np.isnan(values)
+            features[name][mask] = values[mask]
+    
+    def predict_24h_forecast(self, current_data, weather_data, weather_forecast=None, location=None):
+        """
+        Generate 24-hour forecast. With a location key the forecast is
+        memoized per location (see _memoized_forecast).
+        """
+        if location is not None:
+            return self._memoized_forecast(location, current_data, weather_data, weather_forecast)
+        return self.predict_batch_forecast([(current_data, weather_data, weather_forecast)])[0]
+    
+    def predict_batch_forecast(self, locations, keys=None):
+        """
+        Generate 24-hour forecasts for many locations at once.
+        
+        locations is a list of (current_data, weather_data) pairs, optionally
+        with a daily ForecastColumns as a third item. All horizons of
+        all locations are scaled and scored in a single model call. Returns one
+        forecast list per location, in the same order. keys name the locations
+        for seeding their noise (default: position in the list).
+        
+        Until a trained model is available this never blocks on training; a
+        persistence forecast of current PM2.5 is returned instead.
+        """
+        if not locations:
+            return []
+        
+        model, scaler, model_ready, _ = self._get_serving_snapshot()
+        if not model_ready:
+            self.start_background_training()
+        
+        now = datetime.now()
+        horizon_count = len(self.FORECAST_HOURS)
+        
+        blocks = []
+        times = []
+        for location in locations:
+            current_data, weather_data = location[:2]
+            weather_forecast = location[2] if len(location) > 2 else None
+            features, future_times = self._build_horizon_features(current_data, weather_data, now, weather_forecast)
+            blocks.append(self._feature_matrix(features))
+            times.append(future_times)
+        
+        # Scale and predict every horizon of every location in one pass
+        predicted_pm25 = self._predict_rows(model, scaler, model_ready, np.vstack(blocks))
+        predicted_pm25 = predicted_pm25.reshape(len(locations), horizon_count)
+        
+        keys = keys or range(len(locations))
+        base_confidence = self._base_confidence(model_ready)
+        return [
+            self._format_forecasts(future_times, predicted_pm25[index], self._draw_noise(key, future_times), base_confidence)
+            for index, (key, future_times) in enumerate(zip(keys, times))
+        ]
+    
+    def _feature_matrix(self, features):
+        """Stack horizon features into a (horizons, features) float array"""
+        return np.column_stack([np.asarray(features[name], dtype=float) for name in self.feature_names])
+    
+    def _predict_rows(self, model, scaler, model_ready, matrix):
+        """Predict PM2.5 for feature rows; persistence of current PM2.5 without a model"""
+        if not len(matrix):
+            return np.empty(0)
+        if not model_ready:
+            return matrix[:, self.feature_names.index('pm25_current')].copy()
+        features_df = pd.DataFrame(matrix, columns=self.feature_names)
+        return model.predict(scaler.transform(features_df))
+    
+    @staticmethod
+    def _base_confidence(model_ready):
+        # Fallback forecasts are less certain than model forecasts
+        return 0.85 if model_ready else 0.6
+    
+    @staticmethod
+    def _draw_noise(location, future_times):
+        """
+        One row of (pm10, no2, o3) noise per horizon, seeded by location and
+        target hour: the same hour always gets the same noise, whether it is
+        computed fresh or carried over by an hourly rollover
+        """
+        return np.array([
+            generator_for('forecast-noise', location, time).normal(0, [5, 8, 12])
+            for time in future_times
+        ]).reshape(len(future_times), 3)
+    
+    def _format_forecasts(self, future_times, pm25_values, noise, base_confidence):
+        """Build forecast dicts; other pollutants are derived from PM2.5 and noise (simplified)"""
+        pm10_values = pm25_values * 1.8 + noise[:, 0]
+        no2_values = np.maximum(10, 35 + noise[:, 1])
+        o3_values = np.maximum(20, 85 + noise[:, 2])
         
+        forecasts = []
+        for i, hour in enumerate(self.FORECAST_HOURS.tolist()):
+            forecasts.append({
+                'hour': hour,
+                'datetime': future_times[i].isoformat(),
+                'pm25': max(5, round(float(pm25_values[i]), 1)),
+                'pm10': max(10, round(float(pm10_values[i]), 1)),
+                'no2': round(float(no2_values[i]), 1),
+                'o3': round(float(o3_values[i]), 1),
+                'confidence': base_confidence - (hour * 0.02)  # Confidence decreases with time
+            })
         return forecasts
     
+    def _memoized_forecast(self, location, current_data, weather_data, weather_forecast=None):
+        """
+        24-hour forecast for one location, reusing the previous one where possible.
+        
+        Horizons are aligned to the start of the hour. The last forecast per
+        location is kept with its input snapshot hash and model version:
+        - same inputs, same hour: returned as is
+        - same inputs, a later hour: the horizon is shifted and only the new
+          trailing hours are predicted
+        - changed inputs, same hour: only horizons whose feature rows changed
+          are predicted again
+        Anything else (new model version, inputs and hour both changed) is a
+        full recompute. Entries are evicted least-recently-used. Each entry
+        keeps the feature rows that actually produced its predictions, so rows
+        carried over by a rollover are predicted again on the next input change.
+        """
+        model, scaler, model_ready, model_version = self._get_serving_snapshot()
+        if not model_ready:
+            self.start_background_training()
+        
+        now = datetime.now().replace(minute=0, second=0, microsecond=0)
+        input_hash = snapshot_hash(current_data, weather_data, weather_forecast)
+        
+        with self._memo_lock:
+            previous = self._memo.get(location)
+            if previous is not None:
+                self._memo.move_to_end(location)
+        
+        horizon_count = len(self.FORECAST_HOURS)
+        reusable = previous is not None and previous['model_version'] == model_version
+        shift = int((now - previous['base_time']).total_seconds() // 3600) if reusable else None
+        
+        if reusable and shift == 0 and previous['input_hash'] == input_hash:
+            self._count_memo('hits')
+            return self._format_forecasts(previous['times'], previous['pm25'], previous['noise'], previous['confidence'])
+        
+        features, future_times = self._build_horizon_features(current_data, weather_data, now, weather_forecast)
+        matrix = self._feature_matrix(features)
+        
+        if reusable and 0 < shift < horizon_count and previous['input_hash'] == input_hash:
+            # Hourly rollover: keep the forecasts for hours still in the horizon
+            pm25 = np.concatenate([
+                previous['pm25'][shift:],
+                self._predict_rows(model, scaler, model_ready, matrix[-shift:])
+            ])
+            noise = np.concatenate([previous['noise'][shift:], self._draw_noise(location, future_times[-shift:])])
+            # Carried rows were predicted from the previous hour's features
+            matrix = np.concatenate([previous['features'][shift:], matrix[-shift:]])
+            self._count_memo('rollovers', rows=shift)
+        elif reusable and shift == 0:
+            # Same hour, different inputs: predict only the rows that changed
+            changed = ~np.all(np.isclose(matrix, previous['features'], equal_nan=True), axis=1)
+            pm25 = previous['pm25'].copy()
+            pm25[changed] = self._predict_rows(model, scaler, model_ready, matrix[changed])
+            noise = previous['noise']
+            self._count_memo('incremental', rows=int(changed.sum()))
+        else:
+            pm25 = self._predict_rows(model, scaler, model_ready, matrix)
+            noise = self._draw_noise(location, future_times)
+            self._count_memo('full', rows=horizon_count)
+        
+        entry = {
+            'input_hash': input_hash,
+            'model_version': model_version,
+            'base_time': now,
+            'times': future_times,
+            'features': matrix,
+            'pm25': pm25,
+            'noise': noise,
+            'confidence': self._base_confidence(model_ready)
+        }
+        with self._memo_lock:
+            self._memo[location] = entry
+            self._memo.move_to_end(location)
+            while len(self._memo) > Config.FORECAST_MEMO_SIZE:
+                self._memo.popitem(last=False)
+        
+        return self._format_forecasts(future_times, pm25, noise, entry['confidence'])
+    
+    def _count_memo(self, outcome, rows=0):
+        with self._memo_lock:
+            self._memo_stats[outcome] += 1
+            self._memo_stats['rows_predicted'] += rows
+    
+    def get_memo_stats(self):
+        """Forecast memo outcomes and the number of horizon rows actually predicted"""
+        with self._memo_lock:
+            return dict(self._memo_stats, entries=len(self._memo))
+    
     def save_model(self):
         """Save trained model and scaler"""
+        import joblib
+        
         try:
-            os.makedirs('models/saved', exist_ok=True)
-            joblib.dump(self.model, 'models/saved/aqi_model.pkl')
-            joblib.dump(self.scaler, 'models/saved/scaler.pkl')
+            os.makedirs(MODEL_DIR, exist_ok=True)
+            # Write to temporary files first so a crash never leaves a truncated model behind
+            model, scaler, _ = self._get_serving_model()
+            for obj, path in ((model, MODEL_PATH), (scaler, SCALER_PATH)):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                joblib.dump(obj, tmp_path)
+                os.replace(tmp_path, path)
             print("Model saved successfully")
         except Exception as e:
             print(f"Error saving model: {e}")
     
-    def load_model(self):
-        """Load pre-trained model"""
+    def load_model(self, mmap_mode=None):
+        """Load pre-trained model, optionally memory-mapping its arrays"""
+        import joblib
+        
         try:
-            self.model = joblib.load('models/saved/aqi_model.pkl')
-            self.scaler = joblib.load('models/saved/scaler.pkl')
-            self.is_trained = True
+            model = joblib.load(MODEL_PATH, mmap_mode=mmap_mode)
+            scaler = joblib.load(SCALER_PATH)
+            self.swap_model(model, scaler)
             print("Model loaded successfully")
             return True
         except Exception as e:
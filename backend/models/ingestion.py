@@ -0,0 +1,177 @@
+import heapq
+import random
+import threading
+import time
+from datetime import datetime
+from config import Config
+
+
+class IngestionScheduler:
+    """
+    Poll every upstream source on its own cadence in the background and publish
+    the integrated current snapshot, so request handlers never call upstream.
+    """
+
+    def __init__(self, processor, executor):
+        self.processor = processor
+        self.executor = executor
+
+        weather_api = processor.weather_api
+        fetchers = {
+            'openaq': processor.openaq_api.get_latest_measurements,
+            'weather': weather_api.get_current_weather,
+            'weather_forecast': weather_api.get_forecast_columns,
+            'tempo': processor.tempo_api.get_latest_data
+        }
+        # Keep a warm Meteomatics fallback only when it can return real data
+        if weather_api.meteomatics.username and weather_api.meteomatics.password:
+            fetchers['meteomatics'] = weather_api.meteomatics.get_current_weather
+        # Refresh the OpenAQ stations behind the location registry's spatial index
+        if processor.openaq_api.api_key:
+            from utils.locations import get_location_registry
+
+            registry = get_location_registry()
+            fetchers['stations'] = lambda: processor.refresh_stations(registry)
+
+        # Sources that can only ever return mock data: TEMPO has no real client
+        # yet, OpenAQ needs an API key. Their mock responses are not failures.
+        mock_only = {'tempo'} if processor.openaq_api.api_key else {'tempo', 'openaq'}
+
+        self._sources = {
+            name: {
+                'fetch': fetch,
+                'interval': Config.INGESTION_INTERVALS[name],
+                'mock_only': name in mock_only,
+                'failures': 0,
+                'polls': 0,
+                'last_poll': None,
+                'last_success': None,
+                'last_error': None,
+                'next_poll_in': None
+            }
+            for name, fetch in fetchers.items()
+        }
+        self._responses = {}
+        self._received = {}  # source -> monotonic time of its current response
+        self._publish_lock = threading.Lock()
+
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (due monotonic time, source name)
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        """Start polling; every source is polled once right away"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            now = time.monotonic()
+            for name in self._sources:
+                heapq.heappush(self._queue, (now, name))
+            self._thread = threading.Thread(target=self._run, name='ingestion-scheduler', daemon=True)
+            self._thread.start()
+        print(f"📡 Ingestion scheduler polling: {', '.join(self._sources)}")
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def get_status(self):
+        """Per-source poll counters and schedule"""
+        with self._cond:
+            return {
+                'running': self._thread is not None and not self._stopped,
+                'sources': {
+                    name: {key: value for key, value in source.items() if key != 'fetch'}
+                    for name, source in self._sources.items()
+                }
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._queue or self._queue[0][0] > time.monotonic()):
+                    timeout = self._queue[0][0] - time.monotonic() if self._queue else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                _, name = heapq.heappop(self._queue)
+            # Poll on the shared fetch pool so a slow source never delays the others
+            self.executor.submit(self._poll, name)
+
+    def _poll(self, name):
+        source = self._sources[name]
+        error = None
+        try:
+            response = source['fetch']()
+            if not response or response.get('status') != 'success':
+                error = (response or {}).get('message', 'unsuccessful response')
+            elif str(response.get('source', '')).endswith('_MOCK') and not source['mock_only']:
+                error = f"fell back to {response.get('source')}"
+        except Exception as e:
+            response = None
+            error = str(e)
+
+        if response and (error is None or name not in self._responses):
+            # Mock data only fills a gap; it never replaces a real reading (or
+            # keeps its fill-in age, so a snapshot built on it goes stale)
+            try:
+                self._publish(name, response)
+            except Exception as e:
+                print(f"Error publishing {name} data: {e}")
+
+        with self._cond:
+            source['polls'] += 1
+            source['last_poll'] = datetime.now().isoformat()
+            if error is None:
+                source['failures'] = 0
+                source['last_success'] = source['last_poll']
+            else:
+                source['failures'] += 1
+                source['last_error'] = error
+
+            delay = self._next_delay(source)
+            source['next_poll_in'] = round(delay, 1)
+            if not self._stopped:
+                heapq.heappush(self._queue, (time.monotonic() + delay, name))
+                self._cond.notify_all()
+
+    def _next_delay(self, source):
+        """Poll interval with exponential backoff on failure and random jitter"""
+        delay = source['interval'] * (2 ** min(source['failures'], 10))
+        delay = min(delay, max(source['interval'], Config.INGESTION_BACKOFF_MAX))
+        return delay * (1 + random.uniform(-Config.INGESTION_JITTER, Config.INGESTION_JITTER))
+
+    def _publish(self, name, response):
+        """Push a polled response into the cache/store and republish the snapshot"""
+        with self._publish_lock:
+            self._responses[name] = response
+            self._received[name] = time.monotonic()
+            if name == 'stations':
+                return
+            if name == 'weather_forecast':
+                self.processor.publish_snapshot(weather_forecast=response)
+                return
+
+            if name in ('openaq', 'weather', 'tempo'):
+                self.processor.publish_source_response(name, response)
+
+            if not all(key in self._responses for key in ('openaq', 'weather', 'tempo')):
+                return
+
+            weather_source = 'weather'
+            fallback = self._responses.get('meteomatics')
+            if fallback and str(self._responses['weather'].get('source', '')).endswith('_MOCK'):
+                weather_source = 'meteomatics'
+
+            integrated = self.processor.build_integrated_data(
+                self._responses['tempo'],
+                self._responses['openaq'],
+                self._responses[weather_source]
+            )
+            self.processor.publish_snapshot(integrated_data=integrated, source_times={
+                'tempo': self._received['tempo'],
+                'openaq': self._received['openaq'],
+                'weather': self._received[weather_source]
+            })
@@ -0,0 +1,336 @@
+"""
+Backfill historical OpenAQ /measurements for every station in a region.
+
+Pages are fetched concurrently within a token-bucket rate limit and streamed
+into compressed columnar .npz chunks. Each chunk lists the pages whose rows
+it holds, and a checkpoint (rebuilt from those lists on start) records which
+pages are safely on disk, so an interrupted run resumes where it stopped
+without writing any page twice.
+
+Usage (from backend/): python -m models.openaq_backfill [--days 90] [--radius 50000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Allow running as a plain script too
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.resilience import TokenBucket
+
+# Pollutants kept by the backfill; stored as int8 codes indexing this tuple
+PARAMETERS = ('pm25', 'pm10', 'no2', 'o3', 'so2', 'co')
+PARAMETER_CODES = {name: code for code, name in enumerate(PARAMETERS)}
+
+COLUMNS = {
+    'ts': np.int64,
+    'station_id': np.int64,
+    'parameter': np.int8,
+    'value': np.float64,
+    'lat': np.float32,
+    'lon': np.float32
+}
+
+
+class ColumnarChunkWriter:
+    """
+    Buffer measurement rows per column and write them out as numbered
+    compressed .npz chunks of up to chunk_rows rows. The markers of the rows
+    in a chunk are stored in it as a JSON 'pages' manifest, so rows and the
+    record of them become durable in the same atomic rename.
+    """
+
+    def __init__(self, directory, chunk_rows=100000, on_flush=None):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.on_flush = on_flush
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._columns = {name: [] for name in COLUMNS}
+        self._pending = []  # markers that become durable with the next chunk
+        self._chunk = self._next_chunk_number()
+        self.rows_written = 0
+
+    def append(self, columns, marker=None):
+        """Append equal-length column lists; marker is passed to on_flush once written"""
+        with self._lock:
+            for name in COLUMNS:
+                self._columns[name].extend(columns[name])
+            if marker is not None:
+                self._pending.append(marker)
+            if len(self._columns['ts']) >= self.chunk_rows:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        count = len(self._columns['ts'])
+        if count:
+            arrays = {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in self._columns.items()}
+            arrays['pages'] = np.asarray(json.dumps(self._pending))
+            path = os.path.join(self.directory, f'chunk-{self._chunk:06d}.npz')
+            tmp_path = f'{path}.tmp.npz'
+            np.savez_compressed(tmp_path, **arrays)
+            os.replace(tmp_path, path)
+            self._chunk += 1
+            self.rows_written += count
+            self._columns = {name: [] for name in COLUMNS}
+
+        markers, self._pending = self._pending, []
+        if markers and self.on_flush is not None:
+            self.on_flush(markers)
+
+    def _next_chunk_number(self):
+        numbers = [
+            int(name[6:12]) for name in os.listdir(self.directory)
+            if name.startswith('chunk-') and name.endswith('.npz') and '.tmp' not in name
+        ]
+        return max(numbers, default=-1) + 1
+
+
+def _chunk_names(directory):
+    return sorted(
+        name for name in os.listdir(directory)
+        if name.startswith('chunk-') and name.endswith('.npz') and '.tmp' not in name
+    )
+
+
+def read_chunk_pages(directory):
+    """Get the page markers recorded in every chunk's manifest, oldest chunk first"""
+    markers = []
+    for chunk in _chunk_names(directory):
+        with np.load(os.path.join(directory, chunk)) as data:
+            if 'pages' in data.files:
+                markers.extend(tuple(marker) for marker in json.loads(str(data['pages'])))
+    return markers
+
+
+def load_backfill(directory):
+    """Load every chunk in a backfill directory as one dict of column arrays"""
+    chunks = _chunk_names(directory)
+    parts = {name: [] for name in COLUMNS}
+    for chunk in chunks:
+        with np.load(os.path.join(directory, chunk)) as data:
+            for name in COLUMNS:
+                parts[name].append(data[name])
+    return {
+        name: np.concatenate(arrays) if arrays else np.empty(0, dtype=COLUMNS[name])
+        for name, arrays in parts.items()
+    }
+
+
+class OpenAQBackfill:
+    """
+    Backfill /measurements for a set of stations over a date range.
+
+    Work is split into (station, window) units; each unit is paged until a
+    short page. Pages count as done only once their rows are in a chunk on
+    disk, so a resumed run re-fetches at most the rows that were still
+    buffered.
+    """
+
+    def __init__(self, openaq_api, directory, workers=None, rate_per_minute=None,
+                 page_limit=None, window_days=None, chunk_rows=None):
+        self.api = openaq_api
+        self.directory = directory
+        self.workers = workers or Config.BACKFILL_WORKERS
+        self.page_limit = page_limit or Config.BACKFILL_PAGE_LIMIT
+        self.window_days = window_days or Config.BACKFILL_WINDOW_DAYS
+        rate = rate_per_minute or Config.OPENAQ_RATE_PER_MINUTE
+        self.bucket = TokenBucket(rate / 60, max(1, self.workers))
+
+        self.checkpoint_path = os.path.join(directory, 'checkpoint.json')
+        self._lock = threading.Lock()
+        self._checkpoint = self._load_checkpoint()
+        self.writer = ColumnarChunkWriter(
+            directory, chunk_rows or Config.BACKFILL_CHUNK_ROWS, on_flush=self._commit_pages
+        )
+        self._stats = {'pages': 0, 'rows': 0, 'units_done': 0, 'errors': 0}
+
+    def build_units(self, station_ids, start, end):
+        """Split the date range into per-station windows"""
+        units = []
+        for station_id in station_ids:
+            window_start = start
+            while window_start < end:
+                window_end = min(end, window_start + timedelta(days=self.window_days))
+                units.append((station_id, window_start.isoformat(), window_end.isoformat()))
+                window_start = window_end
+        return units
+
+    def run(self, units, progress_interval=5.0):
+        """Fetch every unfinished unit and return the run statistics"""
+        pending = [unit for unit in units if self._unit_key(unit) not in self._checkpoint['done']]
+        with self._lock:
+            self._stats['units_done'] = len(units) - len(pending)
+        total = len(units)
+
+        started = time.monotonic()
+        stop = threading.Event()
+        reporter = threading.Thread(
+            target=self._report, args=(stop, started, total, progress_interval), daemon=True
+        )
+        reporter.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='openaq-backfill') as executor:
+                for _ in executor.map(self._run_unit, pending):
+                    pass
+        finally:
+            self.writer.flush()
+            stop.set()
+            reporter.join()
+
+        elapsed = time.monotonic() - started
+        stats = self.get_stats()
+        stats.update({
+            'units_total': total,
+            'elapsed_seconds': round(elapsed, 1),
+            'rows_per_second': round(stats['rows'] / elapsed, 1) if elapsed else 0.0
+        })
+        return stats
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _run_unit(self, unit):
+        station_id, date_from, date_to = unit
+        key = self._unit_key(unit)
+        with self._lock:
+            page = self._checkpoint['next_page'].get(key, 1)
+
+        try:
+            while True:
+                self.bucket.acquire()
+                results = self.api.get_measurements_page(station_id, date_from, date_to, page, self.page_limit)
+                last = len(results) < self.page_limit
+                self.writer.append(self._to_columns(results), marker=(key, page, last))
+                with self._lock:
+                    self._stats['pages'] += 1
+                    self._stats['rows'] += len(results)
+                if last:
+                    return
+                page += 1
+        except Exception as e:
+            # Left unfinished in the checkpoint; the next run resumes this unit
+            print(f"Backfill of station {station_id} {date_from[:10]}..{date_to[:10]} stopped at page {page}: {e}")
+            with self._lock:
+                self._stats['errors'] += 1
+
+    def _to_columns(self, results):
+        """Convert one page of measurements to column lists, dropping unknown pollutants"""
+        columns = {name: [] for name in COLUMNS}
+        for result in results:
+            parameter = str(result.get('parameter', '')).lower()
+            code = PARAMETER_CODES.get(parameter)
+            value = result.get('value')
+            utc = (result.get('date') or {}).get('utc')
+            if code is None or value is None or not utc:
+                continue
+            coordinates = result.get('coordinates') or {}
+            columns['ts'].append(int(datetime.fromisoformat(utc.replace('Z', '+00:00')).timestamp()))
+            columns['station_id'].append(result.get('locationId', 0))
+            columns['parameter'].append(code)
+            columns['value'].append(self.api._convert_units(value, result.get('unit', ''), parameter))
+            columns['lat'].append(coordinates.get('latitude', np.nan))
+            columns['lon'].append(coordinates.get('longitude', np.nan))
+        return columns
+
+    def _commit_pages(self, markers):
+        """Record pages whose rows just reached disk"""
+        with self._lock:
+            self._stats['units_done'] += self._apply_pages(self._checkpoint, markers)
+            tmp_path = f'{self.checkpoint_path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._checkpoint, f)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    def _load_checkpoint(self):
+        checkpoint = {'done': {}, 'next_page': {}}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        # A crash between writing a chunk and the checkpoint leaves the chunk's
+        # pages unrecorded; its manifest is authoritative
+        if os.path.isdir(self.directory):
+            self._apply_pages(checkpoint, read_chunk_pages(self.directory))
+        return checkpoint
+
+    @staticmethod
+    def _apply_pages(checkpoint, markers):
+        """Mark (unit key, page, last) markers as on disk; returns how many units they finished"""
+        finished = 0
+        for key, page, last in markers:
+            if last:
+                finished += not checkpoint['done'].get(key)
+                checkpoint['done'][key] = True
+                checkpoint['next_page'].pop(key, None)
+            elif not checkpoint['done'].get(key):
+                checkpoint['next_page'][key] = max(page + 1, checkpoint['next_page'].get(key, 1))
+        return finished
+
+    def _report(self, stop, started, total, interval):
+        while not stop.wait(interval):
+            stats = self.get_stats()
+            elapsed = time.monotonic() - started
+            print(
+                f"📥 {stats['units_done']}/{total} windows | {stats['pages']} pages | "
+                f"{stats['rows']:,} rows | {stats['rows'] / elapsed:,.0f} rows/s | "
+                f"{stats['pages'] / elapsed * 60:.1f} pages/min | {stats['errors']} errors"
+            )
+
+    @staticmethod
+    def _unit_key(unit):
+        station_id, date_from, date_to = unit
+        return f'{station_id}|{date_from}|{date_to}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=90, help='How far back to backfill')
+    parser.add_argument('--lat', type=float, default=Config.GOA_COORDINATES['latitude'])
+    parser.add_argument('--lon', type=float, default=Config.GOA_COORDINATES['longitude'])
+    parser.add_argument('--radius', type=int, default=50000, help='Station search radius in metres')
+    parser.add_argument('--output', default=Config.BACKFILL_DIR)
+    parser.add_argument('--workers', type=int, default=Config.BACKFILL_WORKERS)
+    parser.add_argument('--rate', type=float, default=Config.OPENAQ_RATE_PER_MINUTE, help='Requests per minute')
+    args = parser.parse_args()
+
+    from api.openaq import OpenAQAPI
+
+    api = OpenAQAPI()
+    if not api.api_key:
+        print("OPENAQ_API_KEY is required for a backfill")
+        sys.exit(1)
+
+    station_ids = sorted({station['id'] for station in api.iter_stations(args.lat, args.lon, args.radius)})
+    print(f"Found {len(station_ids)} stations within {args.radius / 1000:.0f} km")
+
+    end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=args.days)
+
+    backfill = OpenAQBackfill(api, args.output, workers=args.workers, rate_per_minute=args.rate)
+    stats = backfill.run(backfill.build_units(station_ids, start, end))
+    print(
+        f"✅ {stats['units_done']}/{stats['units_total']} windows, {stats['rows']:,} rows in "
+        f"{stats['elapsed_seconds']}s ({stats['rows_per_second']:,} rows/s), {stats['errors']} errors"
+    )
+    if stats['units_done'] < stats['units_total']:
+        print("Run again to resume the unfinished windows")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+import os
+import sqlite3
+import threading
+import time
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    ts INTEGER NOT NULL,
+    hour_bucket INTEGER NOT NULL,
+    location TEXT NOT NULL,
+    source TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_readings_bucket
+    ON readings (location, parameter, hour_bucket);
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    location TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    day_bucket INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    value_sum REAL NOT NULL,
+    value_count INTEGER NOT NULL,
+    value_min REAL NOT NULL,
+    value_max REAL NOT NULL,
+    PRIMARY KEY (location, parameter, day_bucket, source)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO daily_rollup
+    (location, parameter, day_bucket, source, value_sum, value_count, value_min, value_max)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (location, parameter, day_bucket, source) DO UPDATE SET
+    value_sum = value_sum + excluded.value_sum,
+    value_count = value_count + excluded.value_count,
+    value_min = MIN(value_min, excluded.value_min),
+    value_max = MAX(value_max, excluded.value_max)
+"""
+
+# One reading per observation: the same source reporting the same observation
+# time again (a refetch of an unchanged upstream value) is not stored twice
+_UNIQUE_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_readings_unique
+    ON readings (location, source, parameter, ts)
+"""
+
+_INSERT_READING = (
+    'INSERT OR IGNORE INTO readings (ts, hour_bucket, location, source, parameter, value) '
+    'VALUES (?, ?, ?, ?, ?, ?)'
+)
+
+# How often append() prunes readings older than the retention window
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class TimeSeriesStore:
+    """
+    Embedded append-only store for normalized readings, backed by SQLite.
+
+    Raw readings are indexed by hour bucket for range queries, and a daily
+    rollup is maintained on append so day-level trends never scan raw rows.
+    A reading repeating an already stored (location, source, parameter,
+    timestamp) is ignored. With retention_days, readings and rollups older
+    than that are pruned (at most hourly, on append).
+    """
+
+    def __init__(self, path, retention_days=None):
+        self.path = path
+        self.retention_days = retention_days
+        self._next_prune = 0.0
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._ensure_unique_index()
+
+    def append(self, location, source, values, ts=None):
+        """
+        Record one reading per parameter in values ({parameter: value}).
+        Non-numeric and missing values are skipped.
+        Readings are stamped with ts (the observation time) or now.
+        """
+        ts = int(ts if ts is not None else time.time())
+        rows = [
+            (ts, location, source, parameter, float(value))
+            for parameter, value in values.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+        ]
+        return self.append_many(rows)
+
+    def append_many(self, rows):
+        """
+        Record many (ts, location, source, parameter, value) rows in one
+        transaction. Returns how many were new (repeats are ignored).
+        """
+        if not rows:
+            return 0
+
+        readings = [
+            (int(ts), int(ts) // SECONDS_PER_HOUR, location, source, parameter, value)
+            for ts, location, source, parameter, value in rows
+        ]
+
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(_INSERT_READING, readings)
+            inserted = readings
+            if self._conn.total_changes - before != len(readings):
+                # Some were repeats: redo row by row so only new readings reach the rollup
+                self._conn.rollback()
+                inserted = [
+                    reading for reading in readings
+                    if self._conn.execute(_INSERT_READING, reading).rowcount
+                ]
+            self._conn.executemany(_UPSERT_ROLLUP, self._rollups(inserted))
+
+        self._maybe_prune()
+        return len(inserted)
+
+    def prune(self, before_ts):
+        """Delete readings (by hour) and daily rollups (by day) older than before_ts"""
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                'DELETE FROM readings WHERE hour_bucket < ?', (int(before_ts) // SECONDS_PER_HOUR,)
+            ).rowcount
+            self._conn.execute('DELETE FROM daily_rollup WHERE day_bucket < ?', (int(before_ts) // SECONDS_PER_DAY,))
+        return deleted
+
+    def query_range(self, location, parameter, start_ts, end_ts):
+        """
+        Get raw (ts, source, value) readings for one parameter in [start_ts, end_ts)
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                'SELECT ts, source, value FROM readings '
+                'WHERE location = ? AND parameter = ? AND hour_bucket BETWEEN ? AND ? '
+                'AND ts >= ? AND ts < ? ORDER BY ts',
+                (location, parameter, int(start_ts) // SECONDS_PER_HOUR,
+                 int(end_ts) // SECONDS_PER_HOUR, int(start_ts), int(end_ts))
+            )
+            return cursor.fetchall()
+
+    def daily_means(self, location, parameters, start_ts, end_ts, exclude_mock=True):
+        """
+        Get {day_bucket: {parameter: mean}} for days overlapping [start_ts, end_ts),
+        pooling every source (optionally ignoring *_MOCK sources)
+        """
+        placeholders = ','.join('?' * len(parameters))
+        query = (
+            'SELECT day_bucket, parameter, SUM(value_sum) / SUM(value_count) FROM daily_rollup '
+            f'WHERE location = ? AND parameter IN ({placeholders}) AND day_bucket BETWEEN ? AND ? '
+        )
+        if exclude_mock:
+            query += "AND source NOT LIKE '%MOCK' "
+        query += 'GROUP BY day_bucket, parameter'
+
+        with self._lock:
+            cursor = self._conn.execute(
+                query,
+                (location, *parameters, int(start_ts) // SECONDS_PER_DAY, (int(end_ts) - 1) // SECONDS_PER_DAY)
+            )
+            rows = cursor.fetchall()
+
+        days = {}
+        for day_bucket, parameter, mean in rows:
+            days.setdefault(day_bucket, {})[parameter] = mean
+        return days
+
+    def _maybe_prune(self):
+        if not self.retention_days or time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+        self.prune(time.time() - self.retention_days * SECONDS_PER_DAY)
+
+    @staticmethod
+    def _rollups(readings):
+        """Daily rollup upsert rows for (ts, hour_bucket, location, source, parameter, value) readings"""
+        rollups = {}
+        for ts, _, location, source, parameter, value in readings:
+            key = (location, parameter, ts // SECONDS_PER_DAY, source)
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollups[key] = [value, 1, value, value]
+            else:
+                rollup[0] += value
+                rollup[1] += 1
+                rollup[2] = min(rollup[2], value)
+                rollup[3] = max(rollup[3], value)
+        return [key + tuple(agg) for key, agg in rollups.items()]
+
+    def _ensure_unique_index(self):
+        """Create the unique reading index, first dropping repeats stored before it existed"""
+        with self._lock, self._conn:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_readings_unique'"
+            ).fetchone()
+            if exists:
+                return
+            self._conn.execute(
+                'DELETE FROM readings WHERE rowid NOT IN ('
+                'SELECT MIN(rowid) FROM readings GROUP BY location, source, parameter, ts)'
+            )
+            self._conn.execute(_UNIQUE_INDEX)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,153 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from config import Config
+
+
+def _fit_in_subprocess(days, n_jobs):
+    """Fit a forecasting model in a worker process"""
+    from models.forecast import AirQualityForecaster
+
+    return AirQualityForecaster().fit_new_model(days=days, n_jobs=n_jobs)
+
+
+class TrainingJobManager:
+    """
+    Run forecast model trainings as background jobs, one at a time
+    """
+
+    def __init__(self, forecaster):
+        self.forecaster = forecaster
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._active_job_id = None
+        self._executor = None
+        self._failures = 0
+        self._last_failure = None
+        self._last_failed_job_id = None
+
+    def submit(self, days=None, n_jobs=None, respect_backoff=False):
+        """
+        Queue a training job. If a training is already running, its job is
+        returned instead of starting an overlapping one. With respect_backoff,
+        the last failed job is returned while its retry backoff lasts.
+        Returns (job, created).
+        """
+        with self._lock:
+            if self._active_job_id is not None:
+                return dict(self._jobs[self._active_job_id]), False
+            if respect_backoff and self._retry_in_locked() > 0:
+                job = self._jobs.get(self._last_failed_job_id)
+                return (dict(job) if job else None), False
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'stage': 'queued',
+                'progress': 0.0,
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+            self._active_job_id = job_id
+            self._trim_history()
+            job = dict(self._jobs[job_id])
+
+        days = days or Config.TRAINING_DAYS
+        n_jobs = n_jobs if n_jobs is not None else Config.TRAINING_N_JOBS
+        threading.Thread(
+            target=self._run, args=(job_id, days, n_jobs),
+            name=f'training-job-{job_id[:8]}', daemon=True
+        ).start()
+
+        return job, True
+
+    def get_job(self, job_id):
+        """Get a copy of a job's status, or None if it is unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self):
+        """Get every remembered job, newest first"""
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]
+
+    def retry_in(self):
+        """Seconds until a failed training may be retried automatically (0 if it may now)"""
+        with self._lock:
+            return self._retry_in_locked()
+
+    def _retry_in_locked(self):
+        """Exponential backoff after consecutive failures, capped at TRAINING_RETRY_MAX"""
+        if not self._failures:
+            return 0.0
+        delay = Config.TRAINING_RETRY_INTERVAL * (2 ** min(self._failures - 1, 10))
+        delay = min(delay, max(Config.TRAINING_RETRY_INTERVAL, Config.TRAINING_RETRY_MAX))
+        return max(0.0, self._last_failure + delay - time.monotonic())
+
+    def _run(self, job_id, days, n_jobs):
+        self._update(job_id, status='running', stage='training', progress=0.1,
+                     started_at=datetime.now().isoformat())
+        try:
+            model, scaler, metrics = self._get_executor().submit(_fit_in_subprocess, days, n_jobs).result()
+
+            # Swap first so traffic gets the new model even if saving fails
+            self._update(job_id, stage='swapping', progress=0.8)
+            self.forecaster.swap_model(model, scaler)
+
+            self._update(job_id, stage='saving', progress=0.9)
+            self.forecaster.save_model()
+
+            self._update(job_id, status='completed', stage='completed', progress=1.0,
+                         finished_at=datetime.now().isoformat(),
+                         result={
+                             'mae': metrics['mae'],
+                             'r2_score': metrics['r2_score'],
+                             'model_version': self.forecaster.model_version,
+                             'training_days': days
+                         })
+            with self._lock:
+                self._failures = 0
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # A crashed worker poisons the pool; start a fresh one next time
+                with self._lock:
+                    self._executor = None
+            print(f"Error in training job {job_id}: {e}")
+            self._update(job_id, status='failed', finished_at=datetime.now().isoformat(), error=str(e))
+            with self._lock:
+                self._failures += 1
+                self._last_failure = time.monotonic()
+                self._last_failed_job_id = job_id
+        finally:
+            with self._lock:
+                self._active_job_id = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawn, not fork: forking this multi-threaded server could copy a lock
+                # held by another thread (ingestion, fetch pool) into the worker
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _trim_history(self):
+        """Forget the oldest finished jobs beyond TRAINING_JOB_HISTORY"""
+        while len(self._jobs) > Config.TRAINING_JOB_HISTORY:
+            oldest_id = next(iter(self._jobs))
+            if oldest_id == self._active_job_id:
+                break
+            self._jobs.popitem(last=False)
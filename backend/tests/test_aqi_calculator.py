@@ -0,0 +1,82 @@
+"""
+Vectorized AQI scoring must give the same results as the scalar path,
+including at exact breakpoints, between bands, beyond the scale and for
+missing values.
+
+Usage: python -m pytest tests (from the backend directory)
+"""
+
+import itertools
+import math
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.aqi_calculator import AQICalculator
+
+
+def boundary_values(pollutant):
+    """Every breakpoint, midpoints, values between bands and beyond the scale"""
+    values = {0.0}
+    for bp_low, bp_high, _, _ in AQICalculator.AQI_BREAKPOINTS[pollutant]:
+        values.update((bp_low, bp_high, (bp_low + bp_high) / 2, bp_high + 0.05, bp_high + 0.5))
+    top = AQICalculator.AQI_BREAKPOINTS[pollutant][-1][1]
+    values.update((top * 2, 1e9))
+    return sorted(values)
+
+
+class BatchAQITest(unittest.TestCase):
+
+    def test_individual_aqi_matches_scalar(self):
+        for pollutant in AQICalculator.AQI_BREAKPOINTS:
+            values = boundary_values(pollutant)
+            batch = AQICalculator.calculate_batch_individual_aqi(values, pollutant)
+            for value, aqi in zip(values, batch):
+                with self.subTest(pollutant=pollutant, value=value):
+                    self.assertEqual(aqi, AQICalculator.calculate_individual_aqi(value, pollutant))
+
+    def test_missing_and_negative_concentrations_are_nan(self):
+        batch = AQICalculator.calculate_batch_individual_aqi([np.nan, None, -1.0, 10.0], 'pm25')
+        self.assertTrue(np.isnan(batch[:3]).all())
+        self.assertEqual(batch[3], AQICalculator.calculate_individual_aqi(10.0, 'pm25'))
+
+    def test_unknown_pollutant(self):
+        self.assertIsNone(AQICalculator.calculate_batch_individual_aqi([1.0], 'nh3'))
+        with self.assertRaises(ValueError):
+            AQICalculator.calculate_batch_aqi({'nh3': [1.0]})
+
+    def test_composite_and_category_match_scalar(self):
+        pollutants = ('pm25', 'no2', 'co')
+        choices = {
+            pollutant: boundary_values(pollutant)[::3] + [np.nan, -5.0]
+            for pollutant in pollutants
+        }
+        rows = list(itertools.product(*(choices[p] for p in pollutants)))
+        data = {pollutant: np.array([row[i] for row in rows]) for i, pollutant in enumerate(pollutants)}
+        batch = AQICalculator.calculate_batch_aqi(data)
+
+        for index, row in enumerate(rows):
+            readings = {p: (None if math.isnan(v) else v) for p, v in zip(pollutants, row)}
+            expected = AQICalculator.calculate_composite_aqi(readings)
+            aqi = batch['aqi'][index]
+            code = int(batch['category_code'][index])
+            dominant = batch['dominant_pollutant'][index]
+            with self.subTest(readings=readings):
+                if expected is None:
+                    self.assertTrue(np.isnan(aqi))
+                    self.assertEqual(code, -1)
+                    self.assertIsNone(dominant)
+                    continue
+                self.assertEqual(aqi, expected)
+                self.assertEqual(AQICalculator.AQI_CATEGORY_NAMES[code],
+                                 AQICalculator.get_aqi_category(expected)['category'])
+                self.assertEqual(batch['sub_indices'][dominant][index], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
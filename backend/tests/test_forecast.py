@@ -0,0 +1,233 @@
+"""
+Forecast serving: batched predictions must match the per-location path, and
+every branch of the per-location forecast memo must agree with a full
+recompute.
+
+Usage: python -m pytest tests (from the backend directory)
+"""
+
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.weather import ForecastColumns
+from models.forecast import AirQualityForecaster
+
+
+class FrozenClock(datetime):
+    """datetime stand-in whose now() returns a settable time"""
+
+    current = datetime(2025, 11, 14, 9, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+def random_locations(rng, count):
+    """(current_data, weather_data, weather_forecast) inputs drawn from rng"""
+    today = np.datetime64(FrozenClock.current.date())
+    locations = []
+    for index in range(count):
+        current = {
+            'pm25': float(rng.uniform(5, 200)),
+            'pm10': float(rng.uniform(10, 300)),
+            'no2': float(rng.uniform(5, 120)),
+            'o3': float(rng.uniform(10, 200))
+        }
+        weather = {
+            'temperature': float(rng.uniform(-5, 40)),
+            'humidity': float(rng.uniform(20, 100)),
+            'wind_speed': float(rng.uniform(0, 30))
+        }
+        if index % 2:
+            days = 3
+            columns = {
+                'temp_max': rng.uniform(15, 40, days),
+                'temp_min': rng.uniform(-5, 15, days),
+                'humidity': rng.uniform(20, 100, days),
+                'wind_speed': rng.uniform(0, 30, days)
+            }
+            columns['humidity'][-1] = np.nan
+            locations.append((current, weather, ForecastColumns(today + np.arange(days), columns)))
+        else:
+            locations.append((current, weather))
+    return locations
+
+
+class BatchForecastTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model, cls.scaler, _ = AirQualityForecaster().fit_new_model(days=3, n_jobs=1)
+
+    def setUp(self):
+        self.forecaster = AirQualityForecaster()
+        # Never start a real training run from a forecast request
+        patcher = mock.patch.object(self.forecaster, 'start_background_training')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        clock = mock.patch('models.forecast.datetime', FrozenClock)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.rng = np.random.default_rng(20251114)
+
+    def assert_batch_matches_single(self):
+        locations = random_locations(self.rng, 8)
+        keys = [f'location-{index}' for index in range(len(locations))]
+
+        batched = self.forecaster.predict_batch_forecast(locations, keys=keys)
+
+        self.assertEqual(len(batched), len(locations))
+        for key, location, forecast in zip(keys, locations, batched):
+            with self.subTest(location=key):
+                single = self.forecaster.predict_batch_forecast([location], keys=[key])[0]
+                self.assertEqual(forecast, single)
+                memoized = self.forecaster.predict_24h_forecast(*location, location=key)
+                self.assertEqual(forecast, memoized)
+
+        # Without keys, noise is seeded by list position
+        self.assertEqual(
+            self.forecaster.predict_batch_forecast(locations)[0],
+            self.forecaster.predict_24h_forecast(*locations[0])
+        )
+
+    def test_batch_matches_single_location_with_model(self):
+        self.forecaster.swap_model(self.model, self.scaler)
+        self.assert_batch_matches_single()
+
+    def test_batch_matches_single_location_without_model(self):
+        self.assert_batch_matches_single()
+
+    def test_later_day_horizons_use_weather_forecast(self):
+        self.forecaster.swap_model(self.model, self.scaler)
+        current, weather, weather_forecast = random_locations(self.rng, 2)[1]
+        with_forecast, without_forecast = self.forecaster.predict_batch_forecast(
+            [(current, weather, weather_forecast), (current, weather)], keys=['a', 'a']
+        )
+
+        today = FrozenClock.current.date()
+        for forecast, baseline in zip(with_forecast, without_forecast):
+            if datetime.fromisoformat(forecast['datetime']).date() == today:
+                self.assertEqual(forecast, baseline)
+        self.assertEqual(with_forecast[-1]['datetime'], (FrozenClock.current + timedelta(hours=24)).isoformat())
+
+
+class MemoizedForecastTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model, cls.scaler, _ = AirQualityForecaster().fit_new_model(days=3, n_jobs=1)
+
+    def setUp(self):
+        clock = mock.patch('models.forecast.datetime', FrozenClock)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.addCleanup(setattr, FrozenClock, 'current', FrozenClock.current)
+        self.forecaster = self.make_forecaster()
+        self.current, self.weather, self.weather_forecast = random_locations(np.random.default_rng(7), 2)[1]
+        self.first = self.forecast()
+
+    def make_forecaster(self):
+        forecaster = AirQualityForecaster()
+        forecaster.swap_model(self.model, self.scaler)
+        return forecaster
+
+    def advance(self, **delta):
+        FrozenClock.current = FrozenClock.current + timedelta(**delta)
+
+    def forecast(self, forecaster=None, weather_forecast=None):
+        return (forecaster or self.forecaster).predict_24h_forecast(
+            self.current, self.weather, weather_forecast or self.weather_forecast, location='panaji'
+        )
+
+    def recomputed(self, weather_forecast=None):
+        """The same forecast from a forecaster with an empty memo"""
+        return self.forecast(self.make_forecaster(), weather_forecast)
+
+    def stats_since_first(self):
+        stats = self.forecaster.get_memo_stats()
+        stats['rows_predicted'] -= len(AirQualityForecaster.FORECAST_HOURS)
+        return stats
+
+    def test_first_forecast_is_full(self):
+        stats = self.forecaster.get_memo_stats()
+        self.assertEqual((stats['full'], stats['rows_predicted'], stats['entries']), (1, 24, 1))
+        self.assertEqual(self.first[0]['datetime'], (FrozenClock.current + timedelta(hours=1)).isoformat())
+
+    def test_same_inputs_same_hour_is_a_hit(self):
+        self.advance(minutes=40)
+        self.assertEqual(self.forecast(), self.first)
+
+        stats = self.stats_since_first()
+        self.assertEqual((stats['hits'], stats['rows_predicted']), (1, 0))
+
+    def test_same_inputs_later_hour_rolls_over(self):
+        self.advance(hours=2, minutes=15)
+        forecast = self.forecast()
+
+        stats = self.stats_since_first()
+        self.assertEqual((stats['rollovers'], stats['full'], stats['rows_predicted']), (1, 1, 2))
+        self.assertEqual(forecast[0]['datetime'], (FrozenClock.current.replace(minute=0) + timedelta(hours=1)).isoformat())
+
+        # Hours still in the horizon keep their forecast; only the last two are new
+        values = ('datetime', 'pm25', 'pm10', 'no2', 'o3')
+        for carried, previous in zip(forecast[:-2], self.first[2:]):
+            self.assertEqual([carried[name] for name in values], [previous[name] for name in values])
+        self.assertEqual(forecast[-2:], self.recomputed()[-2:])
+
+    def test_changed_inputs_same_hour_is_incremental(self):
+        changed = ForecastColumns(self.weather_forecast.dates, {
+            name: values.copy() for name, values in self.weather_forecast.columns.items()
+        })
+        changed.columns['temp_max'][1] += 5
+
+        self.advance(minutes=20)
+        forecast = self.forecast(weather_forecast=changed)
+
+        tomorrow = FrozenClock.current.date() + timedelta(days=1)
+        tomorrow_rows = sum(datetime.fromisoformat(row['datetime']).date() == tomorrow for row in forecast)
+        stats = self.stats_since_first()
+        self.assertEqual((stats['incremental'], stats['rows_predicted']), (1, tomorrow_rows))
+        self.assertEqual(forecast, self.recomputed(changed))
+
+    def test_changed_inputs_after_rollover_match_full_recompute(self):
+        self.advance(hours=3)
+        self.forecast()
+        self.current = dict(self.current, pm25=self.current['pm25'] + 40)
+        forecast = self.forecast()
+
+        stats = self.stats_since_first()
+        self.assertEqual((stats['rollovers'], stats['incremental']), (1, 1))
+        self.assertEqual(forecast, self.recomputed())
+
+    def test_full_recompute(self):
+        cases = {
+            'new model version': lambda: self.forecaster.swap_model(self.model, self.scaler),
+            'inputs and hour changed': lambda: (
+                self.advance(hours=1),
+                setattr(self, 'current', dict(self.current, no2=self.current['no2'] + 10))
+            ),
+            'horizon fully elapsed': lambda: self.advance(hours=24)
+        }
+        for name, change in cases.items():
+            with self.subTest(name):
+                change()
+                before = self.forecaster.get_memo_stats()
+                forecast = self.forecast()
+                after = self.forecaster.get_memo_stats()
+                self.assertEqual(after['full'] - before['full'], 1)
+                self.assertEqual(after['rows_predicted'] - before['rows_predicted'], 24)
+                if name != 'new model version':
+                    self.assertEqual(forecast, self.recomputed())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+OpenAQ backfill resume: a run interrupted mid-chunk must resume without
+writing any page twice or losing one.
+
+Usage: python -m pytest tests (from the backend directory)
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.openaq_backfill import OpenAQBackfill, load_backfill, read_chunk_pages
+
+PAGE_LIMIT = 10
+FULL_PAGES = 5
+LAST_PAGE_ROWS = 3
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class Crash(BaseException):
+    """Stands in for the process dying; not caught by the per-unit error handling"""
+
+
+class FakeOpenAQ:
+    """
+    /measurements stand-in: every station has FULL_PAGES full pages and a short
+    last page, and every row has a timestamp unique to its (station, page, row)
+    """
+
+    def __init__(self, fail_at=None, error=None):
+        self.requests = []
+        self.fail_at = fail_at
+        self.error = error
+        self.dead = False
+
+    def get_measurements_page(self, station_id, date_from, date_to, page, limit):
+        if self.dead:
+            # A crashed process makes no further requests
+            raise self.error
+        self.requests.append((station_id, page))
+        if (station_id, page) == self.fail_at:
+            self.fail_at = None
+            self.dead = isinstance(self.error, Crash)
+            raise self.error or RuntimeError('503 Service Unavailable')
+        if page > FULL_PAGES + 1:
+            return []
+        count = limit if page <= FULL_PAGES else LAST_PAGE_ROWS
+        return [
+            {
+                'locationId': station_id,
+                'parameter': 'pm25',
+                'value': float(index),
+                'unit': 'µg/m³',
+                'date': {'utc': row_time(station_id, page, index).isoformat()},
+                'coordinates': {'latitude': 15.5, 'longitude': 73.8}
+            }
+            for index in range(count)
+        ]
+
+    @staticmethod
+    def _convert_units(value, unit, parameter):
+        return value
+
+
+def row_time(station_id, page, index):
+    return START + timedelta(hours=station_id * 1000 + page * PAGE_LIMIT + index)
+
+
+def expected_timestamps(station_ids):
+    return Counter(
+        int(row_time(station_id, page, index).timestamp())
+        for station_id in station_ids
+        for page in range(1, FULL_PAGES + 2)
+        for index in range(PAGE_LIMIT if page <= FULL_PAGES else LAST_PAGE_ROWS)
+    )
+
+
+class BackfillResumeTest(unittest.TestCase):
+
+    station_ids = (1, 2)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def make_backfill(self, api):
+        backfill = OpenAQBackfill(
+            api, self.directory, workers=1, rate_per_minute=600000,
+            page_limit=PAGE_LIMIT, window_days=30, chunk_rows=25
+        )
+        units = backfill.build_units(self.station_ids, START, START + timedelta(days=30))
+        return backfill, units
+
+    def assert_complete_once(self, backfill, units):
+        written = Counter(load_backfill(self.directory)['ts'].tolist())
+        duplicated = {ts: count for ts, count in written.items() if count > 1}
+        self.assertEqual(duplicated, {})
+        self.assertEqual(written, expected_timestamps(self.station_ids))
+        self.assertEqual(set(backfill._checkpoint['done']), {backfill._unit_key(unit) for unit in units})
+        self.assertEqual(backfill._checkpoint['next_page'], {})
+
+    def crash(self, backfill, units):
+        """Run until Crash; a dying process never flushes its buffer"""
+        with mock.patch.object(backfill.writer, 'flush'), self.assertRaises(Crash):
+            backfill.run(units)
+        return {(key, page) for key, page, _ in read_chunk_pages(self.directory)}
+
+    def assert_resumes(self, units, on_disk):
+        second_api = FakeOpenAQ()
+        resumed, units = self.make_backfill(second_api)
+        stats = resumed.run(units)
+
+        self.assertEqual(stats['errors'], 0)
+        self.assertEqual(stats['units_done'], len(units))
+        # Pages already in a chunk are not fetched again; every other page is
+        keys = {unit[0]: resumed._unit_key(unit) for unit in units}
+        refetched = {(keys[station_id], page) for station_id, page in second_api.requests}
+        self.assertEqual(refetched & on_disk, set())
+        self.assertEqual(len(refetched | on_disk), len(units) * (FULL_PAGES + 1))
+        self.assert_complete_once(resumed, units)
+
+    def test_resume_after_crash_mid_chunk(self):
+        first_api = FakeOpenAQ(fail_at=(1, 5), error=Crash())
+        backfill, units = self.make_backfill(first_api)
+
+        # Pages 1-3 fill the first chunk; page 4 is still buffered when the process dies
+        on_disk = self.crash(backfill, units)
+        unit_key = backfill._unit_key(units[0])
+        self.assertEqual({page for key, page in on_disk if key == unit_key}, {1, 2, 3})
+        self.assertEqual(backfill._checkpoint['next_page'][unit_key], 4)
+        self.assertIn((1, 4), first_api.requests)
+
+        self.assert_resumes(units, on_disk)
+
+    def test_resume_after_crash_before_checkpoint(self):
+        backfill, units = self.make_backfill(FakeOpenAQ())
+
+        # Die right after a chunk is renamed into place, before checkpoint.json records its pages
+        backfill.writer.on_flush = mock.Mock(side_effect=Crash)
+        on_disk = self.crash(backfill, units)
+        self.assertFalse(os.path.exists(backfill.checkpoint_path))
+        self.assertTrue(on_disk)
+
+        self.assert_resumes(units, on_disk)
+
+    def test_resume_after_failed_page(self):
+        first_api = FakeOpenAQ(fail_at=(1, 4))
+        backfill, units = self.make_backfill(first_api)
+        stats = backfill.run(units)
+
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['units_done'], 1)
+        self.assertEqual(backfill._checkpoint['next_page'], {backfill._unit_key(units[0]): 4})
+
+        second_api = FakeOpenAQ()
+        resumed, units = self.make_backfill(second_api)
+        stats = resumed.run(units)
+
+        self.assertEqual(second_api.requests, [(1, page) for page in range(4, FULL_PAGES + 2)])
+        self.assertEqual(stats['units_done'], len(units))
+        self.assert_complete_once(resumed, units)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Background training retries: a failed job must not be resubmitted by the
+next forecast request while its retry backoff lasts.
+
+Usage: python -m pytest tests (from the backend directory)
+"""
+
+import os
+import sys
+import time
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from models.forecast import AirQualityForecaster
+
+
+class FailingExecutor:
+    """Executor stand-in whose training always fails"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def submit(self, fn, *args):
+        self.calls += 1
+        future = Future()
+        future.set_exception(RuntimeError('training failed'))
+        return future
+
+
+class TrainingBackoffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.forecaster = AirQualityForecaster()
+        self.executor = FailingExecutor()
+        patcher = mock.patch.object(self.forecaster.training_jobs, '_get_executor', return_value=self.executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def forecast(self):
+        return self.forecaster.predict_24h_forecast({'pm25': 40}, {'temperature': 28}, location='test')
+
+    def wait_for_failure(self, job_id, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = self.forecaster.get_training_job(job_id)
+            if job['status'] == 'failed' and self.forecaster.training_jobs.retry_in() > 0:
+                return job
+            time.sleep(0.01)
+        self.fail(f"training job {job_id} did not fail within {timeout}s")
+
+    def test_failed_job_is_not_resubmitted_by_next_request(self):
+        self.assertEqual(len(self.forecast()), 24)
+        [job] = self.forecaster.training_jobs.list_jobs()
+        self.wait_for_failure(job['job_id'])
+
+        self.forecast()
+        jobs = self.forecaster.training_jobs.list_jobs()
+        self.assertEqual([j['job_id'] for j in jobs], [job['job_id']])
+        self.assertEqual(self.executor.calls, 1)
+
+    def test_retry_after_backoff_expires(self):
+        with mock.patch.object(Config, 'TRAINING_RETRY_INTERVAL', 0.05):
+            self.forecast()
+            [job] = self.forecaster.training_jobs.list_jobs()
+            self.wait_for_failure(job['job_id'])
+            time.sleep(0.1)
+
+            self.forecast()
+            self.assertEqual(len(self.forecaster.training_jobs.list_jobs()), 2)
+
+    def test_backoff_doubles_per_consecutive_failure(self):
+        manager = self.forecaster.training_jobs
+        for failures in (1, 2, 3):
+            job, created = manager.submit()
+            self.assertTrue(created)
+            self.wait_for_failure(job['job_id'])
+            expected = Config.TRAINING_RETRY_INTERVAL * 2 ** (failures - 1)
+            self.assertAlmostEqual(manager.retry_in(), expected, delta=1)
+
+    def test_explicit_submission_ignores_backoff(self):
+        self.forecast()
+        [job] = self.forecaster.training_jobs.list_jobs()
+        self.wait_for_failure(job['job_id'])
+
+        _, created = self.forecaster.submit_training()
+        self.assertTrue(created)
+
+
+if __name__ == '__main__':
+    unittest.main()
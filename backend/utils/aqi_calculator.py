@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 
 class AQICalculator:
@@ -58,6 +57,15 @@ class AQICalculator:
         ]
     }
     
+    # Category names indexed by the category codes of calculate_batch_aqi
+    AQI_CATEGORY_NAMES = ('Good', 'Satisfactory', 'Moderate', 'Poor', 'Very Poor', 'Severe', 'Hazardous')
+    
+    # Upper AQI bound of each category in AQI_CATEGORY_NAMES (Hazardous is open-ended)
+    AQI_CATEGORY_UPPER_BOUNDS = np.array([50, 100, 200, 300, 400, 500], dtype=float)
+    
+    # Breakpoint arrays per pollutant, built on first use by _get_breakpoint_arrays
+    _breakpoint_arrays = None
+    
     @staticmethod
     def calculate_individual_aqi(concentration, pollutant):
         """Calculate AQI for individual pollutant"""
@@ -92,6 +100,86 @@ class AQICalculator:
         # Composite AQI is the maximum of all individual AQIs
         return max(aqi_values)
     
+    @staticmethod
+    def _get_breakpoint_arrays():
+        """Precompute (bp_low, bp_high, slope, aqi_low) arrays for every pollutant"""
+        if AQICalculator._breakpoint_arrays is None:
+            arrays = {}
+            for pollutant, breakpoints in AQICalculator.AQI_BREAKPOINTS.items():
+                table = np.array(breakpoints, dtype=float)
+                bp_low, bp_high, aqi_low, aqi_high = table.T
+                # Same operation order as calculate_individual_aqi so results match exactly
+                slope = (aqi_high - aqi_low) / (bp_high - bp_low)
+                arrays[pollutant] = (bp_low, bp_high, slope, aqi_low)
+            AQICalculator._breakpoint_arrays = arrays
+        return AQICalculator._breakpoint_arrays
+    
+    @staticmethod
+    def calculate_batch_individual_aqi(concentrations, pollutant):
+        """
+        Vectorized calculate_individual_aqi for an array of concentrations.
+        Missing (NaN/None) and negative concentrations give NaN.
+        """
+        arrays = AQICalculator._get_breakpoint_arrays().get(pollutant.lower())
+        if arrays is None:
+            return None
+        bp_low, bp_high, slope, aqi_low = arrays
+        
+        values = np.asarray(concentrations, dtype=float)
+        # Index of the last band starting at or below each concentration
+        band = np.searchsorted(bp_low, values, side='right') - 1
+        band = np.clip(band, 0, len(bp_low) - 1)
+        in_band = (values >= bp_low[band]) & (values <= bp_high[band])
+        
+        aqi = np.rint(slope[band] * (values - bp_low[band]) + aqi_low[band])
+        # Concentrations between or beyond the bands score the maximum AQI
+        aqi = np.where(in_band, aqi, 500.0)
+        aqi[np.isnan(values) | (values < 0)] = np.nan
+        return aqi
+    
+    @staticmethod
+    def calculate_batch_aqi(pollutant_data):
+        """
+        Score many readings in one vectorized pass.
+        
+        pollutant_data maps pollutant names to equal-length arrays (a dict of
+        arrays/lists or a DataFrame). Unknown columns are ignored. Returns a dict
+        with per-pollutant 'sub_indices', the composite 'aqi' (NaN when no
+        pollutant is available), the 'dominant_pollutant' (None when missing) and
+        the 'category_code' indexing AQI_CATEGORY_NAMES (-1 when missing).
+        """
+        sub_indices = {}
+        for pollutant in pollutant_data.keys():
+            aqi = AQICalculator.calculate_batch_individual_aqi(pollutant_data[pollutant], pollutant)
+            if aqi is not None:
+                sub_indices[pollutant] = aqi
+        
+        if not sub_indices:
+            raise ValueError('No supported pollutants in batch data')
+        
+        pollutants = list(sub_indices.keys())
+        stacked = np.column_stack([sub_indices[p] for p in pollutants])
+        missing = np.isnan(stacked)
+        filled = np.where(missing, -1.0, stacked)
+        
+        dominant_index = filled.argmax(axis=1)
+        composite = filled[np.arange(len(filled)), dominant_index]
+        has_value = ~missing.all(axis=1)
+        composite = np.where(has_value, composite, np.nan)
+        
+        dominant = np.array(pollutants, dtype=object)[dominant_index]
+        dominant[~has_value] = None
+        
+        category_code = np.searchsorted(AQICalculator.AQI_CATEGORY_UPPER_BOUNDS, composite, side='left')
+        category_code = np.where(has_value, category_code, -1).astype(np.int8)
+        
+        return {
+            'sub_indices': sub_indices,
+            'aqi': composite,
+            'dominant_pollutant': dominant,
+            'category_code': category_code
+        }
+    
     @staticmethod
     def get_aqi_category(aqi_value):
         """Get AQI category and health implications"""
@@ -0,0 +1,75 @@
+import threading
+
+
+class _Batch:
+    """Items collected during one batching window and their shared results"""
+
+    def __init__(self):
+        self.items = []
+        self.positions = {}
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item calls into one batched call.
+
+    The first caller opens a batch and waits up to `window` seconds (or until
+    `max_size` distinct items have joined), then runs fetch_batch(items) once
+    for everyone. fetch_batch must return one result per item, in order.
+    """
+
+    def __init__(self, fetch_batch, window, max_size):
+        self.fetch_batch = fetch_batch
+        self.window = window
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._open = None
+        self._stats = {'calls': 0, 'batches': 0, 'items': 0}
+
+    def submit(self, item):
+        """Get the result for one hashable item, batched with concurrent callers"""
+        with self._lock:
+            self._stats['calls'] += 1
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+
+            position = batch.positions.get(item)
+            if position is None:
+                position = batch.positions[item] = len(batch.items)
+                batch.items.append(item)
+
+            if len(batch.items) >= self.max_size:
+                # Close the batch so later callers start a new one
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+                self._stats['batches'] += 1
+                self._stats['items'] += len(batch.items)
+            try:
+                batch.results = self.fetch_batch(batch.items)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[position]
+
+    def get_stats(self):
+        """Calls received vs. batches actually sent"""
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Call:
+    """A single in-flight call shared by every caller waiting on the same key"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls so that only one call per key runs at a time
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Run fn() for key, or wait for the call already in flight for key.
+        Returns a (result, shared) tuple where shared is True for waiters.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+        return call.result, False
+
+    def in_flight(self, key):
+        """Check whether a call for key is currently running"""
+        with self._lock:
+            return key in self._calls
+
+
+class SnapshotCache:
+    """
+    Process-wide TTL cache for upstream snapshots with stale-while-revalidate
+    and single-flight fetching. At most max_entries keys (and per-key
+    counters) are kept, least recently used first out; entries past their
+    stale window are dropped when read and swept when new ones are stored.
+    """
+
+    def __init__(self, stale_seconds=0, max_entries=None):
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, stored_at, ttl), least recently used first
+        self._counters = OrderedDict()
+        self._retired = {}  # counters of keys no longer tracked, kept for the totals
+        self._flight = SingleFlight()
+
+    def get_or_fetch(self, key, fetch, ttl, cacheable=None):
+        """
+        Return the cached value for key, calling fetch() on a miss.
+
+        Fresh entries (younger than ttl) are served directly. Entries inside the
+        stale window are served immediately while a background refresh runs.
+        Concurrent misses for the same key share a single fetch() call.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[1] < ttl + self.stale_seconds:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+
+        if entry is not None:
+            value, stored_at, _ = entry
+            age = now - stored_at
+            if age < ttl:
+                self._count(key, 'hits')
+                return value
+            self._count(key, 'stale_hits')
+            self._revalidate(key, fetch, ttl, cacheable)
+            return value
+
+        self._count(key, 'misses')
+        value, shared = self._flight.do(key, lambda: self._fetch_and_store(key, fetch, ttl, cacheable))
+        if shared:
+            self._count(key, 'coalesced')
+        return value
+
+    def is_fresh(self, key, ttl):
+        """Check whether key holds a value younger than ttl (one get_or_fetch would hit)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and time.monotonic() - entry[1] < ttl
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value fetched outside of get_or_fetch. Without a ttl it is
+        only ever evicted as least recently used.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now, ttl)
+            self._entries.move_to_end(key)
+            # Sweep expired entries from the least recently used end
+            expired = []
+            for old_key, (_, stored_at, old_ttl) in self._entries.items():
+                if old_key == key or old_ttl is None or now - stored_at < old_ttl + self.stale_seconds:
+                    break
+                expired.append(old_key)
+            for old_key in expired:
+                del self._entries[old_key]
+                self._bump('evictions')
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._bump('evictions')
+
+    def invalidate(self, key=None):
+        """Drop one key, or every key when none is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_stats(self):
+        """Hit/miss counters and current entry age per key"""
+        now = time.monotonic()
+        with self._lock:
+            keys = set(self._counters) | set(self._entries)
+            entries = len(self._entries)
+            retired = dict(self._retired)
+            per_key = {}
+            for key in sorted(keys):
+                stats = dict(self._counters.get(key, {}))
+                entry = self._entries.get(key)
+                stats['age_seconds'] = round(now - entry[1], 3) if entry else None
+                per_key[key] = stats
+
+        totals = retired
+        for stats in per_key.values():
+            for name, count in stats.items():
+                if name != 'age_seconds':
+                    totals[name] = totals.get(name, 0) + count
+
+        lookups = totals.get('hits', 0) + totals.get('stale_hits', 0) + totals.get('misses', 0)
+        served = lookups - totals.get('misses', 0) + totals.get('coalesced', 0)
+        totals['hit_ratio'] = round(served / lookups, 3) if lookups else None
+
+        return {
+            'stale_seconds': self.stale_seconds,
+            'max_entries': self.max_entries,
+            'entries': entries,
+            'totals': totals,
+            'keys': per_key
+        }
+
+    def _fetch_and_store(self, key, fetch, ttl, cacheable):
+        try:
+            value = fetch()
+        except Exception:
+            self._count(key, 'errors')
+            raise
+
+        self._count(key, 'fetches')
+        if cacheable is None or cacheable(value):
+            self.set(key, value, ttl)
+        return value
+
+    def _revalidate(self, key, fetch, ttl, cacheable):
+        """Refresh key in the background unless a fetch is already running"""
+        if self._flight.in_flight(key):
+            return
+
+        def refresh():
+            try:
+                self._flight.do(key, lambda: self._fetch_and_store(key, fetch, ttl, cacheable))
+            except Exception as e:
+                print(f"Error refreshing cached {key}: {e}")
+
+        self._count(key, 'revalidations')
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _count(self, key, name):
+        with self._lock:
+            counters = self._counters.setdefault(key, {})
+            counters[name] = counters.get(name, 0) + 1
+            self._counters.move_to_end(key)
+            while self.max_entries is not None and len(self._counters) > self.max_entries:
+                _, old = self._counters.popitem(last=False)
+                for old_name, count in old.items():
+                    self._retired[old_name] = self._retired.get(old_name, 0) + count
+
+    def _bump(self, name):
+        """Count a cache-wide event; caller holds the lock"""
+        self._retired[name] = self._retired.get(name, 0) + 1
@@ -0,0 +1,83 @@
+import gzip
+import threading
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; responses are gzip-compressed only
+    brotli = None
+
+# Supported content codings, most preferred first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/html', 'text/plain', 'text/csv'}
+
+
+def compress(data, encoding, level=None):
+    """
+    Compress bytes with one of ENCODINGS. level is the gzip level (1-9) or
+    brotli quality (0-11); the defaults favour speed for dynamic responses.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=4 if level is None else level)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def negotiate(request, encodings=ENCODINGS):
+    """Pick the best content coding the client accepts, or None for identity"""
+    return request.accept_encodings.best_match(encodings)
+
+
+class ResponseCompressor:
+    """
+    after_request hook compressing responses of at least `min_size` bytes
+    with the client's preferred encoding. Streamed responses, responses that
+    already carry a Content-Encoding and non-text mimetypes are left alone.
+    """
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.min_size = min_size
+        self.levels = {'gzip': gzip_level, 'br': brotli_quality}
+        self._lock = threading.Lock()
+        self._stats = {'compressed': 0, 'skipped': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def init_app(self, app):
+        app.after_request(self.after_request)
+
+    def after_request(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request)
+        body = response.get_data()
+        if encoding is None or len(body) < self.min_size:
+            with self._lock:
+                self._stats['skipped'] += 1
+            return response
+
+        compressed = compress(body, encoding, self.levels[encoding])
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            # The compressed representation differs byte-for-byte from the identity one
+            response.set_etag(f"{etag}-{encoding}", weak)
+
+        with self._lock:
+            self._stats['compressed'] += 1
+            self._stats['bytes_in'] += len(body)
+            self._stats['bytes_out'] += len(compressed)
+        return response
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 3) if stats['bytes_in'] else None
+        stats['encodings'] = list(ENCODINGS)
+        return stats
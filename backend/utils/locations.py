@@ -0,0 +1,281 @@
+import json
+import os
+import threading
+import numpy as np
+from config import Config, warn_once
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Locations served out of the box (previously hard-coded in /api/locations)
+DEFAULT_LOCATIONS = [
+    {'name': 'Panaji', 'lat': 15.4909, 'lon': 73.8278, 'type': 'capital'},
+    {'name': 'Margao', 'lat': 15.2993, 'lon': 74.1240, 'type': 'city'},
+    {'name': 'Mapusa', 'lat': 15.5959, 'lon': 73.8137, 'type': 'town'},
+    {'name': 'Vasco da Gama', 'lat': 15.3947, 'lon': 73.8081, 'type': 'port'},
+    {'name': 'Ponda', 'lat': 15.4019, 'lon': 74.0070, 'type': 'town'}
+]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; accepts scalars or NumPy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def location_key(name):
+    """Normalize a location name for lookups"""
+    return ' '.join(name.strip().lower().replace('-', ' ').replace('_', ' ').split())
+
+
+def weather_cell(lat, lon):
+    """Snap coordinates to the centre of their weather model grid cell"""
+    step = Config.WEATHER_GRID_DEGREES
+    cell_lat = round(round(lat / step) * step, 4)
+    cell_lon = round(round(lon / step) * step, 4)
+    return {
+        'latitude': cell_lat,
+        'longitude': cell_lon,
+        'key': f"{cell_lat:.4f},{cell_lon:.4f}"
+    }
+
+
+class SpatialIndex:
+    """
+    Nearest-neighbour index over lat/lon points: a haversine BallTree, or a
+    vectorized linear scan when scikit-learn is not installed
+    """
+
+    def __init__(self, points):
+        self.size = len(points)
+        self._tree = None
+        self._points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if self.size:
+            try:
+                # Deferred so that importing this module stays cheap
+                from sklearn.neighbors import BallTree
+            except ImportError:
+                warn_once("⚠️  scikit-learn not installed; location lookups use a linear scan")
+            else:
+                self._tree = BallTree(np.radians(self._points), metric='haversine')
+
+    def nearest(self, lat, lon, k=1, max_distance_km=None):
+        """Get up to k (index, distance_km) pairs, closest first"""
+        if not self.size:
+            return []
+
+        k = min(k, self.size)
+        if self._tree is not None:
+            distances, indices = self._tree.query(np.radians([[lat, lon]]), k=k)
+            distances_km, indices = distances[0] * EARTH_RADIUS_KM, indices[0]
+        else:
+            all_km = haversine_km(lat, lon, self._points[:, 0], self._points[:, 1])
+            indices = np.argsort(all_km, kind='stable')[:k]
+            distances_km = all_km[indices]
+
+        matches = []
+        for distance_km, index in zip(distances_km, indices):
+            distance_km = float(distance_km)
+            if max_distance_km is not None and distance_km > max_distance_km:
+                break
+            matches.append((int(index), round(distance_km, 3)))
+        return matches
+
+
+class LocationRegistry:
+    """
+    Registry of served locations and OpenAQ stations with spatial lookups
+    """
+
+    def __init__(self, locations=None):
+        self._lock = threading.Lock()
+        self._locations = []
+        self._by_name = {}
+        self._stations = {}
+        self._location_index = None
+        self._station_index = None
+        self.version = 0
+
+        for location in (locations if locations is not None else DEFAULT_LOCATIONS):
+            self.add_location(location)
+
+    def add_location(self, location):
+        """Register (or replace) a location given as {'name', 'lat', 'lon', ...}"""
+        entry = dict(location)
+        entry['lat'] = float(entry['lat'])
+        entry['lon'] = float(entry['lon'])
+        key = location_key(entry['name'])
+
+        with self._lock:
+            existing = self._by_name.get(key)
+            if existing is not None:
+                self._locations[self._locations.index(existing)] = entry
+            else:
+                self._locations.append(entry)
+            self._by_name[key] = entry
+            self._location_index = None
+            self.version += 1
+
+    def load_file(self, path):
+        """Add locations from a JSON file containing a list of location objects"""
+        with open(path) as f:
+            locations = json.load(f)
+        for location in locations:
+            self.add_location(location)
+        return len(locations)
+
+    def load_stations_file(self, path):
+        """Add OpenAQ stations from a JSON file containing a list of station objects"""
+        with open(path) as f:
+            stations = json.load(f)
+        self.add_stations(stations)
+        return len(stations)
+
+    def add_stations(self, stations):
+        """Register OpenAQ stations given as {'id', 'name', 'lat', 'lon'} dicts"""
+        with self._lock:
+            for station in stations:
+                self._stations[station['id']] = {
+                    'id': station['id'],
+                    'name': station.get('name'),
+                    'lat': float(station['lat']),
+                    'lon': float(station['lon'])
+                }
+            self._station_index = None
+            self.version += 1
+
+    def add_openaq_stations(self, response):
+        """Register stations from an OpenAQ /locations response"""
+        stations = []
+        for result in (response or {}).get('results', []):
+            coordinates = result.get('coordinates') or {}
+            if result.get('id') is None or coordinates.get('latitude') is None:
+                continue
+            stations.append({
+                'id': result['id'],
+                'name': result.get('name'),
+                'lat': coordinates['latitude'],
+                'lon': coordinates['longitude']
+            })
+        self.add_stations(stations)
+        return len(stations)
+
+    def list_locations(self):
+        with self._lock:
+            return [dict(location) for location in self._locations]
+
+    def locations_in_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Get registered locations inside a lat/lon bounding box"""
+        with self._lock:
+            return [
+                dict(location) for location in self._locations
+                if min_lat <= location['lat'] <= max_lat and min_lon <= location['lon'] <= max_lon
+            ]
+
+    def get(self, name):
+        """Look up a registered location by name (case-insensitive)"""
+        with self._lock:
+            location = self._by_name.get(location_key(name))
+            return dict(location) if location else None
+
+    def nearest_location(self, lat, lon):
+        """Get the closest registered location and its distance in km"""
+        index, locations = self._get_location_index()
+        matches = index.nearest(lat, lon, k=1)
+        if not matches:
+            return None, None
+        position, distance_km = matches[0]
+        return dict(locations[position]), distance_km
+
+    def nearest_stations(self, lat, lon, k=None, max_distance_km=None):
+        """Get the closest OpenAQ stations with their distance in km"""
+        index, stations = self._get_station_index()
+        matches = index.nearest(
+            lat, lon,
+            k=k or Config.LOCATION_STATIONS_PER_LOCATION,
+            max_distance_km=max_distance_km or Config.LOCATION_STATION_RADIUS_KM
+        )
+        return [dict(stations[position], distance_km=distance_km) for position, distance_km in matches]
+
+    def resolve(self, name=None, lat=None, lon=None):
+        """
+        Resolve a location name or lat/lon to the location, its nearest OpenAQ
+        stations and its weather grid cell. Returns None for unknown names.
+        """
+        if name is not None:
+            location = self.get(name)
+            if location is None:
+                return None
+        else:
+            nearest, distance_km = self.nearest_location(lat, lon)
+            location = {
+                'name': f"{lat:.4f},{lon:.4f}",
+                'lat': float(lat),
+                'lon': float(lon),
+                'type': 'coordinates',
+                'nearest_location': nearest['name'] if nearest else None,
+                'nearest_location_km': distance_km
+            }
+
+        stations = self.nearest_stations(location['lat'], location['lon'])
+        cell = weather_cell(location['lat'], location['lon'])
+
+        # Locations that share a station (or grid cell) share one upstream OpenAQ query
+        if stations:
+            openaq_key = f"station:{stations[0]['id']}"
+            openaq_point = (stations[0]['lat'], stations[0]['lon'])
+        else:
+            openaq_key = f"cell:{cell['key']}"
+            openaq_point = (cell['latitude'], cell['longitude'])
+
+        location.update({
+            'key': location_key(location['name']),
+            'weather_cell': cell,
+            'stations': stations,
+            'openaq_key': openaq_key,
+            'openaq_point': openaq_point
+        })
+        return location
+
+    def _get_location_index(self):
+        with self._lock:
+            if self._location_index is None:
+                self._location_index = (
+                    SpatialIndex([(l['lat'], l['lon']) for l in self._locations]),
+                    list(self._locations)
+                )
+            return self._location_index
+
+    def _get_station_index(self):
+        with self._lock:
+            if self._station_index is None:
+                stations = list(self._stations.values())
+                self._station_index = (
+                    SpatialIndex([(s['lat'], s['lon']) for s in stations]),
+                    stations
+                )
+            return self._station_index
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_location_registry():
+    """
+    Get the process-wide location registry, seeded from DEFAULT_LOCATIONS and
+    extended from Config.LOCATIONS_FILE / Config.STATIONS_FILE when they exist
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            registry = LocationRegistry()
+            for path, load in ((Config.LOCATIONS_FILE, registry.load_file),
+                               (Config.STATIONS_FILE, registry.load_stations_file)):
+                if path and os.path.exists(path):
+                    try:
+                        load(path)
+                    except Exception as e:
+                        print(f"⚠️  Could not load {path}: {e}")
+            _registry = registry
+        return _registry
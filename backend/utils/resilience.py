@@ -0,0 +1,332 @@
+import threading
+import time
+from collections import deque
+from utils.cache import SingleFlight
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing upstream for a while.
+
+    closed: calls pass through. After `failure_threshold` consecutive failures
+    the breaker opens and calls are refused for `reset_timeout` seconds. Then
+    it goes half-open and lets a single probe call through: success closes it,
+    failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow_request(self):
+        """Check whether a call may go through now (claims the probe when half-open)"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def trip(self):
+        """Open the breaker now, regardless of the failure count"""
+        with self._lock:
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def get_stats(self):
+        with self._lock:
+            state = self._current_state()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'retry_in': (
+                    round(max(0.0, self._opened_at + self.reset_timeout - time.monotonic()), 1)
+                    if state == self.OPEN else None
+                )
+            }
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+
+class TokenBucket:
+    """
+    Non-blocking token-bucket rate limiter: `rate` tokens per second, bursts
+    of up to `capacity`
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available; never waits"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Take tokens, sleeping until the bucket has refilled enough"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    @property
+    def available(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.capacity, self._tokens + elapsed * self.rate)
+
+
+class FallbackController:
+    """
+    Guard a primary upstream with a circuit breaker and its fallback with
+    single-flight coalescing and a token bucket, counting where traffic went.
+
+    With track_primary=False the breaker belongs to a SourceHealth whose
+    TrackedSession already records every primary call (and claims half-open
+    probes); the controller then only skips calls while it is open.
+    """
+
+    def __init__(self, breaker, bucket, track_primary=True):
+        self.breaker = breaker
+        self.bucket = bucket
+        self.track_primary = track_primary
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._counters = {
+            'primary_calls': 0,
+            'primary_failures': 0,
+            'short_circuited': 0,
+            'fallback_calls': 0,
+            'fallback_coalesced': 0,
+            'fallback_rate_limited': 0,
+            'fallback_errors': 0
+        }
+
+    def call_primary(self, fetch, succeeded=None):
+        """
+        Call fetch() unless the breaker is open. Returns its result, or None
+        when the call was skipped or failed (succeeded(result) decides; by
+        default any non-None result is a success).
+        """
+        allowed = self.breaker.allow_request() if self.track_primary else self.breaker.state != CircuitBreaker.OPEN
+        if not allowed:
+            self._count('short_circuited')
+            return None
+
+        self._count('primary_calls')
+        try:
+            result = fetch()
+        except Exception:
+            result = None
+        if result is not None and (succeeded is None or succeeded(result)):
+            if self.track_primary:
+                self.breaker.record_success()
+            return result
+
+        self._count('primary_failures')
+        if self.track_primary:
+            self.breaker.record_failure()
+        return None
+
+    def call_fallback(self, key, fetch, default):
+        """
+        Call fetch() for key, sharing the call with concurrent callers for the
+        same key. Returns default() instead when the rate limit is exhausted or
+        the fallback raises.
+        """
+        def limited():
+            if not self.bucket.try_acquire():
+                self._count('fallback_rate_limited')
+                return None
+            self._count('fallback_calls')
+            return fetch()
+
+        try:
+            result, shared = self._flight.do(key, limited)
+        except Exception as e:
+            print(f"Fallback call failed: {e}")
+            self._count('fallback_errors')
+            return default()
+
+        if shared:
+            self._count('fallback_coalesced')
+        return result if result is not None else default()
+
+    def get_stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters['breaker'] = self.breaker.get_stats()
+        counters['tokens_available'] = round(self.bucket.available, 2)
+        return counters
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+
+class SourceHealth:
+    """
+    Rolling health of one upstream source, with a circuit breaker.
+
+    Every call's latency and outcome is kept for `window_seconds`. Calls slower
+    than `slow_call_seconds` count as failures, so a hanging upstream trips
+    the breaker like an erroring one. The breaker opens after
+    `consecutive_failures` failures in a row, or once at least `min_calls`
+    calls in the window fail at `failure_rate` or more.
+    """
+
+    def __init__(self, window_seconds=60, min_calls=5, failure_rate=0.5, slow_call_seconds=5,
+                 consecutive_failures=3, reset_timeout=30, max_samples=1000):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.breaker = CircuitBreaker(consecutive_failures, reset_timeout)
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=max_samples)  # (monotonic time, latency, failed, slow)
+        self._short_circuited = 0
+        self._last_error = None
+
+    def allow_request(self):
+        """Check the breaker; refused calls should go straight to their fallback"""
+        if self.breaker.allow_request():
+            return True
+        with self._lock:
+            self._short_circuited += 1
+        return False
+
+    def record(self, latency, ok, error=None):
+        """Record one finished call"""
+        slow = latency >= self.slow_call_seconds
+        failed = not ok or slow
+        recovering = self.breaker.state != CircuitBreaker.CLOSED
+
+        with self._lock:
+            if failed:
+                self._last_error = error or (f'slow call ({latency:.1f}s)' if ok else 'failed')
+            if recovering and not failed:
+                # A successful probe starts a fresh window
+                self._samples.clear()
+            self._samples.append((time.monotonic(), latency, failed, slow))
+            calls, failures = self._window_counts()
+
+        if not failed:
+            self.breaker.record_success()
+            return
+
+        self.breaker.record_failure()
+        if calls >= self.min_calls and failures / calls >= self.failure_rate:
+            self.breaker.trip()
+
+    def get_stats(self):
+        with self._lock:
+            calls, failures = self._window_counts()
+            latencies = [sample[1] for sample in self._samples]
+            slow = sum(1 for sample in self._samples if sample[3])
+            stats = {
+                'calls': calls,
+                'failures': failures,
+                'slow_calls': slow,
+                'error_rate': round(failures / calls, 3) if calls else 0.0,
+                'latency_ms': {
+                    'p50': round(float(_percentile(latencies, 50)) * 1000, 1),
+                    'p95': round(float(_percentile(latencies, 95)) * 1000, 1),
+                    'max': round(max(latencies) * 1000, 1)
+                } if latencies else None,
+                'short_circuited': self._short_circuited,
+                'last_error': self._last_error
+            }
+        stats['circuit'] = self.breaker.get_stats()
+        return stats
+
+    def _window_counts(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return len(self._samples), sum(1 for sample in self._samples if sample[2])
+
+
+class HealthTracker:
+    """
+    SourceHealth per upstream source name, created on first use.
+    slow_call_for(name), when given, sets each source's slow-call threshold.
+    """
+
+    def __init__(self, slow_call_for=None, **options):
+        self._slow_call_for = slow_call_for
+        self._options = options
+        self._lock = threading.Lock()
+        self._sources = {}
+
+    def get(self, name):
+        with self._lock:
+            health = self._sources.get(name)
+            if health is None:
+                options = dict(self._options)
+                if self._slow_call_for is not None:
+                    options['slow_call_seconds'] = self._slow_call_for(name)
+                health = self._sources[name] = SourceHealth(**options)
+            return health
+
+    def get_stats(self):
+        with self._lock:
+            sources = dict(self._sources)
+        return {name: health.get_stats() for name, health in sources.items()}
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
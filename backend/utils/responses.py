@@ -0,0 +1,71 @@
+import hashlib
+import threading
+from flask import Response, current_app
+from utils.compression import ENCODINGS, compress, negotiate
+
+
+class PrecomputedResponse:
+    """
+    A JSON payload serialized and compressed (gzip, plus brotli when it is
+    installed) once, served with a strong ETag per encoding and 304s for
+    matching If-None-Match requests
+    """
+
+    def __init__(self, payload, max_age=300):
+        self.body = current_app.json.dumps(payload).encode('utf-8')
+        self.encoded = {
+            encoding: compress(self.body, encoding, 11 if encoding == 'br' else 9) for encoding in ENCODINGS
+        }
+        self.digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.max_age = max_age
+
+    def etag(self, encoding=None):
+        """Strong ETag of one representation (each encoding is a different one)"""
+        return f'{self.digest}-{encoding}' if encoding else self.digest
+
+    def to_response(self, request):
+        encoding = negotiate(request, tuple(self.encoded))
+        etag = self.etag(encoding)
+
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(self.encoded[encoding] if encoding else self.body, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+class PrecomputedResponses:
+    """
+    Precomputed responses by name, re-rendered only when the key their
+    content depends on (registry version, deploy settings, ...) changes
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._stats = {'hits': 0, 'renders': 0}
+
+    def get(self, name, key, render):
+        """Get the response for name, calling render() for a fresh payload if key changed"""
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == key:
+            with self._lock:
+                self._stats['hits'] += 1
+            return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry[0] != key:
+                entry = self._entries[name] = (key, PrecomputedResponse(render(), self.max_age))
+                self._stats['renders'] += 1
+            return entry[1]
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, entries=sorted(self._entries))
@@ -0,0 +1,30 @@
+import hashlib
+import time
+from datetime import datetime
+import numpy as np
+
+
+def seed_from(*parts):
+    """Stable 64-bit seed from str/int parts (the same in every process, unlike hash())"""
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little')
+
+
+def time_bucket(moment=None, seconds=3600):
+    """Index of the `seconds`-long bucket containing moment (datetime or epoch seconds; default now)"""
+    if moment is None:
+        moment = time.time()
+    elif isinstance(moment, datetime):
+        moment = moment.timestamp()
+    return int(moment // seconds)
+
+
+def generator_for(stream, location, moment=None, bucket_seconds=3600):
+    """
+    Private np.random.Generator for one (stream, location, time bucket).
+
+    The same inputs always give the same draws, so responses built from them
+    are reproducible and cacheable, and concurrent requests never share (or
+    reset) RNG state. stream separates unrelated uses, e.g. 'forecast-noise'.
+    """
+    return np.random.default_rng(seed_from(stream, str(location), time_bucket(moment, bucket_seconds)))